@@ -176,6 +176,36 @@ class Case(Base):
         descr=r"""which type of data format to transfer results from inner (stochastic dispatch optimization) runs to
                   the outer (capacity and meta-variable optimization) run. CSV is generally slower and not recommended,
                   but may be useful for debugging. NetCDF is more generally more efficient. \default{netcdf}"""))
+    dispatch_cache = InputData.parameterInputFactory('dispatch_cache',
+        descr=r"""enables caching of dispatch results within inner runs. Dispatch problems are identified by
+                  the signal histories for the year and cluster being dispatched, the component capacities, and
+                  the dispatcher settings; when an identical problem is encountered again (for example, when a
+                  single-year ARMA is replayed over the project life), the cached dispatch is reused instead of
+                  being optimized again. Note this assumes any user-provided functions depend on the year only
+                  through the signal histories. Cache hits and misses of each inner sample are counted in the
+                  inner run profile, if \xmlNode{profile} is enabled.""")
+    dispatch_cache.addSub(InputData.parameterInputFactory('memory', contentType=InputTypes.IntegerType,
+        descr=r"""maximum number of dispatch results to keep in memory. \default{64}"""))
+    dispatch_cache.addSub(InputData.parameterInputFactory('disk', contentType=InputTypes.BoolType,
+        descr=r"""if True, dispatch results are additionally stored on disk next to the inner workflow, so
+                  that they are shared between all inner samples of a run. \default{False}"""))
+    dispatch_cache.addSub(InputData.parameterInputFactory('disk_entries', contentType=InputTypes.IntegerType,
+        descr=r"""maximum number of dispatch results to keep on disk, if \xmlNode{disk} is True; the least
+                  recently used results are removed beyond this number. \default{1024}"""))
+    data_handling.addSub(dispatch_cache)
+    profile_options = InputTypes.makeEnumType('ProfileOptions', 'ProfileOptionsType', ['timers', 'cprofile'])
+    data_handling.addSub(InputData.parameterInputFactory('profile', contentType=profile_options,
+        descr=r"""enables profiling of the inner runs. With \xmlString{timers}, the time spent in and number of
+                  calls to each phase of the inner run (loading, model building, solving, validation, Picard
+                  iterations, result extraction, cashflows, saving) are written for each sample to a JSON file
+                  ``heron_profile_<sample>.json'' in the inner working directory. With \xmlString{cprofile}, a
+                  Python cProfile of the sample is also written to ``heron_profile_<sample>.prof''. Dispatches
+                  solved in parallel worker processes are timed as a whole. \default{None}"""))
+    data_handling.addSub(InputData.parameterInputFactory('resident_runner', contentType=InputTypes.BoolType,
+        descr=r"""if True, each inner worker keeps the loaded HERON library (case, components, sources, and
+                  dispatcher) and the synthetic history structure resident between inner samples, rather than
+                  loading them again for every sample. The library is reloaded whenever its file changes.
+                  \default{False}"""))
     input_specs.addSub(data_handling)
 
     #==== Number of ARMA Samples ====#
@@ -309,6 +339,11 @@ class Case(Base):
         descr=r"""the number of parallel runs to use per inner sampling run. This should be at most the number
               of denoising samples, and at most the number of parallel processes available on your computing
               device. \default{number of denoising samples}"""))
+    parallel.addSub(InputData.parameterInputFactory('dispatch', contentType=InputTypes.IntegerType,
+        descr=r"""the number of local worker processes to use for dispatching the independent years and
+              clusters within each inner realization. Each inner run uses this many processes, so the
+              product of this number, \xmlNode{inner}, and \xmlNode{outer} should be at most the number
+              of parallel processes available on your computing device. \default{1}"""))
     #XXX RAVEN should be providing this InputData
     runinfo = InputData.parameterInputFactory('runinfo',
                 descr=r"""this is copied into the RAVEN runinfo block, and defaults are specified in RAVEN""")
@@ -640,6 +675,7 @@ class Case(Base):
     self.parallelRunInfo = {}          # parallel run info dictionary
     self.outerParallel = 0             # number of outer parallel runs to use
     self.innerParallel = 0             # number of inner parallel runs to use
+    self.dispatchParallel = 1          # number of parallel dispatch processes per inner run
 
     self._diff_study = None            # is this only a differential study?
     self._num_samples = 1              # number of ARMA stochastic samples to use ("denoises")
@@ -661,6 +697,9 @@ class Case(Base):
 
     self.data_handling = {             # data handling options
       'inner_to_outer': 'netcdf',      # how to pass inner data to outer (csv, netcdf)
+      'dispatch_cache': None,          # settings for caching dispatch results, if enabled
+      'resident_runner': False,        # whether inner workers keep the HERON library loaded between samples
+      'profile': None,                 # type of profiling of inner runs, if any
     }
 
     self._time_discretization = None   # (start, end, number) for constructing time discretization, same as argument to np.linspace
@@ -707,6 +746,8 @@ class Case(Base):
             self.outerParallel = sub.value
           elif sub.getName() == 'inner':
             self.innerParallel = sub.value
+          elif sub.getName() == 'dispatch':
+            self.dispatchParallel = sub.value
           elif sub.getName() == 'runinfo':
             for subsub in sub.subparts:
               self.parallelRunInfo[subsub.getName()] = str(subsub.value)
@@ -763,14 +804,17 @@ class Case(Base):
       self.innerParallel = self._num_samples
     #Note that if self.outerParallel == 0 and self.useParallel
     # then outerParallel will be set in template_driver _modify_outer_samplers
-    cores_requested = self.innerParallel * self.outerParallel
+    if self.dispatchParallel < 1:
+      self.raiseAnError(IOError, f'<parallel><dispatch> must be at least 1; got {self.dispatchParallel}!')
+    cores_requested = self.innerParallel * self.outerParallel * self.dispatchParallel
     if cores_requested > 1:
       # check to see if the number of processes available can meet the request
       detected = os.cpu_count() - 1 # -1 to prevent machine OS locking up
       if detected < cores_requested:
         self.raiseAWarning('System may be overloaded and greatly increase run time! ' +
                            f'Number of available cores detected: {detected}; ' +
-                           f'Number requested: {cores_requested} (inner: {self.innerParallel} * outer: {self.outerParallel}) ')
+                           f'Number requested: {cores_requested} (inner: {self.innerParallel} * outer: {self.outerParallel} ' +
+                           f'* dispatch: {self.dispatchParallel}) ')
 
     # TODO what if time discretization not provided yet?
     self.dispatcher.set_time_discr(self._time_discretization)
@@ -790,9 +834,26 @@ class Case(Base):
       name = sub.getName()
       if name == 'inner_to_outer':
         settings['inner_to_outer'] = sub.value
+      elif name == 'dispatch_cache':
+        memory = sub.findFirst('memory')
+        disk = sub.findFirst('disk')
+        disk_entries = sub.findFirst('disk_entries')
+        settings['dispatch_cache'] = {'memory': 64 if memory is None else memory.value,
+                                      'disk': False if disk is None else disk.value,
+                                      'disk_entries': 1024 if disk_entries is None else disk_entries.value}
+      elif name == 'resident_runner':
+        settings['resident_runner'] = sub.value
+      elif name == 'profile':
+        settings['profile'] = sub.value
     # set defaults
     if 'inner_to_outer' not in settings:
       settings['inner_to_outer'] = 'netcdf'
+    if 'dispatch_cache' not in settings:
+      settings['dispatch_cache'] = None
+    if 'resident_runner' not in settings:
+      settings['resident_runner'] = False
+    if 'profile' not in settings:
+      settings['profile'] = None
     return settings
 
   def _read_time_discr(self, node):
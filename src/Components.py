@@ -14,6 +14,7 @@ from HERON.src.Economics import CashFlowUser
 from HERON.src.ValuedParams import factory as vp_factory
 from HERON.src.TransferFuncs import factory as tf_factory
 from HERON.src.ValuedParamHandler import ValuedParamHandler
+from HERON.src.ValuedParams.ValuedParam import time_index_range
 from HERON.src import _utils as hutils
 
 try:
@@ -251,6 +252,24 @@ class Component(Base, CashFlowUser):
     """
     return self.get_interaction().get_minimum(meta, raw=raw)
 
+  def get_capacity_vector(self, meta, time_slice):
+    """
+      returns the capacity of the interaction of this component for a range of time indices
+      @ In, meta, dict, arbitrary metadata from EGRET
+      @ In, time_slice, slice, time indices to evaluate
+      @ Out, capacity, np.array, the capacity of this component's interaction by time
+    """
+    return self.get_interaction().get_capacity_vector(meta, time_slice)
+
+  def get_minimum_vector(self, meta, time_slice):
+    """
+      returns the minimum of the interaction of this component for a range of time indices
+      @ In, meta, dict, arbitrary metadata from EGRET
+      @ In, time_slice, slice, time indices to evaluate
+      @ Out, minimum, np.array, the minimum of this component's interaction by time
+    """
+    return self.get_interaction().get_minimum_vector(meta, time_slice)
+
   def get_capacity_var(self):
     """
       Returns the variable that is used to define this component's capacity.
@@ -483,6 +502,22 @@ class Interaction(Base):
       evaluated[self._capacity_var] *= capacity_factor[self._capacity_var]
     return evaluated, meta
 
+  def get_capacity_vector(self, meta, time_slice):
+    """
+      Returns the capacity of this interaction for a range of time indices.
+      @ In, meta, dict, additional variables to pass through
+      @ In, time_slice, slice, time indices to evaluate
+      @ Out, evaluated, dict, requested values as np.array by time
+      @ Out, meta, dict, additional variable passthrough
+    """
+    meta['request'] = {self._capacity_var: None}
+    evaluated, meta = self._capacity.evaluate_vector(meta, time_slice, target_var=self._capacity_var)
+    # apply capacity factor to get actual capacity for each timestep
+    if self._capacity_factor is not None:
+      capacity_factor = self._capacity_factor.evaluate_vector(meta, time_slice, target_var=self._capacity_var)[0]
+      evaluated[self._capacity_var] = evaluated[self._capacity_var] * capacity_factor[self._capacity_var]
+    return evaluated, meta
+
   def get_capacity_var(self):
     """
       Returns the resource variable that is used to define the capacity limits of this interaction.
@@ -528,6 +563,28 @@ class Interaction(Base):
       evaluated[cap_var] = self.get_capacity(meta)[0][cap_var] * value
     return evaluated, meta
 
+  def get_minimum_vector(self, meta, time_slice):
+    """
+      Returns the minimum level of this interaction for a range of time indices.
+      @ In, meta, dict, additional variables to pass through
+      @ In, time_slice, slice, time indices to evaluate
+      @ Out, evaluated, dict, requested values as np.array by time
+      @ Out, meta, dict, additional variable passthrough
+    """
+    cap_var = self.get_capacity_var()
+    if self._minimum is None:
+      evaluated = {cap_var: np.zeros(len(time_index_range(time_slice)))}
+    else:
+      meta['request'] = {cap_var: None}
+      evaluated, meta = self._minimum.evaluate_vector(meta, time_slice, target_var=cap_var)
+      value = evaluated[cap_var]
+      if np.any(value < 0) or np.any(value > 1):
+        self.raiseAnError(ValueError, f'While calculating minimum operating level for component "{self.tag}", ' +
+            f'an invalid percent was provided/calculated ({value}). Minimums should be between 0 and 1, inclusive.')
+      # convert percentage to real value
+      evaluated[cap_var] = self.get_capacity_vector(meta, time_slice)[0][cap_var] * value
+    return evaluated, meta
+
   def get_sqrt_RTE(self):
     """
       Provide the square root of the round-trip efficiency for this component.
@@ -852,8 +909,24 @@ class Storage(Interaction):
               violating conservation of resources. \default{True}. """
     sub = InputData.parameterInputFactory('periodic_level', contentType=InputTypes.BoolType, descr=descr)
     specs.addSub(sub)
+    # value of resource left in storage at the end of a dispatch window
+    descr=r"""marginal value of each unit of stored resource left in the storage at the end of each dispatch
+              window. This value is added to the dispatch objective for the final level of each window, so that
+              short windows do not empty the storage regardless of what follows. It only informs the dispatch
+              optimization, and is not part of the economic cashflows. Only used if \xmlNode{periodic_level} is
+              False. If not provided, the Pyomo dispatcher can estimate it with
+              \xmlNode{terminal_value_estimate}. \default{None}. """
+    sub = vp_factory.make_input_specs('terminal_value', descr=descr)
+    specs.addSub(sub)
     # control strategy
-    descr=r"""control strategy for operating the storage. If not specified, uses a perfect foresight strategy. """
+    descr=r"""control strategy for operating the storage. If not specified, uses a perfect foresight strategy.
+              The strategy function is called for each dispatch window with a request (its first argument)
+              giving the \texttt{component} and the \texttt{time} values of the window, and returns the storage
+              \texttt{level} at each of those times. With the Pyomo dispatcher, the strategy is evaluated
+              repeatedly with the optimized dispatch of the window (see \xmlNode{picard\_acceleration}), which
+              is provided as \texttt{meta['HERON']['window\_activity']}, a dictionary of activity arrays over
+              the window by component name, tracking variable, and resource; this is \texttt{None} for the
+              first evaluation of each window, before it has been optimized. """
     specs.addSub(vp_factory.make_input_specs('strategy', allowed=['Function'], descr=descr))
     # round trip efficiency
     descr = r"""round-trip efficiency for this component as a scalar multiplier. \default{1.0}"""
@@ -871,6 +944,7 @@ class Storage(Interaction):
     self._stores = None              # the resource stored by this interaction
     self._rate = None                # the rate at which this component can store up or discharge
     self._initial_stored = None      # how much resource does this component start with stored?
+    self._terminal_value = None      # value of each unit stored at the end of a dispatch window, if any
     self._strategy = None            # how to operate storage unit
     self._tracking_vars = ['level', 'charge', 'discharge'] # stored quantity, charge activity, discharge activity
 
@@ -892,6 +966,8 @@ class Storage(Interaction):
         self._set_valued_param('_initial_stored', comp_name, item, mode)
       elif item.getName() == 'periodic_level':
         self.apply_periodic_level = item.value
+      elif item.getName() == 'terminal_value':
+        self._set_valued_param('_terminal_value', comp_name, item, mode)
       elif item.getName() == 'strategy':
         self._set_valued_param('_strategy', comp_name, item, mode)
       elif item.getName() == 'RTE':
@@ -1040,6 +1116,27 @@ class Storage(Interaction):
     amt = pct * self.get_capacity(meta)[0][res]
     return amt
 
+  def has_terminal_value(self):
+    """
+      Determines whether a value for the resource stored at the end of dispatch windows was provided.
+      @ In, None
+      @ Out, has_terminal_value, bool, True if provided
+    """
+    return self._terminal_value is not None
+
+  def get_terminal_value(self, meta):
+    """
+      Find the marginal value of stored resource at the end of a dispatch window
+      @ In, meta, dict, additional variable passthrough
+      @ Out, value, float, value per unit of stored resource, or None if not provided
+    """
+    if self._terminal_value is None:
+      return None
+    res = self.get_resource()
+    request = {res: None}
+    meta['request'] = request
+    return self._terminal_value.evaluate(meta, target_var=res)[0][res]
+
 
 
 
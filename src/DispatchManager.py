@@ -8,14 +8,21 @@
 
 import os
 import sys
+import cProfile
+import threading
 import pickle as pk
 from time import time as run_clock
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 from typing_extensions import final
 
 from . import _utils as hutils
 from . import SerializationManager
+from .dispatch.DispatchCache import DispatchCache
+from .dispatch.SignalStore import SignalStore
+from .dispatch import Profiler
 
 try:
   from ravenframework.PluginBaseClasses.ExternalModelPluginBase import ExternalModelPluginBase
@@ -59,6 +66,10 @@ class DispatchRunner:
     self._override_time = None     # override for micro parameter
     self._save_dispatch = False    # if True then maintain and return full dispatch record
     self._metric_name_map = {}
+    self._lib_signature = None     # identifies the HERON library file loaded
+    self._structure = None         # synthetic history structure, found once from the sources
+    self._signals = None           # SignalStore of the histories for the current sample
+    self._dispatch_cache = None    # cache of solved dispatches, if enabled
 
   #####################
   # API
@@ -88,6 +99,13 @@ class DispatchRunner:
 
     self._metric_name_map = {econ_info['TEAL_out_name']:econ_info['output_name']
                                 for econ_info in self._case.economic_metrics_meta.values()}
+    self._lib_signature = get_lib_signature(path)
+    cache_settings = self._case.data_handling.get('dispatch_cache')
+    if cache_settings is not None:
+      # the on-disk tier sits next to the library, so all inner samples share it
+      directory = os.path.join(os.path.dirname(os.path.abspath(path)), 'dispatch_cache') if cache_settings['disk'] else None
+      self._dispatch_cache = DispatchCache(max_entries=cache_settings['memory'], directory=directory,
+                                           max_disk_entries=cache_settings['disk_entries'])
 
   def extract_variables(self, raven, raven_dict):
     """
@@ -188,6 +206,9 @@ class DispatchRunner:
     heron_meta['Case'] = self._case
     heron_meta['Components'] = self._components
     heron_meta['Sources'] = self._sources
+    # hold the histories in one buffer, sliced to each year and segment as needed
+    self._signals = SignalStore(raven_vars, self._case.get_year_name(), self._case.get_time_name())
+    raven_vars = self._signals.full()
     heron_meta['RAVEN_vars_full'] = raven_vars
     # build indexer for components
     ## indexer is as {component: {res: index}} where index is a standardized index for tracking activity
@@ -319,109 +340,160 @@ class DispatchRunner:
     dispatch_results = {}
     yearly_cluster_data = next(iter(all_structure['details'].values()))['clusters']
 
-    # Initiate significant lists
-    tot_activity_over_clusters_years, list_of_years = [], []
+    # collect the (year, segment) dispatch problems; with no storage carry-over between
+    # segments, these are independent of each other
+    jobs = []
     for year in range(project_life):
       interp_year = interp_years[year] if len(interp_years) > 1 else (interp_years[0] + year)
-      list_of_years.append(interp_year )
-      if self._save_dispatch:
-        dispatch_results[interp_year] = {}
       # If the ARMA is interpolated, we need to track which year we're in.
       # Otherwise, use just the nominal first year.
       active_index['year'] = year if len(range(*structure['interpolated'])) > 1 else 0 # FIXME MacroID not year
-
-      tot_activity_series_dict_list = [] # initialization
       for s, seg in enumerate(segs):
         multiplicity = self._update_meta_for_segment(meta, seg, interp_year, yearly_cluster_data, interp_years, active_index, all_structure)
-        # perform dispatch
-        dispatch = self._dispatcher.dispatch(self._case, self._components, self._sources, meta)
+        jobs.append({'interp_year': interp_year,
+                     'seg': seg,
+                     'multiplicity': multiplicity,
+                     'active_index': dict(meta['HERON']['active_index']),
+                     'RAVEN_vars': meta['HERON']['RAVEN_vars']})
+    # perform dispatch
+    with Profiler.phase('dispatch'):
+      dispatches = self._dispatch_jobs(meta, jobs)
+
+    # total activity over the project life, as integrals by dispatch row weighted by multiplicity
+    activity_labels = None
+    tot_activity = None
+    results = iter(zip(jobs, dispatches)) # ordered by year, then segment
+    for year in range(project_life):
+      for s, seg in enumerate(segs):
+        job, dispatch = next(results)
+        interp_year = job['interp_year']
+        multiplicity = job['multiplicity']
+        if s == 0 and self._save_dispatch:
+          dispatch_results[interp_year] = {}
         if self._save_dispatch:
           dispatch_results[interp_year][seg] = dispatch
         # build evaluation cash flows
-        self._segment_cashflow(meta, s, seg, year, dispatch, multiplicity,
-                               project_life, interp_years, all_structure, final_components)
-
-        tot_activity_series_dict, variable_name_list =  self._get_activity_per_cluster_per_year (dispatch, interp_year, seg, multiplicity)
-        tot_activity_series_dict_list.append(tot_activity_series_dict)
-      tot_activity_over_clusters_years.append(tot_activity_series_dict_list)
-
-    tot_activity_over_clusters_years_result = [element for nestedlist in tot_activity_over_clusters_years for element in nestedlist]
-    tot_activity_over_all_years = self._sum_activities_over_years(list_of_years, variable_name_list, tot_activity_over_clusters_years_result)
+        with Profiler.phase('segment cashflow'):
+          self._segment_cashflow(meta, s, seg, year, dispatch, multiplicity,
+                                 project_life, interp_years, all_structure, final_components)
+        # accumulate activity
+        if tot_activity is None:
+          activity_labels = dispatch.get_row_labels()
+          tot_activity = np.zeros(len(activity_labels))
+        tot_activity += multiplicity * dispatch.integrate()
+
+    tot_activity_over_all_years = dict((f'TotalActivity__{comp.name}__{tracker}__{res}', total)
+                                       for (comp, tracker, res), total in zip(activity_labels, tot_activity.tolist()))
 
     # TEAL, take it away.
-    cf_metrics = self._final_cashflow(meta, final_components, final_settings)
+    with Profiler.phase('final cashflow'):
+      cf_metrics = self._final_cashflow(meta, final_components, final_settings)
     return dispatch_results, cf_metrics, tot_activity_over_all_years
 
 
-  def _get_activity_per_cluster_per_year(self, dispatch, interp_year, seg, multiplicity):
-    """
-      Calculate the component's activity per cluster per year
-      @ In, interp_year, int, a year in the project life (e.g. 2021))
-      @ In, dispatch, HERON.src.dispatch.DispatchState.NumpyState, the entire record of the components' dispatch (all years and clusters)
-      @ In, seg, int, segment/cluster index
-      @ In, multiplicity, int, number of segments represented by this segment within the year
-      @ Out, tot_activity_series_dict, dict, component's activity per cluster per year
-      @ Out, variable_name_list, list, the list of the activity variables with the format : TotalActivity__{component}__{tracker}__{resource}'. For example: TotalActivity__import__production__electricity
-    """
-
-    cluster_year_list_of_dicts = [] # collect all component activity data for for one cluster for one year here
-    for step_index in range(len(dispatch._times)):
-      activity_per_cluster_per_year = {}
-      variable_name_list=[]
-
-      for k in (dispatch._data.keys()):
-        var_name = k.replace("_"+k.split("_")[-1], "") # variable name
-        for ky in (dispatch._resources.keys()):
-          if ky.name == var_name:
-            for index in range (len(dispatch._data[k])):
-              res_name = (list(((dispatch._resources).get(ky)).keys()))[index]
-              variable_name = "TotalActivity__" + "__".join((str(k)).rsplit("_", 1)) + "__" + res_name
-              variable_name_list.append(variable_name)
-              activity_per_cluster_per_year[variable_name] = (dispatch._data[k])[index][step_index]
-
-              activity_per_cluster_per_year['Year', 'Time', 'Cluster', "multiplicity"] = interp_year, dispatch._times[step_index], seg,  multiplicity
-      cluster_year_list_of_dicts.append(activity_per_cluster_per_year)
-
-    activity_series_dict, tot_activity_series_dict = {}, {}
-    for variable in variable_name_list:
-      activity_series_dict[variable] = [sub[variable] for sub in cluster_year_list_of_dicts]
-      tot_activity = 0 # initialization
-      for h in range(len(activity_series_dict[variable])-1):
-        timestep_tot_activity = 0.5*(activity_series_dict[variable][h] + activity_series_dict[variable][h+1]) * (dispatch._times[h+1]- dispatch._times[h])
-        tot_activity = tot_activity + timestep_tot_activity
-
-      tot_activity_series_dict[variable] = tot_activity
-      tot_activity_series_dict["Year"] = interp_year
-      tot_activity_series_dict["Cluster"] = seg
-      tot_activity_series_dict["multiplicity"] = multiplicity
-    return tot_activity_series_dict, variable_name_list
-
-  def _sum_activities_over_years(self, list_of_years, variable_name_list, tot_activity_over_clusters_years_result):
-    """
-      Add up the component's activity over the entire project life
-      @ In, list_of_years, list, list of year in the project life (e.g. [2021, 2021, 2022])
-      @ In, variable_name_list, list, the list of the activity variables with the format : TotalActivity__{component}__{tracker}__{resource}'. For example: TotalActivity__import__production__electricity
-      @ In, tot_activity_over_clusters_years_result, list, list of dictionaries where each dictionary includes an activity for one component for one cluster and one year
-
-      @ In, tot_activity_over_all_years, dict, total activity over the entire project life for each component
-    """
-
-    tot_activity_per_year_list = [] # The total activity per year
-    for year in list_of_years:
-      keys = ["Year"]+ variable_name_list
-      values =[year] + [0] * len(variable_name_list)
-      tot_activity_per_year = dict(zip(keys,values))
-      for d in tot_activity_over_clusters_years_result:
-        if d["Year"] == year:
-          for v in variable_name_list:
-            tot_activity_per_year[v] = tot_activity_per_year[v] + d[v] * d['multiplicity']
-      tot_activity_per_year_list.append(tot_activity_per_year)
-
-    tot_activity_over_all_years = dict(zip(variable_name_list, [0] * len(variable_name_list))) # initialization
-    for v in variable_name_list:
-      for d in tot_activity_per_year_list:
-        tot_activity_over_all_years[v] = tot_activity_over_all_years[v] + d[v]
-    return tot_activity_over_all_years
+  def _dispatch_jobs(self, meta, jobs):
+    """
+      Performs the dispatch for each (year, segment) job, either serially or across a pool of
+      local worker processes as set by the Case's parallel dispatch option. If the dispatch cache
+      is enabled, previously-solved (and repeated) dispatch problems are only dispatched once.
+      @ In, meta, dict, dictionary of passthrough variables
+      @ In, jobs, list(dict), year and segment information for each dispatch, including sliced signals
+      @ Out, dispatches, list(DispatchState), dispatch results in the same order as jobs
+    """
+    # while the dispatcher tunes its settings, results depend on solve timings, so are not reused
+    cache = None if self._dispatcher.is_tuning() else self._dispatch_cache
+    dispatches = [None] * len(jobs)
+    if cache is not None:
+      counts = (cache.hits, cache.disk_hits, cache.misses)
+    # group jobs by problem, so identical problems are solved only once
+    pending = OrderedDict() # as {key: [job indices]}
+    found = {}              # cached entries, as {key: entry}, so each key is only looked up once
+    for j, job in enumerate(jobs):
+      key = j if cache is None else self._dispatch_cache_key(job['RAVEN_vars'])
+      if key in pending:
+        pending[key].append(j)
+        continue
+      if key not in found:
+        found[key] = None if cache is None else cache.get(key)
+      if found[key] is None:
+        pending[key] = [j]
+      else:
+        dispatches[j] = self._restore_dispatch(meta, *found[key])
+
+    to_solve = [jobs[indices[0]] for indices in pending.values()]
+    solved = []
+    # settings tuned from solve timings are found once here, and then shared with any workers
+    while len(solved) < len(to_solve) and self._dispatcher.is_tuning():
+      solved.append(self._dispatch_job(meta, to_solve[len(solved)]))
+    remaining = to_solve[len(solved):]
+    workers = min(self._case.dispatchParallel, len(remaining))
+    if workers <= 1:
+      solved.extend(self._dispatch_job(meta, job) for job in remaining)
+    else:
+      # workers attach to a memory-mapped copy of the histories rather than unpickling them
+      self._signals.share(os.getcwd())
+      try:
+        payload = SerializationManager.dumps((self._case, self._components, self._sources, self._signals))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_initialize_dispatch_worker, initargs=(payload,)) as pool:
+          futures = [pool.submit(_run_dispatch_worker, job['active_index']) for job in remaining]
+          # gather in submission order, so results are deterministic
+          # the workers dispatched copies of the components, so rebuild the records around the originals
+          solved.extend(self._restore_dispatch(meta, *future.result()) for future in futures)
+      finally:
+        self._signals.release()
+
+    for (key, indices), dispatch in zip(pending.items(), solved):
+      dispatches[indices[0]] = dispatch
+      if cache is not None:
+        entry = (type(dispatch), np.array(dispatch._times), dict((k, np.array(v)) for k, v in dispatch._data.items()))
+        cache.put(key, entry)
+        # repeats of the problem reuse the entry just stored, rather than looking it up again
+        for j in indices[1:]:
+          dispatches[j] = self._restore_dispatch(meta, *entry)
+    if cache is not None:
+      Profiler.count('dispatch cache hits', cache.hits - counts[0])
+      Profiler.count('dispatch cache disk hits', cache.disk_hits - counts[1])
+      Profiler.count('dispatch cache misses', cache.misses - counts[2])
+    return dispatches
+
+  def _dispatch_job(self, meta, job):
+    """
+      Performs the dispatch for one (year, segment) job in this process.
+      @ In, meta, dict, dictionary of passthrough variables
+      @ In, job, dict, year and segment information for the dispatch, including sliced signals
+      @ Out, dispatch, DispatchState, dispatch result
+    """
+    meta['HERON']['active_index'] = job['active_index']
+    meta['HERON']['RAVEN_vars'] = job['RAVEN_vars']
+    return self._dispatcher.dispatch(self._case, self._components, self._sources, meta)
+
+  def _dispatch_cache_key(self, raven_vars):
+    """
+      Identifies a dispatch problem for the dispatch cache.
+      @ In, raven_vars, dict, RAVEN variables sliced to the year, segment
+      @ Out, key, str, hash identifying the dispatch problem
+    """
+    capacities = []
+    for comp in self._components:
+      cap = comp.get_capacity(None, raw=True)
+      capacities.append((comp.name, cap.get_value() if cap.is_parametric() else cap.type))
+    signals = dict((var, vals) for var, vals in raven_vars.items() if var != '_indexMap')
+    return DispatchCache.make_key(self._lib_signature, self._dispatcher.get_cache_signature(), capacities, signals)
+
+  def _restore_dispatch(self, meta, state_type, times, data):
+    """
+      Builds a dispatch record for this runner's components from stored activity.
+      @ In, meta, dict, dictionary of passthrough variables
+      @ In, state_type, type, DispatchState class to build
+      @ In, times, np.array, time values of the dispatch
+      @ In, data, dict, dispatch activity arrays by component and tracking variable
+      @ Out, dispatch, DispatchState, dispatch record
+    """
+    dispatch = state_type()
+    dispatch.initialize(self._components, meta['HERON']['resource_indexer'], times)
+    for key, values in data.items():
+      dispatch._data[key][...] = values
+    return dispatch
 
   def _build_econ_objects(self, heron_case, heron_components, project_life):
     """
@@ -552,8 +624,13 @@ class DispatchRunner:
       @ In, TODO
       @ Out, None
     """
-    # LOCAL component cashflows are SPECIFIC TO A DIVISION
-    _, local_comps = self._build_econ_objects(self._case, self._components, project_life)
+    # LOCAL component cashflows are only needed to set up the Capex cashflows (and their
+    # depreciation) in the first segment of the first year; otherwise all contributions are
+    # written directly to the final cashflows, which can stand in for the local ones.
+    if year == 0 and s == 0:
+      _, local_comps = self._build_econ_objects(self._case, self._components, project_life)
+    else:
+      local_comps = final_components
     meta['HERON']['active_index'] = {'year': year if len(interp_years) > 1 else 0, 'division': seg,}
     meta['HERON']['RAVEN_vars'] = self._slice_signals(all_structure, meta['HERON'])
     pivot_var = meta['HERON']['Case'].get_time_name()
@@ -570,6 +647,7 @@ class DispatchRunner:
       specific_meta['HERON']['component'] = comp
       specific_meta['HERON']['all_activity'] = dispatch
       specific_activity = {}
+      vector_activity = None # activity over all time steps, shared by vectorized cashflows
       final_cashflows = final_comp.getCashflows()
       for f, heron_cf in enumerate(comp.get_cashflows()):
         # get the corresponding TEAL.CashFlow
@@ -633,6 +711,29 @@ class DispatchRunner:
               contrib = params['cost']
               final_cf._yearlyCashflow[year + 1] += contrib
           # hourly recurring need iteration over time
+          elif heron_cf.get_period() == 'hour' and heron_cf.is_vectorizable():
+            # evaluate all time stamps at once, using arrays of activity and signals
+            time_indices = np.arange(len(times))
+            if vector_activity is None:
+              vector_activity = {}
+              for track_var in comp.get_tracking_vars():
+                vector_activity[track_var] = {}
+                for resource, r in resource_indexer[comp].items():
+                  vector_activity[track_var][resource] = dispatch.get_activity_indexed(comp, track_var, r, time_indices)
+            specific_meta['HERON']['time_index'] = time_indices
+            specific_meta['HERON']['time_value'] = times
+            specific_meta['HERON']['activity'] = vector_activity
+            params = heron_cf.calculate_params(specific_meta) # a, D, Dp, x, cost
+            # costs that don't vary in time still apply at every time stamp
+            costs = np.broadcast_to(params['cost'], time_indices.shape)
+            contrib = costs.sum() * multiplicity
+            final_cf._yearlyCashflow[year+1] += contrib
+            # leave the last time stamp active, as the iterative evaluation does
+            specific_meta['HERON']['time_index'] = time_indices[-1]
+            specific_meta['HERON']['time_value'] = times[-1]
+            specific_meta['HERON']['activity'] = dict((track_var, dict((resource, acts[-1]) for resource, acts in by_res.items()))
+                                                      for track_var, by_res in vector_activity.items())
+          # hourly recurring that can't be vectorized (e.g. user functions) need iteration over time
           elif heron_cf.get_period() == 'hour':
             for t, time in enumerate(times):
               # fill in the specific activity for this time stamp
@@ -703,6 +804,9 @@ class DispatchRunner:
       @ In, raven_vars, dict, variables coming from RAVEN
       @ Out, all_structure, dict, structure (multiyear, cluster/segments, etc) specifications
     """
+    # the structure comes from the source files alone, so it is the same for every sample
+    if self._structure is not None:
+      return self._structure
     all_structure = {'details': {}, 'summary': {}}
     found = False
     assert self._sources is not None
@@ -746,6 +850,7 @@ class DispatchRunner:
                                 'macro_info': summary_info['macro'] if 'macro' in summary_info else {},
                                 'cluster_info': first_year_clusters,
                                 } # TODO need to add index/representivity references!
+    self._structure = all_structure
     return all_structure
 
   def _check_signals(self, raven_vars):
@@ -808,44 +913,85 @@ class DispatchRunner:
       Slices from full signals to specific year/cluster/segment
       Target year/cluster/segment are taken from data['active_index'] TODO change this, it's weird
       No indexes from cluster/segment or year should be present after this operation
+      Slices are views into the SignalStore, and are only made once per year/cluster/segment.
       @ In, all_structure, dict, dictionary of informations about the source ROM structures
       @ In, data, dict, dictionary of info including RAVEN variables and HERON meta information
       @ Out, truncated, dict, RAVEN_vars portion of "data" but with truncated data
     """
-    truncated = {'_indexMap': {}}
-    raven = data['RAVEN_vars_full']
-    index_map = raven['_indexMap']
-    time_var = self._case.get_time_name()
-
-    # are we dealing with time, interpolation, clusters, segments?
     req_indices = data['active_index']
-    macro = req_indices['year'] # FIXME Macro ID!
-    division = req_indices['division']
-    # we keep all of Time, no divider necessary
-
-    for entry in raven:
-      if entry in index_map:
-        index_order = list(index_map[entry])
-        # TODO this is an awkward fix for histories that are missing some of the indexes
-        slicer = [np.s_[:]] * len(index_order)
-        # if len(index_order) < len(slicer):
-        #   slicer = slicer[:len(index_order)]
-        # time -> take it all, no action needed
-        # cluster
-        if '_ROM_Cluster' in index_order:
-          cluster_index = index_order.index('_ROM_Cluster')
-          slicer[cluster_index] = division
-        # macro time (e.g. cycle, year)
-        if self._case.get_year_name() in index_order:
-          macro_index = index_order.index(self._case.get_year_name())
-          slicer[macro_index] = macro
-        truncated[entry] = raven[entry][tuple(slicer)]
-        truncated['_indexMap'][entry] = [time_var] # the only index left should be "time"
-      else:
-        # entry doesn't depend on year/cluster, so keep it as is
-        truncated[entry] = raven[entry]
-    truncated['_indexMap'] = np.atleast_1d(truncated['_indexMap'])
-    return truncated
+    # FIXME Macro ID!
+    return self._signals.slice(req_indices['year'], req_indices['division'])
+
+
+# runners kept loaded between inner samples, as {(library signature, thread id): runner}
+_resident_runners = {}
+
+def get_lib_signature(path):
+  """
+    Identifies a version of a HERON library file.
+    @ In, path, str, path (including filename) to HERON library
+    @ Out, signature, tuple, (absolute path, size, modification time)
+  """
+  lib_stat = os.stat(path)
+  return (os.path.abspath(path), lib_stat.st_size, lib_stat.st_mtime_ns)
+
+def get_runner(path):
+  """
+    Provides a DispatchRunner with the HERON library loaded. If the Case enables resident runners,
+    the runner is kept for this process and thread, and reused while the library file is unchanged.
+    @ In, path, str, path (including filename) to HERON library
+    @ Out, runner, DispatchRunner, runner with library loaded
+  """
+  thread = threading.get_ident()
+  if os.path.isfile(path):
+    runner = _resident_runners.get((get_lib_signature(path), thread))
+    if runner is not None:
+      return runner
+  runner = DispatchRunner()
+  runner.load_heron_lib(path)
+  if runner._case.data_handling.get('resident_runner', False):
+    # forget runners for earlier versions of this library
+    for key in [key for key in _resident_runners if key[0][0] == runner._lib_signature[0] and key[1] == thread]:
+      del _resident_runners[key]
+    _resident_runners[(runner._lib_signature, thread)] = runner
+  return runner
+
+# HERON objects held by each parallel dispatch worker process, set by _initialize_dispatch_worker
+_worker_objects = {}
+
+def _initialize_dispatch_worker(payload):
+  """
+    Loads the HERON objects needed for dispatching into a worker process.
+    @ In, payload, bytes, serialized (case, components, sources, shared SignalStore)
+    @ Out, None
+  """
+  case, components, sources, signals = SerializationManager.loads(payload)
+  _worker_objects['case'] = case
+  _worker_objects['components'] = components
+  _worker_objects['sources'] = sources
+  _worker_objects['signals'] = signals
+  _worker_objects['RAVEN_vars_full'] = signals.full()
+
+def _run_dispatch_worker(active_index):
+  """
+    Performs a single (year, segment) dispatch in a worker process.
+    @ In, active_index, dict, active indices (including year, segment)
+    @ Out, state_type, type, DispatchState class of the result
+    @ Out, times, np.array, time values of the dispatch
+    @ Out, data, dict, dispatch activity arrays by component and tracking variable
+  """
+  case = _worker_objects['case']
+  components = _worker_objects['components']
+  heron_meta = {'Case': case,
+                'Components': components,
+                'Sources': _worker_objects['sources'],
+                'RAVEN_vars_full': _worker_objects['RAVEN_vars_full'],
+                'resource_indexer': dict((comp, dict((res, r) for r, res in enumerate(comp.get_resources())))
+                                         for comp in components),
+                'active_index': active_index,
+                'RAVEN_vars': _worker_objects['signals'].slice(active_index['year'], active_index['division'])}
+  dispatch = case.dispatcher.dispatch(case, components, _worker_objects['sources'], {'HERON': heron_meta})
+  return type(dispatch), dispatch._times, dispatch._data
 
 
 class DispatchManager(ExternalModelPluginBase):
@@ -887,18 +1033,36 @@ class DispatchManager(ExternalModelPluginBase):
       @ Out, None
     """
     path = os.path.join(os.getcwd(), '..', 'heron.lib') # TODO custom name?
-    # build runner
-    runner = DispatchRunner()
-    # load library file
-    runner.load_heron_lib(path)
-    # load data from RAVEN
-    raven_vars = runner.extract_variables(raven, raven_dict)
-    # TODO clustering, multiyear, etc?
-    # add settings from readMoreXML
-    override_time = getattr(raven, '_override_time', None)
-    if override_time is not None:
-      runner.override_time(override_time) # TODO setter
-    dispatch, metrics, tot_activity = runner.run(raven_vars)
-    runner.save_variables(raven, dispatch, metrics, tot_activity)
+    # profiling starts before loading, so the load is included; it is stopped if not requested
+    profile = Profiler.start()
+    # build runner and load library file, or reuse the resident runner
+    with Profiler.phase('load library'):
+      runner = get_runner(path)
+    profile_type = runner._case.data_handling.get('profile')
+    if profile_type is None:
+      Profiler.stop()
+    c_profile = cProfile.Profile() if profile_type == 'cprofile' else None
+    if c_profile is not None:
+      c_profile.enable()
+    try:
+      # load data from RAVEN
+      with Profiler.phase('extract variables'):
+        raven_vars = runner.extract_variables(raven, raven_dict)
+      # TODO clustering, multiyear, etc?
+      # add settings from readMoreXML
+      override_time = getattr(raven, '_override_time', None)
+      if override_time is not None:
+        runner.override_time(override_time) # TODO setter
+      dispatch, metrics, tot_activity = runner.run(raven_vars)
+      with Profiler.phase('save variables'):
+        runner.save_variables(raven, dispatch, metrics, tot_activity)
+    finally:
+      if profile_type is not None:
+        Profiler.stop()
+        sample = raven_dict.get('prefix', os.getpid())
+        profile.write(f'heron_profile_{sample}.json')
+        if c_profile is not None:
+          c_profile.disable()
+          c_profile.dump_stats(f'heron_profile_{sample}.prof')
 
 
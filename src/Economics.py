@@ -566,14 +566,26 @@ class CashFlow:
       @ Out, params, dict, dictionary of parameters mapped to values including the cost
     """
     # TODO maybe don't cast these as floats, as they could be symbolic expressions (seems unlikely)
-    Dp = float(self._reference.evaluate(values_dict, target_var='reference_driver')[0]['reference_driver'])
-    x = float(self._scale.evaluate(values_dict, target_var='scaling_factor_x')[0]['scaling_factor_x'])
+    Dp = self._reference.evaluate(values_dict, target_var='reference_driver')[0]['reference_driver']
+    x = self._scale.evaluate(values_dict, target_var='scaling_factor_x')[0]['scaling_factor_x']
+    # vectorized evaluations may provide these as arrays over time
+    Dp = float(Dp) if np.ndim(Dp) == 0 else np.asarray(Dp, dtype=float)
+    x = float(x) if np.ndim(x) == 0 else np.asarray(x, dtype=float)
     a = self._alpha.evaluate(values_dict, target_var='reference_price')[0]['reference_price']
     D = self._driver.evaluate(values_dict, target_var='driver')[0]['driver']
     cost = a * (D / Dp) ** x
     params = {'alpha': a, 'driver': D, 'ref_driver': Dp, 'scaling': x, 'cost': cost} # TODO float(cost) except in pyomo it's not a float
     return params
 
+  def is_vectorizable(self):
+    """
+      Determines if this cash flow's parameters can be calculated for many time steps at once,
+      using time index and activity arrays (see ValuedParam.is_vectorizable).
+      @ In, None
+      @ Out, vectorizable, bool, True if calculate_params accepts time arrays
+    """
+    return all(vp.is_vectorizable() for vp in (self._driver, self._alpha, self._reference, self._scale))
+
   #######
   # API #
   #######
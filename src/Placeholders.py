@@ -11,6 +11,7 @@ import copy
 
 import HERON.src._utils as hutils
 from HERON.src.base import Base
+from HERON.src.vectorize import is_vectorized
 
 try:
   import ravenframework
@@ -288,6 +289,7 @@ class Function(Placeholder):
     self._type = 'Function'
     self._module = None
     self._module_methods = {}
+    self._vectorized_methods = set() # names of methods that accept arrays of time indices
 
   def __getstate__(self):
     """
@@ -296,7 +298,7 @@ class Function(Placeholder):
       @ Out, d, dict, object contents
     """
     # d = super(self, __getstate__) TODO only if super has one ...
-    d = copy.deepcopy(dict((k, v) for k, v in self.__dict__.items() if k not in ['_module','_module_methods']))
+    d = copy.deepcopy(dict((k, v) for k, v in self.__dict__.items() if k not in ['_module','_module_methods', '_vectorized_methods']))
     return d
 
   def __setstate__(self, d):
@@ -308,6 +310,7 @@ class Function(Placeholder):
     self.__dict__ = d
     self._module = None
     self._module_methods = {}
+    self._vectorized_methods = set()
     target_dir = os.path.dirname(os.path.abspath(self._target_file))
     if target_dir not in sys.path:
       sys.path.append(target_dir)
@@ -346,6 +349,37 @@ class Function(Placeholder):
       if not callable(member):
         continue
       self._module_methods[name] = member
+      if is_vectorized(member, module):
+        self._vectorized_methods.add(name)
+
+  def get_method(self, method):
+    """
+      Provides the callable for a method in stored module, for repeated calling.
+      Results of calls should be checked with check_result.
+      @ In, method, str, method name
+      @ Out, method, callable, method as method(request, data_dict)
+    """
+    return self._module_methods[method]
+
+  def is_vectorized(self, method):
+    """
+      Determines if a method in stored module accepts arrays of time indices.
+      @ In, method, str, method name
+      @ Out, is_vectorized, bool, True if method was declared vectorized
+    """
+    return method in self._vectorized_methods
+
+  def check_result(self, method, result):
+    """
+      Checks the result of a method in stored module has the expected form.
+      @ In, method, str, method name
+      @ In, result, object, results of evaluation
+      @ Out, None
+    """
+    if not (hasattr(result, '__len__') and len(result) == 2 and all(isinstance(r, dict) for r in result)):
+      raise RuntimeError(f'From Function "{self.name}" method "{method}" expected {self._source}.{method} ' +\
+                         'to return with form (results_dict, meta_dict) with both as dictionaries, but received:\n' +\
+                         f'    {result}')
 
   def evaluate(self, method, request, data_dict):
     """
@@ -356,10 +390,7 @@ class Function(Placeholder):
       @ Out, result, dict, results of evaluation
     """
     result = self._module_methods[method](request, data_dict)
-    if not (hasattr(result, '__len__') and len(result) == 2 and all(isinstance(r, dict) for r in result)):
-      raise RuntimeError(f'From Function "{self.name}" method "{method}" expected {self._source}.{method} ' +\
-                         'to return with form (results_dict, meta_dict) with both as dictionaries, but received:\n' +\
-                         f'    {result}')
+    self.check_result(method, result)
     return result
 
 
@@ -486,8 +517,7 @@ class CSV(Placeholder):
     """
     specs = super().read_input(xml)
     self._var_names = specs.parameterValues['variable']
-    with open(self._target_file, 'r', encoding='utf-8-sig') as f:
-      headers = list(s.strip() for s in f.readline().split(','))
+    headers = hutils.get_csv_headers(self._target_file)
     for var in self._var_names:
       if var not in headers:
         self.raiseAnError(
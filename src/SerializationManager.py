@@ -30,3 +30,19 @@ def load_heron_lib(path, retry=0):
         case, components, source = None, None, None
         break
   return case, components, sources
+
+def dumps(objects):
+  """
+    Serializes HERON objects to bytes, e.g. for passing to worker processes
+    @ In, objects, object, HERON objects to serialize
+    @ Out, payload, bytes, serialized objects
+  """
+  return pk.dumps(objects)
+
+def loads(payload):
+  """
+    Deserializes HERON objects from bytes
+    @ In, payload, bytes, serialized objects
+    @ Out, objects, object, HERON objects
+  """
+  return pk.loads(payload)
@@ -151,6 +151,24 @@ class ValuedParamHandler(MessageUser):
     """
     return isinstance(self._vp, Parametric)
 
+  def get_activity_target(self):
+    """
+      Provides the dispatch activity this VP takes its values from, if any
+      @ In, None
+      @ Out, target, tuple(str, str) or None, (tracking variable, resource) if an Activity VP, else None
+    """
+    if self.type != 'Activity':
+      return None
+    return self._vp.get_tracking_var(), self._vp.get_resource()
+
+  def is_vectorizable(self):
+    """
+      Tell if VP can be evaluated for many time steps at once
+      @ In, None
+      @ Out, is, bool, True if evaluation accepts time arrays
+    """
+    return self._vp.is_vectorizable()
+
   def set_const_VP(self, value):
     """
       Force the Handler to set a ValuedParam without doing reading.
@@ -191,6 +209,21 @@ class ValuedParamHandler(MessageUser):
     data, meta = self._vp.evaluate(*args, custom_input=self._custom_input, **kwargs)
     if self._multiplier is not None:
       for key in data:
-        data[key] *= self._multiplier
+        # not in place, as vectorized evaluations may return views of shared arrays
+        data[key] = data[key] * self._multiplier
+    return data, meta
+
+  def evaluate_vector(self, inputs, time_slice, **kwargs):
+    """
+      Evaluate the ValuedParam for a contiguous range of time indices at once
+      @ In, inputs, dict, stuff from RAVEN, particularly including the keys 'meta' and 'raven_vars'
+      @ In, time_slice, slice, time indices to evaluate (stop must be given)
+      @ In, kwargs, dict, keyword arguements for ValuedParam
+      @ Out, evaluate, object, stuff from ValuedParam evaluation, as arrays by time
+    """
+    data, meta = self._vp.evaluate_vector(inputs, time_slice, custom_input=self._custom_input, **kwargs)
+    if self._multiplier is not None:
+      for key in data:
+        data[key] = data[key] * self._multiplier
     return data, meta
 
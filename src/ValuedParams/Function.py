@@ -35,6 +35,27 @@ class Function(ValuedParam):
     super().__init__()
     self._method_name = None # name of the method within the module
     self._source_kind = 'Function'
+    self._method = None      # cached callable for the method, found on first evaluation
+
+  def __getstate__(self):
+    """
+      Serialization.
+      @ In, None
+      @ Out, d, dict, object contents
+    """
+    # the user module is reloaded by the Function placeholder, so the method is found again
+    d = dict(self.__dict__)
+    d['_method'] = None
+    return d
+
+  def set_object(self, obj):
+    """
+      Set the evaluation target of this valued param (e.g., function, ARMA, etc).
+      @ In, obj, instance, evaluation target
+      @ Out, None
+    """
+    super().set_object(obj)
+    self._method = None
 
   def read(self, comp_name, spec, mode, alias_dict=None):
     """
@@ -53,6 +74,16 @@ class Function(ValuedParam):
     self._method_name = spec.parameterValues['method']
     return [self._method_name]
 
+  def is_vectorizable(self):
+    """
+      Determines if this valued param can be evaluated for many time steps at once.
+      User functions are written for a single time step, unless declared vectorized
+      (see HERON.src.vectorize).
+      @ In, None
+      @ Out, vectorizable, bool, True if evaluation accepts time arrays
+    """
+    return self._target_obj is not None and self._target_obj.is_vectorized(self._method_name)
+
   def evaluate(self, inputs, target_var=None, aliases=None, custom_input=None):
     """
       Evaluate this ValuedParam, wherever it gets its data from
@@ -71,5 +102,9 @@ class Function(ValuedParam):
     # the "request" is what we're asking for from the function, the first argument given.
     # -> note it can be None if the function is not a transfer-type function
     request = inputs.pop('request', None)
-    data, meta = self._target_obj.evaluate(self._method_name, request, inputs)
+    if self._method is None:
+      self._method = self._target_obj.get_method(self._method_name)
+    result = self._method(request, inputs)
+    self._target_obj.check_result(self._method_name, result)
+    data, meta = result
     return data, meta
@@ -98,6 +98,22 @@ class ROM(ValuedParam):
     self._inputs[name] = {'vp': vp, 'signals': [signal]}
     return signal
 
+  def is_vectorizable(self):
+    """
+      Determines if this valued param can be evaluated for many time steps at once.
+      The ROM is always evaluated for the full history, so this is possible as long as
+      the ROM inputs do not change with the time step, that is, they are all parametric
+      values or RAVEN variables. Time-varying inputs (such as histories or functions) would
+      otherwise be passed to the ROM for the whole window at once.
+      @ In, None
+      @ Out, vectorizable, bool, True if evaluation accepts time arrays
+    """
+    for inp_info in self._inputs.values():
+      vp = inp_info['vp']
+      if not (vp.is_parametric() or vp.type == 'Variable'):
+        return False
+    return True
+
   def evaluate(self, inputs, target_var=None, aliases=None, custom_input=None):
     """
       Evaluate this ValuedParam, wherever it gets its data from
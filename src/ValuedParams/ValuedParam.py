@@ -7,6 +7,7 @@
   a wide variety of different sources and may not be valued until run time.
 """
 import sys
+import numpy as np
 from HERON.src import _utils as hutils
 try:
   import ravenframework
@@ -97,6 +98,52 @@ class ValuedParam(MessageUser):
     """
     return None
 
+  def evaluate_vector(self, inputs, time_slice, target_var=None, aliases=None, custom_input=None):
+    """
+      Evaluate this ValuedParam for a contiguous range of time indices at once.
+      Vectorizable params are evaluated once with an array of time indices (see is_vectorizable),
+      so subclasses only need to support array indices in "evaluate"; other params are
+      evaluated one time index at a time.
+      @ In, inputs, dict, stuff from RAVEN, particularly including the keys 'meta' and 'raven_vars'
+      @ In, time_slice, slice, time indices to evaluate (stop must be given)
+      @ In, target_var, str, optional, requested outgoing variable name if not None
+      @ In, aliases, dict, optional, alternate variable names for searching in variables
+      @ In, custom_input, list, optional, additional custom inputs
+      @ Out, value, dict, dictionary of resulting evaluation as {vars: np.array of vals by time}
+      @ Out, meta, dict, dictionary of meta (possibly changed during evaluation)
+    """
+    indices = time_index_range(time_slice)
+    original_index = inputs['HERON'].get('time_index')
+    if self.is_vectorizable():
+      inputs['HERON']['time_index'] = indices
+      data, inputs = self.evaluate(inputs, target_var=target_var, aliases=aliases, custom_input=custom_input)
+      # values that don't change with time still apply at every time index
+      data = dict((key, np.broadcast_to(val, indices.shape).astype(float)) for key, val in data.items())
+    else:
+      # some evaluations (e.g. Function) consume the request, so provide it for each time
+      request = inputs.get('request', None)
+      values = {}
+      for i, t in enumerate(indices):
+        inputs['HERON']['time_index'] = t
+        if request is not None:
+          inputs['request'] = request
+        data, inputs = self.evaluate(inputs, target_var=target_var, aliases=aliases, custom_input=custom_input)
+        for key, val in data.items():
+          values.setdefault(key, np.empty(len(indices)))[i] = val
+      data = values
+    inputs['HERON']['time_index'] = original_index
+    return data, inputs
+
+  def is_vectorizable(self):
+    """
+      Determines if this valued param can be evaluated for many time steps at once, that is, with
+      inputs['HERON']['time_index'] given as an array of time indices and any activity given
+      as arrays over those time indices.
+      @ In, None
+      @ Out, vectorizable, bool, True if evaluation accepts time arrays
+    """
+    return True
+
   def set_object(self, obj):
     """
       Set the evaluation target of this valued param (e.g., function, ARMA, etc).
@@ -117,3 +164,12 @@ class ValuedParam(MessageUser):
       @ Out, meta, dict, dictionary of meta (possibly changed during evaluation)
     """
     self.raiseAnError(NotImplementedError, 'Overwrite the "evaluate" method in the ValuedParam strategy!')
+
+
+def time_index_range(time_slice):
+  """
+    Converts a slice of time indices into an array of time indices.
+    @ In, time_slice, slice, time indices (stop must be given)
+    @ Out, indices, np.array, integer time indices
+  """
+  return np.arange(time_slice.start or 0, time_slice.stop, time_slice.step or 1)
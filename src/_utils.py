@@ -4,7 +4,11 @@
 """
   utilities for use within heron
 """
+import os
 import sys
+import json
+import hashlib
+import tempfile
 import importlib
 import xml.etree.ElementTree as ET
 import warnings
@@ -115,22 +119,79 @@ def get_project_lifetime(case, components):
   econ_settings.setParams(econ_params)
   return getProjectLength(econ_settings, econ_comps)
 
+# extension of the structure index written next to serialized ROMs
+STRUCTURE_SIDECAR_EXT = '.structure.json'
+
+def _file_stamp(fpath):
+  """
+    Identifies the version of a data file.
+    @ In, fpath, str, path to file
+    @ Out, stamp, dict, size and modification time of file
+  """
+  stat = os.stat(fpath)
+  return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def read_structure_sidecar(fpath):
+  """
+    Reads the structure index of a serialized ROM, if present and up to date with the ROM.
+    @ In, fpath, str, path to serialized ROM
+    @ Out, structure, dict, structure as from get_synthhist_structure, or None if not available
+  """
+  try:
+    with open(fpath + STRUCTURE_SIDECAR_EXT, 'r') as sidecar:
+      index = json.load(sidecar)
+    if index.get('rom') != _file_stamp(fpath):
+      return None
+    structure = index['structure']
+  except (OSError, ValueError, KeyError, AttributeError):
+    return None
+  # JSON only has string keys, so macro steps are stored as [index, clusters] pairs
+  structure['clusters'] = dict((int(macro), clusters) for macro, clusters in structure['clusters'])
+  return structure
+
+def write_structure_sidecar(fpath, structure):
+  """
+    Writes the structure index of a serialized ROM next to it, so later runs need not load the ROM.
+    Failing to write (e.g. read-only location) is not an error.
+    @ In, fpath, str, path to serialized ROM
+    @ In, structure, dict, structure as from get_synthhist_structure
+    @ Out, None
+  """
+  stored = dict(structure)
+  stored['clusters'] = list([macro, clusters] for macro, clusters in structure['clusters'].items())
+  index = {'rom': _file_stamp(fpath), 'structure': stored}
+  tmp_path = None
+  try:
+    # write atomically, since parallel inner runs may be reading it
+    handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(fpath)), suffix='.tmp')
+    with os.fdopen(handle, 'w') as sidecar:
+      json.dump(index, sidecar)
+    os.replace(tmp_path, fpath + STRUCTURE_SIDECAR_EXT)
+  except (OSError, TypeError):
+    if tmp_path is not None and os.path.exists(tmp_path):
+      os.remove(tmp_path)
+
 @cache
 def get_synthhist_structure(fpath):
   """
-    Extracts synthetic history info from ROM (currently ARMA ROM)
+    Extracts synthetic history info from ROM (currently ARMA ROM).
+    Uses the structure index next to the ROM if it is up to date, otherwise loads the ROM and writes the index.
     @ In, fpath, str, full absolute path to serialized ROM
     @ Out, structure, dict, derived structure from reading ROM XML
   """
+  structure = read_structure_sidecar(fpath)
+  if structure is not None:
+    return structure
   # TODO could this be a function of the ROM itself?
   # TODO or could we interrogate the ROM directly instead of the XML?
   try:
     import ravenframework
   except ModuleNotFoundError:
     #If ravenframework not in path, need to add, otherwise loading rom will fail
-    raven_path = hutils.get_raven_loc()
+    raven_path = get_raven_loc()
     sys.path.append(os.path.expanduser(raven_path))
-  rom = pickle.load(open(fpath, 'rb'))
+  with open(fpath, 'rb') as rom_file:
+    rom = pickle.load(rom_file)
 
   structure = {}
   meta = rom.writeXML().getRoot()
@@ -169,8 +230,108 @@ def get_synthhist_structure(fpath):
   # segment information
   # -> TODO
   structure['segments'] = {}
+  write_structure_sidecar(fpath, structure)
   return structure
 
+# extension of the directory of parsed columns written next to static history CSVs
+CSV_CACHE_EXT = '.cache'
+# rows parsed at a time when reading static history CSVs
+CSV_CHUNK_ROWS = 100000
+
+def _csv_column_file(cache_dir, column):
+  """
+    Provides the location of a parsed CSV column in the column cache.
+    @ In, cache_dir, str, column cache directory
+    @ In, column, str, column name
+    @ Out, path, str, path to .npy file
+  """
+  return os.path.join(cache_dir, hashlib.sha1(column.encode()).hexdigest()[:16] + '.npy')
+
+def _save_atomic(fpath, values):
+  """
+    Saves an array to a .npy file so that readers never see a partial file.
+    @ In, fpath, str, target file path
+    @ In, values, np.array, values to save
+    @ Out, None
+  """
+  import numpy as np
+  handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(fpath), suffix='.tmp')
+  try:
+    with os.fdopen(handle, 'wb') as out:
+      np.save(out, values)
+    os.replace(tmp_path, fpath)
+  except OSError:
+    if os.path.exists(tmp_path):
+      os.remove(tmp_path)
+
+def load_csv_columns(fpath, columns, int_columns=None):
+  """
+    Loads selected columns from a static history CSV.
+    Parsed columns are cached as .npy files in a directory next to the CSV, valid while the CSV size
+    and modification time are unchanged, and are returned memory-mapped from there. Columns not yet
+    cached are parsed in one streaming pass that reads only those columns.
+    @ In, fpath, str, path to CSV file
+    @ In, columns, list(str), names of columns to load; all must be present in the CSV
+    @ In, int_columns, list(str), optional, columns that may hold integers (e.g. years); others are read as floats
+    @ Out, data, dict, {column: np.array} of column values
+  """
+  import numpy as np
+  import pandas as pd #Note that this cannot be imported at the start of this
+  # file since _utils.py is used in heron script outside of the raven environment
+  # to find the environment.
+  int_columns = set(int_columns or [])
+  cache_dir = fpath + CSV_CACHE_EXT
+  stamp = _file_stamp(fpath)
+  index_path = os.path.join(cache_dir, 'index.json')
+  try:
+    with open(index_path, 'r') as index_file:
+      cached = json.load(index_file)
+    if cached.get('csv') != stamp:
+      cached = {'csv': stamp, 'columns': []}
+  except (OSError, ValueError):
+    cached = {'csv': stamp, 'columns': []}
+  data = {}
+  for column in columns:
+    if column in cached['columns']:
+      try:
+        data[column] = np.load(_csv_column_file(cache_dir, column), mmap_mode='r')
+      except (OSError, ValueError):
+        pass
+  missing = list(dict.fromkeys(c for c in columns if c not in data))
+  if not missing:
+    return data
+  # stream only the missing columns, with fixed dtypes so chunks are parsed consistently
+  dtypes = dict((c, float) for c in missing if c not in int_columns)
+  chunks = dict((c, []) for c in missing)
+  reader = pd.read_csv(fpath, usecols=missing, dtype=dtypes, chunksize=CSV_CHUNK_ROWS, encoding='utf-8-sig')
+  for chunk in reader:
+    for column in missing:
+      chunks[column].append(chunk[column].to_numpy())
+  parsed = dict((c, np.concatenate(chunks[c]) if chunks[c] else np.zeros(0)) for c in missing)
+  data.update(parsed)
+  # store for later runs; failing to (e.g. read-only location) is not an error
+  try:
+    os.makedirs(cache_dir, exist_ok=True)
+    for column, values in parsed.items():
+      _save_atomic(_csv_column_file(cache_dir, column), values)
+    cached['columns'] = sorted(set(cached['columns']).union(parsed))
+    handle, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    with os.fdopen(handle, 'w') as index_file:
+      json.dump(cached, index_file)
+    os.replace(tmp_path, index_path)
+  except OSError:
+    pass
+  return data
+
+def get_csv_headers(fpath):
+  """
+    Reads the column names of a CSV file.
+    @ In, fpath, str, path to CSV file
+    @ Out, headers, list(str), column names from the first row
+  """
+  with open(fpath, 'r', encoding='utf-8-sig') as f:
+    return list(s.strip() for s in f.readline().split(','))
+
 def get_csv_structure(fpath, macro_var, micro_var):
   """
     Returns CSV structure in a way RAVEN & HERON understand
@@ -179,13 +340,14 @@ def get_csv_structure(fpath, macro_var, micro_var):
     @ In, micro_var, str, Micro Variable name - typically 'Time'
     @ Out, structure, dict, Nested structure of the CSV dataframe.
   """
-  import pandas as pd #Note that this cannot be imported at the start of this
-  # file since _utils.py is used in heron script outside of the raven environment
-  # to find the environment.
-  data = pd.read_csv(fpath)
+  import numpy as np
+  has_macro = macro_var in get_csv_headers(fpath)
+  columns = ([macro_var] if has_macro else []) + [micro_var]
+  data = load_csv_columns(fpath, columns, int_columns=[macro_var, micro_var])
   structure = {}
-  if macro_var in data.columns:
-    macro_steps = pd.unique(data[macro_var].values)
+  if has_macro:
+    macro_steps, lengths = np.unique(np.asarray(data[macro_var]), return_counts=True)
+    macro_steps = list(step.item() for step in macro_steps)
     structure['macro'] = {
       'id': macro_var,
       'num': len(macro_steps) + 1,
@@ -193,13 +355,14 @@ def get_csv_structure(fpath, macro_var, micro_var):
       'last': max(macro_steps)
     }
   else:
-    data[macro_var] = 0
+    macro_steps = [0]
+    lengths = [len(data[micro_var])]
 
   structure['clusters'] = {}
-  for macro_step, df in data.groupby(macro_var):
+  for macro_step, length in zip(macro_steps, lengths):
     structure['clusters'][macro_step] = [{
       'id': 0,
-      'indices': [0, len(df[micro_var].values)],
+      'indices': [0, int(length)],
       'represents': ['0']
     }]
 
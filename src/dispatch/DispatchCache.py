@@ -0,0 +1,186 @@
+# Copyright 2020, Battelle Energy Alliance, LLC
+# ALL RIGHTS RESERVED
+"""
+  Content-addressed cache of solved dispatches.
+"""
+import os
+import pickle as pk
+import hashlib
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+class DispatchCache:
+  """
+    Stores solved dispatches by a hash of everything the dispatch depends on, so that identical
+    dispatch problems (e.g. replayed ARMA years) are only optimized once. Entries are held in an
+    in-memory least-recently-used tier, and optionally in an on-disk tier that can be shared
+    between runs using the same directory. The on-disk tier is also limited in size, removing
+    the least-recently-used files (by modification time, which is renewed on use).
+  """
+  def __init__(self, max_entries=64, directory=None, max_disk_entries=1024):
+    """
+      Constructor.
+      @ In, max_entries, int, optional, maximum number of dispatches kept in memory
+      @ In, directory, str, optional, if given then also store dispatches in this directory
+      @ In, max_disk_entries, int, optional, maximum number of dispatches kept in the directory
+      @ Out, None
+    """
+    self._entries = OrderedDict()   # in-memory tier, as {key: entry}, ordered by last use
+    self._max_entries = max_entries # size limit for in-memory tier
+    self._directory = directory     # location of on-disk tier, if any
+    self._max_disk_entries = max_disk_entries # size limit for on-disk tier
+    self.hits = 0                   # lookups satisfied from memory
+    self.disk_hits = 0              # lookups satisfied from disk
+    self.misses = 0                 # lookups not satisfied
+    if self._directory is not None:
+      os.makedirs(self._directory, exist_ok=True)
+
+  def __repr__(self):
+    """
+      Compiles string representation of object.
+      @ In, None
+      @ Out, repr, str, string representation
+    """
+    return f'<HERON DispatchCache hits: {self.hits} (disk: {self.disk_hits}) misses: {self.misses}>'
+
+  @staticmethod
+  def make_key(*parts):
+    """
+      Creates a content hash from the given parts.
+      @ In, parts, list, objects to hash (nested dicts, lists, tuples, numpy arrays, scalars, strings)
+      @ Out, key, str, hexadecimal hash
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+      _update_hash(digest, part)
+    return digest.hexdigest()
+
+  def get(self, key):
+    """
+      Retrieves a dispatch from the cache, if present.
+      @ In, key, str, hash from make_key
+      @ Out, entry, object, stored dispatch entry, or None if not found
+    """
+    entry = self._entries.get(key)
+    if entry is not None:
+      self._entries.move_to_end(key)
+      self.hits += 1
+      return entry
+    if self._directory is not None:
+      try:
+        with open(self._disk_path(key), 'rb') as cached:
+          entry = pk.load(cached)
+      except (OSError, EOFError, pk.UnpicklingError):
+        entry = None
+      if entry is not None:
+        self._remember(key, entry)
+        self._touch(key)
+        self.hits += 1
+        self.disk_hits += 1
+        return entry
+    self.misses += 1
+    return None
+
+  def put(self, key, entry):
+    """
+      Stores a dispatch in the cache.
+      @ In, key, str, hash from make_key
+      @ In, entry, object, picklable dispatch entry to store
+      @ Out, None
+    """
+    self._remember(key, entry)
+    if self._directory is not None:
+      # write atomically, since other inner runs may be reading the same directory
+      handle, tmp_path = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+      try:
+        with os.fdopen(handle, 'wb') as cached:
+          pk.dump(entry, cached)
+        os.replace(tmp_path, self._disk_path(key))
+      except OSError:
+        if os.path.exists(tmp_path):
+          os.remove(tmp_path)
+      self._prune_disk()
+
+  def _touch(self, key):
+    """
+      Marks an on-disk entry as recently used.
+      @ In, key, str, hash from make_key
+      @ Out, None
+    """
+    try:
+      os.utime(self._disk_path(key))
+    except OSError:
+      pass
+
+  def _prune_disk(self):
+    """
+      Removes the least-recently-used on-disk entries beyond the size limit.
+      @ In, None
+      @ Out, None
+    """
+    stored = []
+    with os.scandir(self._directory) as files:
+      for item in files:
+        if item.name.endswith('.pk'):
+          try:
+            stored.append((item.stat().st_mtime_ns, item.path))
+          except OSError:
+            pass # removed meanwhile by another inner run
+    if len(stored) <= self._max_disk_entries:
+      return
+    stored.sort()
+    for _, path in stored[:len(stored) - self._max_disk_entries]:
+      try:
+        os.remove(path)
+      except OSError:
+        pass
+
+  def _remember(self, key, entry):
+    """
+      Adds an entry to the in-memory tier, evicting the least-recently-used entries as needed.
+      @ In, key, str, hash from make_key
+      @ In, entry, object, dispatch entry to store
+      @ Out, None
+    """
+    self._entries[key] = entry
+    self._entries.move_to_end(key)
+    while len(self._entries) > self._max_entries:
+      self._entries.popitem(last=False)
+
+  def _disk_path(self, key):
+    """
+      Provides the on-disk location of an entry.
+      @ In, key, str, hash from make_key
+      @ Out, path, str, file path
+    """
+    return os.path.join(self._directory, f'{key}.pk')
+
+
+def _update_hash(digest, obj):
+  """
+    Recursively feeds an object into a hash.
+    @ In, digest, hashlib hash, hash to update
+    @ In, obj, object, object to add to the hash
+    @ Out, None
+  """
+  if isinstance(obj, dict):
+    digest.update(b'{')
+    for key in sorted(obj, key=str):
+      _update_hash(digest, key)
+      _update_hash(digest, obj[key])
+    digest.update(b'}')
+  elif isinstance(obj, (list, tuple)):
+    digest.update(b'[')
+    for item in obj:
+      _update_hash(digest, item)
+    digest.update(b']')
+  elif isinstance(obj, np.ndarray):
+    if obj.dtype == object:
+      _update_hash(digest, obj.tolist())
+    else:
+      digest.update(f'{obj.dtype.str}{obj.shape}'.encode())
+      digest.update(np.ascontiguousarray(obj).tobytes())
+  else:
+    digest.update(f'{type(obj).__name__}:{obj!r};'.encode())
@@ -180,6 +180,55 @@ class NumpyState(DispatchState):
     """
     self._data[f'{comp.name}_{activity}'][r, t] = value
 
+  def get_activity_vector(self, comp, res, tracker='production', start_idx=0, end_idx=None):
+    """
+      Shortcut utility for getting values all-at-once in a vector.
+      @ In, comp, HERON Component, component whose information should be retrieved
+      @ In, res, string, name of resource to retrieve
+      @ In, tracker, str, optional, tracking variable name for activity subset, Default: 'production'
+      @ In, start_idx, int, optional, first time index at which activity is provided, Default: 0
+      @ In, end_idx, int, optional, last time index at which activity is provided, Default: None
+      @ Out, values, np.array, activity level (view, not copy); note positive is producting, negative is consuming
+    """
+    r = self._resources[comp][res]
+    return self._data[f'{comp.name}_{tracker}'][r, start_idx:end_idx]
+
+  def create_raven_vars(self, template):
+    """
+      Writes out RAVEN variables as expected
+      @ In, template, str, formating string for variable names (using {comp}, {res})
+      @ Out, data, dict, map of raven var names to numpy array data
+    """
+    data = {}
+    for comp in self._components:
+      for tracker in comp.get_tracking_vars():
+        act_data = self._data[f'{comp.name}_{tracker}']
+        for res, r in self._resources[comp].items():
+          data[template.format(comp=comp.name, tracker=tracker, res=res)] = act_data[r].copy()
+    return data
+
+  def get_row_labels(self):
+    """
+      Provides the (component, tracker, resource) for each activity row, in the order used by "integrate".
+      @ In, None
+      @ Out, labels, list, (HERON Component, str, str) by row
+    """
+    labels = []
+    for comp in self._components:
+      resources = sorted(self._resources[comp], key=self._resources[comp].get)
+      for tag in comp.get_tracking_vars():
+        labels.extend((comp, tag, res) for res in resources)
+    return labels
+
+  def integrate(self):
+    """
+      Integrates all activity over time using the trapezoid rule.
+      @ In, None
+      @ Out, totals, np.array, integrated activity by row (see get_row_labels)
+    """
+    blocks = [self._data[f'{comp.name}_{tag}'] for comp in self._components for tag in comp.get_tracking_vars()]
+    return trapezoid(np.vstack(blocks), self._times)
+
   # def set_activity_vector(self, comp, tracker, res, start_time, end_time, values):
   def set_activity_vector(self, comp, res, values, tracker='production', start_idx=0, end_idx=None):
     """
@@ -200,6 +249,114 @@ class NumpyState(DispatchState):
     r = self._resources[comp][res]
     self._data[f'{comp.name}_{tracker}'][r, start_idx:end_idx] = values
 
+  def set_activity_block(self, comp, tracker, values, start_idx=0):
+    """
+      Shortcut utility for setting all resources of a tracking variable all-at-once.
+      @ In, comp, HERON Component, component whose information should be set
+      @ In, tracker, str, tracking variable name for activity subset
+      @ In, values, np.array, activity levels by (resource index, time index);
+                              note positive is producting, negative is consuming
+      @ In, start_idx, int, optional, first time index at which activity is provided, Default: 0
+      @ Out, None
+    """
+    values = np.atleast_2d(values)
+    self._data[f'{comp.name}_{tracker}'][:, start_idx:start_idx + values.shape[1]] = values
+
+# NumpyState with all activity in one contiguous block
+class ContiguousState(NumpyState):
+  """
+    Implementation of NumpyState holding all activity in a single contiguous array, with one
+    row per (component, tracking variable, resource) and one column per time.
+    Since components use different numbers of resources, the (component, tracker, resource) axes
+    are flattened into rows using precomputed offsets; the per-component arrays in "_data" are
+    views into the single array, so all NumpyState accessors work unchanged.
+  """
+  def __init__(self):
+    """
+      Constructor.
+      @ In, None
+      @ Out, None
+    """
+    NumpyState.__init__(self)
+    self._activity = None # numpy 2D array of all activity, as (row, time)
+    self._offsets = None  # first row of each tracking variable block, as {f'{comp.name}_{tag}': row}
+    self._labels = None   # (component, tracker, resource) for each row
+
+  def __getstate__(self):
+    """
+      Get state for serialization; views are rebuilt after deserialization.
+      @ In, None
+      @ Out, state, dict, object state
+    """
+    state = dict(self.__dict__)
+    state['_data'] = None
+    return state
+
+  def __setstate__(self, state):
+    """
+      Set state from serialization.
+      @ In, state, dict, object state
+      @ Out, None
+    """
+    self.__dict__ = state
+    self._make_views()
+
+  def initialize(self, components, resources_map, times):
+    """
+      Set up dispatch state to hold data
+      @ In, components, list, HERON components to be stored
+      @ In, resources_map, dict, map of resources to indices for each component
+      @ In, times, list, float times to store
+      @ Out, None
+    """
+    DispatchState.initialize(self, components, resources_map, times)
+    self._offsets = {}
+    self._labels = []
+    for comp in components:
+      resources = sorted(self._resources[comp], key=self._resources[comp].get)
+      for tag in comp.get_tracking_vars():
+        self._offsets[f'{comp.name}_{tag}'] = len(self._labels)
+        self._labels.extend((comp, tag, res) for res in resources)
+    self._activity = np.zeros((len(self._labels), len(times)))
+    self._make_views()
+
+  def _make_views(self):
+    """
+      Creates the per-tracking-variable views into the contiguous activity array.
+      @ In, None
+      @ Out, None
+    """
+    self._data = {}
+    for key, start in self._offsets.items():
+      comp = self._labels[start][0]
+      self._data[key] = self._activity[start:start + len(self._resources[comp])]
+
+  def get_row_labels(self):
+    """
+      Provides the (component, tracker, resource) for each row of the activity array.
+      @ In, None
+      @ Out, labels, list, (HERON Component, str, str) by row
+    """
+    return self._labels
+
+  def create_raven_vars(self, template):
+    """
+      Writes out RAVEN variables as expected
+      @ In, template, str, formating string for variable names (using {comp}, {res})
+      @ Out, data, dict, map of raven var names to numpy array data (views into the activity)
+    """
+    return dict((template.format(comp=comp.name, tracker=tracker, res=res), self._activity[row])
+                for row, (comp, tracker, res) in enumerate(self._labels))
+
+  def integrate(self):
+    """
+      Integrates all activity over time using the trapezoid rule.
+      @ In, None
+      @ Out, totals, np.array, integrated activity by row (see get_row_labels)
+    """
+    return trapezoid(self._activity, self._times)
+
+
 # DispatchState for Pyomo dispatcher
 class PyomoState(DispatchState):
   def __init__(self):
@@ -242,3 +399,14 @@ class PyomoState(DispatchState):
 
   def set_activity_indexed(self, comp, r, t, value, valued=False):
     raise NotImplementedError
+
+
+def trapezoid(values, times):
+  """
+    Integrates rows of values over time using the trapezoid rule.
+    @ In, values, np.array, values by (row, time)
+    @ In, times, np.array, time values
+    @ Out, totals, np.array, integral of each row
+  """
+  steps = np.diff(np.asarray(times, dtype=float))
+  return 0.5 * ((values[:, :-1] + values[:, 1:]) * steps).sum(axis=1)
@@ -100,6 +100,24 @@ class Dispatcher(MessageUser, InputDataUser):
     """
     return self._solver
 
+  def get_cache_signature(self):
+    """
+      Provides the settings that determine the dispatch solution, for identifying identical dispatches.
+      @ In, None
+      @ Out, signature, tuple, dispatch-determining settings
+    """
+    validator = None if self._validator is None else type(self._validator).__name__
+    return (type(self).__name__, self._time_discretization, validator, self._solver)
+
+  def is_tuning(self):
+    """
+      Determines whether the dispatcher is still tuning its settings from solve timings. While tuning,
+      dispatch results depend on the timings, so they should not be cached or dispatched in parallel.
+      @ In, None
+      @ Out, is_tuning, bool, True if tuning
+    """
+    return False
+
   # ---------------------------------------------
   # API
   # TODO make this a virtual method?
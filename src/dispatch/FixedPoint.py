@@ -0,0 +1,119 @@
+# Copyright 2020, Battelle Energy Alliance, LLC
+# ALL RIGHTS RESERVED
+"""
+  Acceleration of the fixed-point (Picard) iteration between the optimized dispatch and the
+  activity of governed components.
+  The iteration looks for activity x with x = G(x), where G evaluates the governed components'
+  strategies on the dispatch optimized with their activity fixed at x.
+"""
+import numpy as np
+
+class FixedPointAccelerator:
+  """
+    Proposes the next iterate of a fixed-point iteration from the previous iterates and their images.
+    Iterates are given as {key: np.array}, and accelerated as one concatenated vector.
+  """
+  methods = ['none', 'aitken', 'anderson'] # available acceleration methods
+
+  def __init__(self, method='none', depth=5):
+    """
+      Constructor.
+      @ In, method, str, optional, acceleration method, one of FixedPointAccelerator.methods
+      @ In, depth, int, optional, number of previous iterates used by Anderson acceleration
+      @ Out, None
+    """
+    assert method in self.methods, f'Unknown fixed-point acceleration "{method}"!'
+    self.method = method
+    self.depth = depth
+    self._x = None      # previous iterate, flattened
+    self._g = None      # image of the previous iterate, flattened
+    self._f = None      # residual of the previous iterate, flattened
+    self._omega = 1.0   # Aitken relaxation factor
+    self._dF = []       # Anderson history of residual differences
+    self._dG = []       # Anderson history of image differences
+
+  def __repr__(self):
+    """
+      Compiles string representation of object.
+      @ In, None
+      @ Out, repr, str, string representation
+    """
+    return f'<HERON FixedPointAccelerator method: {self.method} depth: {self.depth}>'
+
+  def update(self, x, g):
+    """
+      Proposes the next iterate.
+      @ In, x, dict, current iterate, as {key: np.array}
+      @ In, g, dict, image G(x) of the current iterate, with the same keys and shapes
+      @ Out, new, dict, next iterate, with the same keys and shapes
+    """
+    keys = list(x)
+    shapes = [np.shape(x[key]) for key in keys]
+    x_flat = np.concatenate([np.ravel(x[key]) for key in keys]).astype(float)
+    g_flat = np.concatenate([np.ravel(g[key]) for key in keys]).astype(float)
+    f_flat = g_flat - x_flat
+    if self.method == 'aitken':
+      new = self._aitken(x_flat, f_flat)
+    elif self.method == 'anderson':
+      new = self._anderson(g_flat, f_flat)
+    else:
+      new = g_flat
+    self._x, self._g, self._f = x_flat, g_flat, f_flat
+    # unflatten
+    result = {}
+    i = 0
+    for key, shape in zip(keys, shapes):
+      size = int(np.prod(shape))
+      result[key] = new[i:i + size].reshape(shape)
+      i += size
+    return result
+
+  def _aitken(self, x, f):
+    """
+      Relaxed update with the vector Aitken (Irons-Tuck) relaxation factor.
+      @ In, x, np.array, current iterate
+      @ In, f, np.array, residual of the current iterate
+      @ Out, new, np.array, next iterate
+    """
+    if self._f is not None:
+      df = f - self._f
+      denom = np.dot(df, df)
+      if denom > 0:
+        self._omega = -self._omega * np.dot(self._f, df) / denom
+    return x + self._omega * f
+
+  def _anderson(self, g, f):
+    """
+      Anderson (type II) mixing of the latest images.
+      @ In, g, np.array, image of the current iterate
+      @ In, f, np.array, residual of the current iterate
+      @ Out, new, np.array, next iterate
+    """
+    if self._f is not None:
+      self._dF.append(f - self._f)
+      self._dG.append(g - self._g)
+      if len(self._dF) > self.depth:
+        self._dF.pop(0)
+        self._dG.pop(0)
+    if not self._dF:
+      return g
+    dF = np.column_stack(self._dF)
+    dG = np.column_stack(self._dG)
+    gamma = np.linalg.lstsq(dF, f, rcond=None)[0]
+    return g - dG @ gamma
+
+
+def relative_change(new, old):
+  """
+    Measures the largest relative difference between two iterates, scaled by the magnitude of the old one.
+    @ In, new, dict, iterate, as {key: np.array}
+    @ In, old, dict, iterate, with the same keys and shapes
+    @ Out, change, float, largest relative L2 norm of the difference
+  """
+  change = 0.0
+  for key, values in old.items():
+    diff = np.linalg.norm(np.asarray(new[key], dtype=float) - values)
+    # Avoid division by zero
+    scale = np.max(np.abs(values)) if np.size(values) else 0.0
+    change = max(change, diff / scale if scale > 0 else diff)
+  return change
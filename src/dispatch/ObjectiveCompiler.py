@@ -0,0 +1,152 @@
+# Copyright 2020, Battelle Energy Alliance, LLC
+# ALL RIGHTS RESERVED
+"""
+  Compiles the marginal cashflow objective of the Pyomo dispatch.
+"""
+import numpy as np
+import pyomo.environ as pyo
+from pyomo.core.expr.numeric_expr import LinearExpression
+
+class ObjectiveCompiler:
+  """
+    Analyses the marginal (hourly) cashflows of the dispatched components once, and builds the
+    dispatch objective for each window from that analysis.
+    Cashflows driven directly by a component activity, with price, reference driver, and scaling
+    factor that do not depend on the activity, are linear in the activity (when the scaling factor is 1):
+      cost[t] = (alpha[t] / Dp[t]) * D[t]
+    These are emitted as a coefficient vector dot the activity variables, evaluating each
+    ValuedParam once per window. All other cashflows are evaluated with the Pyomo activity one
+    time step at a time, as in PyomoModelHandler._compute_cashflows.
+  """
+  def __init__(self, components):
+    """
+      Constructor.
+      @ In, components, list, HERON components whose cashflows make up the objective
+      @ Out, None
+    """
+    self.components = components
+    self._linear = {}  # cashflows that may be linear in activity, as {comp: [(cf, tracker, resource)]}
+    self._generic = {} # cashflows needing expression evaluation, as {comp: [cf]}
+    for comp in components:
+      linear = []
+      generic = []
+      for cf in comp.get_economics().get_cashflows():
+        # same selection as CashFlowGroup.evaluate_cfs with marginal=True
+        if not (cf.get_type() == 'repeating' and cf.get_period() != 'year'):
+          continue
+        target = cf.get_driver().get_activity_target()
+        others = (cf.get_price(), cf.get_reference(), cf.get_scale())
+        if target is not None and all(vp.is_vectorizable() and vp.get_activity_target() is None for vp in others):
+          linear.append((cf, *target))
+        else:
+          generic.append(cf)
+      self._linear[comp] = linear
+      self._generic[comp] = generic
+
+  def __repr__(self):
+    """
+      Compiles string representation of object.
+      @ In, None
+      @ Out, repr, str, string representation
+    """
+    linear = sum(len(cfs) for cfs in self._linear.values())
+    generic = sum(len(cfs) for cfs in self._generic.values())
+    return f'<HERON ObjectiveCompiler linear: {linear} generic: {generic}>'
+
+  def build(self, model, meta):
+    """
+      Builds the objective expression for a window of the dispatch.
+      @ In, model, pyo.ConcreteModel, dispatch model for the window
+      @ In, meta, dict, additional info to be passed through to functional evaluations
+      @ Out, total, pyomo expression, total marginal cashflows over the window
+    """
+    coeffs, variables, generic = self.build_terms(model, meta)
+    total = 0 if generic is None else generic
+    if variables:
+      total += LinearExpression(constant=0.0, linear_coefs=coeffs, linear_vars=variables)
+    return total
+
+  def build_terms(self, model, meta):
+    """
+      Builds the objective for a window of the dispatch as linear terms in the activity variables,
+      and an expression for the remaining cashflows.
+      @ In, model, pyo.ConcreteModel, dispatch model for the window
+      @ In, meta, dict, additional info to be passed through to functional evaluations
+      @ Out, coeffs, list(float), coefficients of the linear terms
+      @ Out, variables, list, pyomo activity variables of the linear terms, in the same order
+      @ Out, generic, pyomo expression, sum of the remaining cashflows, or None if there are none
+    """
+    times = np.asarray(model.Times)
+    time_slice = slice(model.time_offset, model.time_offset + len(times))
+    # evaluations here set the component, time, and activity, so keep these out of the shared meta
+    specific_meta = dict(meta)
+    specific_meta['HERON'] = dict(meta['HERON'])
+    coeffs = []
+    variables = []
+    generic_total = None
+    for comp in self.components:
+      specific_meta['HERON']['component'] = comp
+      generic = list(self._generic[comp])
+      for cf, tracker, resource in self._linear[comp]:
+        var = getattr(model, f'{comp.name}_{tracker}')
+        # governed activity is fixed data rather than a variable
+        slope = None
+        if isinstance(var, pyo.Var):
+          slope = self._linear_coefficients(cf, tracker, resource, times, time_slice, specific_meta)
+        if slope is None:
+          # not linear in this window, so evaluate the expression instead
+          generic.append(cf)
+          continue
+        r = model.resource_index_map[comp][resource]
+        coeffs.extend(slope.tolist())
+        variables.extend(var[r, t] for t in range(len(times)))
+      if generic:
+        subtotal = self._evaluate_generic(model, comp, generic, times, specific_meta)
+        generic_total = subtotal if generic_total is None else generic_total + subtotal
+    return coeffs, variables, generic_total
+
+  def _linear_coefficients(self, cf, tracker, resource, times, time_slice, meta):
+    """
+      Evaluates the per-time-step coefficients of a cashflow linear in an activity.
+      @ In, cf, HERON CashFlow, cashflow to evaluate
+      @ In, tracker, str, tracking variable of the driving activity
+      @ In, resource, str, resource of the driving activity
+      @ In, times, np.array, time values of the window
+      @ In, time_slice, slice, time indices of the window
+      @ In, meta, dict, additional info to be passed through to functional evaluations
+      @ Out, slope, np.array, cost per unit activity by time, or None if not linear
+    """
+    meta['HERON']['time_value'] = times
+    x = cf.get_scale().evaluate_vector(meta, time_slice, target_var='scaling_factor_x')[0]['scaling_factor_x']
+    if not np.all(x == 1):
+      return None
+    # the driver is the activity, possibly with a multiplier, so evaluate it with unit activity
+    meta['HERON']['activity'] = {tracker: {resource: np.ones(len(times))}}
+    unit = cf.get_driver().evaluate_vector(meta, time_slice, target_var='driver')[0]['driver']
+    alpha = cf.get_price().evaluate_vector(meta, time_slice, target_var='reference_price')[0]['reference_price']
+    ref = cf.get_reference().evaluate_vector(meta, time_slice, target_var='reference_driver')[0]['reference_driver']
+    return np.asarray(alpha * unit / ref, dtype=float)
+
+  def _evaluate_generic(self, model, comp, cashflows, times, meta):
+    """
+      Evaluates cashflows using the Pyomo activity, one time step at a time.
+      @ In, model, pyo.ConcreteModel, dispatch model for the window
+      @ In, comp, HERON Component, component owning the cashflows
+      @ In, cashflows, list, HERON CashFlows to evaluate
+      @ In, times, np.array, time values of the window
+      @ In, meta, dict, additional info to be passed through to functional evaluations
+      @ Out, total, pyomo expression, sum of cashflows over the window
+    """
+    resource_indexer = meta['HERON']['resource_indexer']
+    total = 0
+    for t, time in enumerate(times):
+      # NOTE care here to assure that pyomo-indexed variables work here too
+      specific_activity = {}
+      for tracker in comp.get_tracking_vars():
+        specific_activity[tracker] = {}
+        for resource in resource_indexer[comp]:
+          specific_activity[tracker][resource] = model.Activity.get_activity(comp, tracker, resource, time, valued=False)
+      meta['HERON']['time_index'] = t + model.time_offset
+      meta['HERON']['time_value'] = time
+      total += pyo.quicksum(cf.evaluate_cost(specific_activity, meta) for cf in cashflows)
+    return total
@@ -0,0 +1,133 @@
+# Copyright 2020, Battelle Energy Alliance, LLC
+# ALL RIGHTS RESERVED
+"""
+  Timing of the phases of an inner (dispatch) run.
+  Instrumented code marks phases with "with Profiler.phase(name):" and events with "Profiler.count(name)";
+  these do nothing unless a profile has been started for the current sample in the current thread.
+"""
+import json
+import threading
+from time import perf_counter
+from contextlib import contextmanager
+
+class Profile:
+  """
+    Collects the total duration and number of occurrences of named phases, and counts of named events.
+  """
+  def __init__(self):
+    """
+      Constructor.
+      @ In, None
+      @ Out, None
+    """
+    self.durations = {} # total time in each phase, as {phase: seconds}
+    self.calls = {}     # number of times each phase was entered, as {phase: int}
+    self.counters = {}  # number of occurrences of each event, as {event: int}
+    self._start = perf_counter()
+
+  def __repr__(self):
+    """
+      Compiles string representation of object.
+      @ In, None
+      @ Out, repr, str, string representation
+    """
+    return f'<HERON Profile phases: {len(self.durations)} counters: {len(self.counters)}>'
+
+  @contextmanager
+  def phase(self, name):
+    """
+      Times a phase.
+      @ In, name, str, name of phase
+      @ Out, None
+    """
+    start = perf_counter()
+    try:
+      yield
+    finally:
+      self.durations[name] = self.durations.get(name, 0.0) + perf_counter() - start
+      self.calls[name] = self.calls.get(name, 0) + 1
+
+  def count(self, name, n=1):
+    """
+      Counts occurrences of an event.
+      @ In, name, str, name of event
+      @ In, n, int, optional, number of occurrences
+      @ Out, None
+    """
+    self.counters[name] = self.counters.get(name, 0) + n
+
+  def to_dict(self):
+    """
+      Summarizes the profile.
+      @ In, None
+      @ Out, summary, dict, machine-readable profile
+    """
+    phases = dict((name, {'seconds': self.durations[name], 'count': self.calls[name]}) for name in self.durations)
+    return {'total_seconds': perf_counter() - self._start,
+            'phases': phases,
+            'counters': dict(self.counters)}
+
+  def write(self, path):
+    """
+      Writes the profile as JSON.
+      @ In, path, str, file to write
+      @ Out, None
+    """
+    with open(path, 'w') as out:
+      json.dump(self.to_dict(), out, indent=2)
+
+
+# profile of the current sample, if profiling, kept per thread so concurrent samples don't mix
+_local = threading.local()
+
+def _active():
+  """
+    Provides the active profile of the current thread.
+    @ In, None
+    @ Out, profile, Profile, the active profile, or None
+  """
+  return getattr(_local, 'profile', None)
+
+def start():
+  """
+    Starts profiling the current sample.
+    @ In, None
+    @ Out, profile, Profile, the new active profile
+  """
+  _local.profile = Profile()
+  return _local.profile
+
+def stop():
+  """
+    Stops profiling.
+    @ In, None
+    @ Out, profile, Profile, the profile that was active, or None
+  """
+  profile = _active()
+  _local.profile = None
+  return profile
+
+@contextmanager
+def phase(name):
+  """
+    Times a phase in the active profile, if any.
+    @ In, name, str, name of phase
+    @ Out, None
+  """
+  profile = _active()
+  if profile is None:
+    yield
+  else:
+    with profile.phase(name):
+      yield
+
+def count(name, n=1):
+  """
+    Counts occurrences of an event in the active profile, if any.
+    @ In, name, str, name of event
+    @ In, n, int, optional, number of occurrences
+    @ Out, None
+  """
+  profile = _active()
+  if profile is not None:
+    profile.count(name, n)
@@ -0,0 +1,301 @@
+# Copyright 2020, Battelle Energy Alliance, LLC
+# ALL RIGHTS RESERVED
+"""
+  This module constructs the dispatch optimization model used by HERON using vectorized,
+  sparse-matrix assembly of the linear constraints.
+"""
+import numpy as np
+import pyomo.environ as pyo
+from pyomo.core.expr.numeric_expr import LinearExpression
+from pyomo.repn import generate_standard_repn
+
+from .ObjectiveCompiler import ObjectiveCompiler
+from .PyomoModelHandler import PyomoModelHandler
+
+class PyomoMatrixModelHandler(PyomoModelHandler):
+  """
+    Builds the same dispatch optimization as PyomoModelHandler, but assembles the linear
+    constraints (transfer ratios, ramp limits, storage balances, resource conservation) as
+    sparse (row, column, coefficient) arrays over the flattened (component, resource, time)
+    variable layout, rather than evaluating one Pyomo rule per time step.
+    Variables keep the same names and indices, so validation and solution retrieval are unchanged.
+  """
+  def __init__(self, time, time_offset, case, components, resources, initial_storage, meta, objective_compiler=None) -> None:
+    """
+      Initializes a PyomoMatrixModelHandler instance.
+      @ In, time, np.array(float), time values to evaluate; may be length 1 or longer
+      @ In, time_offset, int, optional, increase time index tracker by this value if provided
+      @ In, case, HERON Case, case to evaluate
+      @ In, components, list, HERON components to evaluate
+      @ In, resources, list, HERON resources to evaluate
+      @ In, initial_storage, dict, initial storage levels
+      @ In, meta, dict, additional state information
+      @ In, objective_compiler, ObjectiveCompiler, optional, analysed cashflows to reuse across windows
+      @ Out, None
+    """
+    self._columns = {}   # column offset of each activity variable block, as {var name: offset}
+    self._x = []         # flattened pyomo variable data, in column order
+    self._fixed = set()  # names of governed activity parameters, which are not columns
+    self._column_of = None # column of each variable, as {id(var data): column}
+    self.objective_coeffs = None # objective coefficients per column, if the objective is linear
+    self._solution = None        # solved values per column, while loading a solution
+    super().__init__(time, time_offset, case, components, resources, initial_storage, meta,
+                     objective_compiler=objective_compiler)
+
+  ###################
+  # variable layout #
+  ###################
+  def _create_production_param(self, comp, values, tag=None):
+    """
+      Creates production pyomo fixed parameter object for a component
+      @ In, comp, HERON Component, component to make production variables for
+      @ In, values, np.array(float), values to set for param
+      @ In, tag, str, optional, if not None then name will be component_[tag]
+      @ Out, prod_name, str, name of production variable
+    """
+    prod_name = super()._create_production_param(comp, values, tag=tag)
+    self._fixed.add(prod_name)
+    return prod_name
+
+  def _create_production_variable(self, comp, tag=None, add_bounds=True, **kwargs):
+    """
+      Creates production pyomo variable object for a component, and registers it as a column block.
+      @ In, comp, HERON Component, component to make production variables for
+      @ In, tag, str, optional, if not None then name will be component_[tag]; otherwise "production"
+      @ In, add_bounds, bool, optional, if True then determine and set bounds for variable
+      @ In, kwargs, dict, optional, passalong kwargs to pyomo variable
+      @ Out, prod_name, str, name of production variable
+    """
+    prod_name = super()._create_production_variable(comp, tag=tag, add_bounds=add_bounds, **kwargs)
+    self._columns[prod_name] = len(self._x)
+    # pyomo orders the (resource, time) index lexicographically, matching _cols
+    self._x.extend(getattr(self.model, prod_name).values())
+    return prod_name
+
+  def load_solution(self, state, start_index):
+    """
+      Writes the solved activity of all components into a dispatch state.
+      @ In, state, NumpyState, dispatch state for the full history
+      @ In, start_index, int, time index in the state at which this window starts
+      @ Out, None
+    """
+    # gather every column in one pass, then hand out views by block
+    self._solution = np.array([var.value for var in self._x], dtype=float)
+    super().load_solution(state, start_index)
+    self._solution = None
+
+  def _activity_values(self, name):
+    """
+      Collects the solved values of an activity variable (or governed parameter).
+      @ In, name, str, name of the activity variable on the model
+      @ Out, values, np.array, values by (resource index, time index)
+    """
+    if self._solution is None or name not in self._columns:
+      return super()._activity_values(name)
+    start = self._columns[name]
+    size = len(getattr(self.model, name))
+    return self._solution[start:start + size].reshape(-1, len(self.time))
+
+  def _cols(self, prod_name, r, t):
+    """
+      Provides the flattened column indices for a variable block.
+      @ In, prod_name, str, name of production variable
+      @ In, r, int, resource index within the component
+      @ In, t, np.array(int), time indices
+      @ Out, cols, np.array(int), column indices
+    """
+    return self._columns[prod_name] + r * len(self.time) + t
+
+  ###############
+  # constraints #
+  ###############
+  def _add_linear_constraint(self, name, rows, cols, coeffs, lower, upper):
+    """
+      Adds a block of linear constraints lower <= A x <= upper given A in coordinate form.
+      @ In, name, str, name of the constraint block on the model
+      @ In, rows, np.array(int), row index of each nonzero
+      @ In, cols, np.array(int), column index of each nonzero
+      @ In, coeffs, np.array(float), value of each nonzero
+      @ In, lower, np.array(float) or list, lower bound for each row, NaN or None if unbounded;
+            list entries may also be pyomo expressions of mutable parameters
+      @ In, upper, np.array(float) or list, upper bound for each row, as for lower
+      @ Out, None
+    """
+    num_rows = len(lower)
+    # compress to row-major (CSR) ordering
+    order = np.argsort(rows, kind='stable')
+    cols = cols[order]
+    coeffs = coeffs[order]
+    indptr = np.zeros(num_rows + 1, dtype=int)
+    np.cumsum(np.bincount(rows, minlength=num_rows), out=indptr[1:])
+    if isinstance(lower, np.ndarray):
+      lower = [None if np.isnan(v) else float(v) for v in lower]
+    if isinstance(upper, np.ndarray):
+      upper = [None if np.isnan(v) else float(v) for v in upper]
+    x = self._x
+    coeffs = coeffs.tolist()
+    cols = cols.tolist()
+    def rule(mod, i):
+      start, end = indptr[i], indptr[i + 1]
+      body = LinearExpression(constant=0.0,
+                              linear_coefs=coeffs[start:end],
+                              linear_vars=[x[c] for c in cols[start:end]])
+      if lower[i] is upper[i] or (isinstance(lower[i], float) and lower[i] == upper[i]):
+        return body == lower[i]
+      return (lower[i], body, upper[i])
+    setattr(self.model, name, pyo.Constraint(range(num_rows), rule=rule))
+
+  def _create_transfer_ratio(self, transfer, comp, prod_name):
+    """
+      Create a balance ratio-based transfer function.
+      @ In, transfer, TransferFunc, Ratio transfer function
+      @ In, comp, Component, component object for this transfer
+      @ In, prod_name, str, name of production element
+      @ Out, None
+    """
+    T = np.arange(len(self.time))
+    coeffs = transfer.get_coefficients()
+    coeffs_iter = iter(coeffs.items())
+    first_name, first_coef = next(coeffs_iter)
+    first_r = self.model.resource_index_map[comp][first_name]
+    for resource, coef in coeffs_iter:
+      # activity[r, t] - ratio * activity[first_r, t] == 0
+      ratio = coef / first_coef
+      r = self.model.resource_index_map[comp][resource]
+      rows = np.concatenate([T, T])
+      cols = np.concatenate([self._cols(prod_name, r, T), self._cols(prod_name, first_r, T)])
+      vals = np.concatenate([np.ones(len(T)), np.full(len(T), -ratio)])
+      bounds = np.zeros(len(T))
+      self._add_linear_constraint(f'{comp.name}_{resource}_{first_name}_transfer', rows, cols, vals, bounds, bounds)
+
+  def _create_ramp_limit(self, comp, prod_name):
+    """
+      Creates ramping limitations for a producing component
+      @ In, comp, HERON Component, component to make ramping limits for
+      @ In, prod_name, str, name of production variable
+      @ Out, None
+    """
+    if comp.ramp_freq:
+      # ramp frequency tracking requires binaries; use the rule library
+      super()._create_ramp_limit(comp, prod_name)
+      return
+    r = self.model.resource_index_map[comp][comp.get_capacity_var()]
+    limit = self._find_ramp_limit(comp)
+    # ramping up and down combine into one ranged row per step, regardless of capacity sign:
+    #   -|limit| <= activity[r, t] - activity[r, t-1] <= |limit|
+    limit_delta = pyo.Param(initialize=limit, mutable=True)
+    setattr(self.model, f'{comp.name}_ramp_limit', limit_delta)
+    magnitude = -limit_delta if limit < 0 else limit_delta
+    T = np.arange(1, len(self.time))
+    rows = np.concatenate([T, T]) - 1
+    cols = np.concatenate([self._cols(prod_name, r, T), self._cols(prod_name, r, T - 1)])
+    vals = np.concatenate([np.ones(len(T)), -np.ones(len(T))])
+    self._add_linear_constraint(f'{comp.name}_ramp_constr', rows, cols, vals,
+                                [-magnitude] * len(T), [magnitude] * len(T))
+
+  def _create_storage(self, comp):
+    """
+      Creates storage pyomo variable objects for a storage component
+      @ In, comp, HERON Component, component to make production variables for
+      @ Out, None
+    """
+    r = 0 # NOTE this is only true if each storage ONLY uses 1 resource
+    level_name = self._create_production_variable(comp, tag='level')
+    charge_name = self._create_production_variable(comp, tag='charge', add_bounds=False, within=pyo.NonPositiveReals)
+    discharge_name = self._create_production_variable(comp, tag='discharge', add_bounds=False, within=pyo.NonNegativeReals)
+    # level[t] - level[t-1] + rte2 * dt * charge[t] + dt / rte2 * discharge[t] == 0
+    T = np.arange(len(self.time))
+    times = np.asarray(self.model.Times, dtype=float)
+    dt = np.empty(len(T))
+    dt[1:] = np.diff(times)
+    dt[0] = times[1] - times[0]
+    rte2 = comp.get_sqrt_RTE()
+    rows = [T, T, T]
+    cols = [self._cols(level_name, r, T), self._cols(charge_name, r, T), self._cols(discharge_name, r, T)]
+    vals = [np.ones(len(T)), rte2 * dt, dt / rte2]
+    bounds = [0.0] * len(T)
+    rows.append(T[1:])
+    cols.append(self._cols(level_name, r, T[:-1]))
+    vals.append(-np.ones(len(T) - 1))
+    if comp.get_interaction().apply_periodic_level:
+      # the level before the first step is the level at the last step
+      rows.append(T[:1])
+      cols.append(self._cols(level_name, r, T[-1:]))
+      vals.append(-np.ones(1))
+    else:
+      # mutable, so that the level can be updated when the model is reused
+      initial = pyo.Param(initialize=self.initial_storage[comp], mutable=True)
+      setattr(self.model, f'{comp.name}_initial_level', initial)
+      bounds[0] = initial
+    self._add_linear_constraint(f'{comp.name}_level_constr', np.concatenate(rows), np.concatenate(cols),
+                                np.concatenate(vals), bounds, bounds)
+
+  def _create_conservation(self):
+    """
+      Creates pyomo conservation constraints
+      @ In, None
+      @ Out, None
+    """
+    T = np.arange(len(self.time))
+    for resource, entries in self.get_resource_incidence().items():
+      rows, cols, fixed = [], [], []
+      for name, r in entries:
+        if name in self._fixed:
+          # governed activity is known, so it moves to the right hand side
+          fixed.append((getattr(self.model, name), r))
+        else:
+          rows.append(T)
+          cols.append(self._cols(name, r, T))
+      if not rows:
+        continue
+      if fixed:
+        rhs = [-sum(param[r, t] for param, r in fixed) for t in T]
+      else:
+        rhs = [0.0] * len(T)
+      rows = np.concatenate(rows)
+      self._add_linear_constraint(f'{resource}_conservation', rows, np.concatenate(cols),
+                                  np.ones(len(rows)), rhs, rhs)
+
+  #############
+  # objective #
+  #############
+  def _create_objective(self):
+    """
+      Creates the cashflow objective as a coefficient vector over the variable columns.
+      Linear cashflows come straight from the compiled coefficients; only the remaining cashflows
+      are analysed, and nonlinear ones (e.g. from nonlinear cashflow drivers) are left as generated.
+      @ In, None
+      @ Out, None
+    """
+    self.objective_coeffs = None
+    if self.meta['HERON']['Case'].use_levelized_inner:
+      super()._create_objective()
+      return
+    if self._objective_compiler is None:
+      self._objective_compiler = ObjectiveCompiler(self.components)
+    coeffs, variables, generic = self._objective_compiler.build_terms(self.model, self.meta)
+    if self._column_of is None:
+      self._column_of = dict((id(var), c) for c, var in enumerate(self._x))
+    vector = np.zeros(len(self._x))
+    np.add.at(vector, [self._column_of[id(var)] for var in variables], coeffs)
+    # resource left in storage at the end of the window is worth something to the windows that follow
+    last = len(self.time) - 1
+    for comp, value in self.terminal_values.items():
+      vector[self._cols(f'{comp.name}_level', 0, last)] += value
+    constant = 0.0
+    if generic is not None:
+      repn = generate_standard_repn(generic, compute_values=True)
+      if not repn.is_linear() or any(id(var) not in self._column_of for var in repn.linear_vars):
+        # keep the remaining cashflows as generated
+        nonzero = np.flatnonzero(vector)
+        linear = LinearExpression(constant=0.0, linear_coefs=vector[nonzero].tolist(),
+                                  linear_vars=[self._x[c] for c in nonzero])
+        self.model.obj = pyo.Objective(expr=generic + linear, sense=pyo.maximize)
+        return
+      np.add.at(vector, [self._column_of[id(var)] for var in repn.linear_vars], repn.linear_coefs)
+      constant = float(repn.constant)
+    self.objective_coeffs = vector
+    nonzero = np.flatnonzero(vector)
+    expr = LinearExpression(constant=constant, linear_coefs=vector[nonzero].tolist(),
+                            linear_vars=[self._x[c] for c in nonzero])
+    self.model.obj = pyo.Objective(expr=expr, sense=pyo.maximize)
@@ -9,6 +9,7 @@ import pyomo.environ as pyo
 from . import PyomoRuleLibrary as prl
 from . import putils
 from .DispatchState import PyomoState
+from .ObjectiveCompiler import ObjectiveCompiler
 
 class PyomoModelHandler:
   """
@@ -17,7 +18,7 @@ class PyomoModelHandler:
 
   _eps = 1e-9
 
-  def __init__(self, time, time_offset, case, components, resources, initial_storage, meta) -> None:
+  def __init__(self, time, time_offset, case, components, resources, initial_storage, meta, objective_compiler=None) -> None:
     """
       Initializes a PyomoModelHandler instance.
       @ In, time, np.array(float), time values to evaluate; may be length 1 or longer
@@ -27,6 +28,7 @@ class PyomoModelHandler:
       @ In, resources, list, HERON resources to evaluate
       @ In, initial_storage, dict, initial storage levels
       @ In, meta, dict, additional state information
+      @ In, objective_compiler, ObjectiveCompiler, optional, analysed cashflows to reuse across windows
       @ Out, None
     """
     self.time = time
@@ -36,6 +38,12 @@ class PyomoModelHandler:
     self.resources = resources
     self.initial_storage = initial_storage
     self.meta = meta
+    self._bounded = {}          # variables with capacity-based bounds, as {var name: component}
+    self._production_limits = {} # validation limits, as {(comp name, resource index, time index, kind): (cut index, limit)}
+    self._objective_compiler = objective_compiler # builds the cashflow objective
+    self._incidence = None      # activity variables in each resource's conservation, see get_resource_incidence
+    self.terminal_values = {}   # value of stored resource at the end of the window, as {storage comp: float}
+    self.governed_activity = {} # strategy activity to use for governed components, as {comp: np.array}
     self.model = self.build_model()
 
 
@@ -62,6 +70,8 @@ class PyomoModelHandler:
     model.Components = self.components
     model.Activity = PyomoState()
     model.Activity.initialize(model.Components, model.resource_index_map, model.Times, model)
+    # production limits from validation feedback, see add_production_limits
+    model.validation_limits = pyo.ConstraintList()
     return model
 
 
@@ -77,6 +87,75 @@ class PyomoModelHandler:
     self._create_objective() # objective function
 
 
+  def update_model(self, time, time_offset, initial_storage, meta):
+    """
+      Refreshes the time-dependent data of a populated model for a new window of the same length,
+      keeping the model structure (and hence any solver warm start information) intact.
+      Capacity bounds, ramp limits, governed activity, and initial storage levels are updated in
+      place; validation limits from the previous window are removed; the objective is regenerated.
+      @ In, time, np.array(float), time values to evaluate; same length as the existing model
+      @ In, time_offset, int, increase time index tracker by this value
+      @ In, initial_storage, dict, initial storage levels
+      @ In, meta, dict, additional state information
+      @ Out, None
+    """
+    assert len(time) == len(self.time)
+    self.time = time
+    self.time_offset = time_offset
+    self.initial_storage = initial_storage
+    self.meta = meta
+    self.model.Times = time
+    self.model.time_offset = time_offset
+    self.model.resource_index_map = meta['HERON']['resource_indexer']
+    self.model.Activity.initialize(self.model.Components, self.model.resource_index_map, self.model.Times, self.model)
+    if self._production_limits:
+      self.model.del_component(self.model.validation_limits)
+      self.model.validation_limits = pyo.ConstraintList()
+      self._production_limits = {}
+    for comp in self.components:
+      interaction = comp.get_interaction()
+      if interaction.is_governed():
+        for tag, values in self._get_governed_activity(comp, interaction).items():
+          self._set_production_param(f'{comp.name}_{tag}', values)
+        continue
+      if interaction.is_type('Storage') and not interaction.apply_periodic_level:
+        getattr(self.model, f'{comp.name}_initial_level').set_value(self.initial_storage[comp])
+      if comp.ramp_limit is not None and not interaction.is_type('Storage'):
+        getattr(self.model, f'{comp.name}_ramp_limit').set_value(self._find_ramp_limit(comp))
+    for prod_name, comp in self._bounded.items():
+      self._set_production_bounds(comp, prod_name)
+    self.model.del_component(self.model.obj)
+    self._create_objective()
+
+
+  def load_solution(self, state, start_index):
+    """
+      Writes the solved activity of all components into a dispatch state, one
+      (resource, time) block per tracking variable.
+      @ In, state, NumpyState, dispatch state for the full history
+      @ In, start_index, int, time index in the state at which this window starts
+      @ Out, None
+    """
+    for comp in self.components:
+      for tag in comp.get_tracking_vars():
+        values = self._activity_values(f'{comp.name}_{tag}')
+        state.set_activity_block(comp, tag, values, start_idx=start_index)
+
+  def _activity_values(self, name):
+    """
+      Collects the solved values of an activity variable (or governed parameter).
+      @ In, name, str, name of the activity variable on the model
+      @ Out, values, np.array, values by (resource index, time index)
+    """
+    prod = getattr(self.model, name)
+    # pyomo orders the (resource, time) index lexicographically
+    if isinstance(prod, pyo.Var):
+      values = np.array([var.value for var in prod.values()], dtype=float)
+    else:
+      values = np.array([pyo.value(param) for param in prod.values()], dtype=float)
+    return values.reshape(-1, len(self.time))
+
+
   def _process_component(self, component):
     """
       Determine what kind of component this is and process it accordingly.
@@ -99,22 +178,35 @@ class PyomoModelHandler:
       @ In, interaction, HERON Interaction, interaction to process
       @ Out, None
     """
-    self.meta["request"] = {"component": component, "time": self.time}
-    if interaction.is_type("Storage"):
-      self._process_storage_component(component, interaction)
+    for tag, values in self._get_governed_activity(component, interaction).items():
+      self._create_production_param(component, values, tag=tag)
+
+
+  def _get_governed_activity(self, component, interaction):
+    """
+      Evaluates the activity of a governed component from its strategy, unless given in governed_activity.
+      @ In, component, HERON Component, component to process
+      @ In, interaction, HERON Interaction, interaction to process
+      @ Out, activity, dict, activity values by tracking variable, as {tag: np.array}
+    """
+    if component in self.governed_activity:
+      activity = self.governed_activity[component]
     else:
+      self.meta["request"] = {"component": component, "time": self.time}
       activity = interaction.get_strategy().evaluate(self.meta)[0]['level']
-      self._create_production_param(component, activity)
+    if interaction.is_type("Storage"):
+      return self._get_storage_activity(component, interaction, activity)
+    return {'production': activity}
 
 
-  def _process_storage_component(self, component, interaction):
+  def _get_storage_activity(self, component, interaction, activity):
     """
-      Process a storage component.
+      Determines the activity of a governed storage component from its level.
       @ In, component, HERON Component, component to process
       @ In, interaction, HERON Interaction, interaction to process
+      @ In, activity, np.array, storage level from the strategy
+      @ Out, activity, dict, activity values by tracking variable, as {tag: np.array}
     """
-    activity = interaction.get_strategy().evaluate(self.meta)[0]["level"]
-    self._create_production_param(component, activity, tag="level")
     dt = self.model.Times[1] - self.model.Times[0]
     rte2 = component.get_sqrt_RTE()
     deltas = np.zeros(len(activity))
@@ -122,37 +214,38 @@ class PyomoModelHandler:
     deltas[0] = activity[0] - interaction.get_initial_level(self.meta)
     charge = np.where(deltas > 0, -deltas / dt / rte2, 0)
     discharge = np.where(deltas < 0, -deltas / dt * rte2, 0)
-    self._create_production_param(component, charge, tag="charge")
-    self._create_production_param(component, discharge, tag="discharge")
+    return {'level': activity, 'charge': charge, 'discharge': discharge}
 
 
-  def _create_production_limit(self, validation):
+  def add_production_limits(self, validations):
     """
-      Creates pyomo production constraint given validation errors
-      @ In, validation, dict, information from Validator about limit violation
-      @ Out, None
+      Adds pyomo production constraints given validation errors, as one batch into the indexed
+      validation limits. A new limit on an already limited production replaces the old one.
+      @ In, validations, list, information from Validator about limit violations
+      @ Out, added, int, number of limits added or replaced
     """
     # TODO could validator write a symbolic expression on request? That'd be sweet.
-    comp = validation['component']
-    resource = validation['resource']
-    r = self.model.resource_index_map[comp][resource]
-    t = validation['time_index']
-    limit = validation['limit']
-    limits = np.zeros(len(self.model.Times))
-    limits[t] = limit
-    limit_type = validation['limit_type']
-    prod_name = f'{comp.name}_production'
-    rule = lambda mod: prl.prod_limit_rule(prod_name, r, limits, limit_type, t, mod)
-    constr = pyo.Constraint(rule=rule)
-    counter = 1
-    name_template = f'{comp.name}_{resource}_{t}_vld_limit_constr_{{i}}'
-    # make sure we get a unique name for this constraint
-    name = name_template.format(i=counter)
-    while getattr(self.model, name, None) is not None:
-      counter += 1
-      name = name_template.format(i=counter)
-    setattr(self.model, name, constr)
-    print(f'DEBUGG added validation constraint "{name}"')
+    limits = self.model.validation_limits
+    added = 0
+    for validation in validations:
+      comp = validation['component']
+      r = self.model.resource_index_map[comp][validation['resource']]
+      t = validation['time_index']
+      limit_type = validation['limit_type']
+      limit = validation['limit']
+      key = (comp.name, r, t, limit_type)
+      index, imposed = self._production_limits.get(key, (None, None))
+      if imposed == limit:
+        continue
+      expr = prl.prod_limit_rule(f'{comp.name}_production', r, {t: limit}, limit_type, t, self.model)
+      if index is None:
+        index = limits.add(expr).index()
+      else:
+        limits[index].set_value(expr)
+      self._production_limits[key] = (index, limit)
+      added += 1
+    print(f'DEBUGG added or updated {added} validation limit(s), {len(self._production_limits)} in total')
+    return added
 
 
   def _create_production_param(self, comp, values, tag=None):
@@ -171,11 +264,24 @@ class PyomoModelHandler:
     setattr(self.model, f'{name}_res_index_map', res_indexer)
     prod_name = f'{name}_{tag}'
     init = (((0, t), values[t]) for t in self.model.T)
-    prod = pyo.Param(res_indexer, self.model.T, initialize=dict(init))
+    # mutable, so that the values can be updated when the model is reused
+    prod = pyo.Param(res_indexer, self.model.T, initialize=dict(init), mutable=True)
     setattr(self.model, prod_name, prod)
     return prod_name
 
 
+  def _set_production_param(self, prod_name, values):
+    """
+      Updates the values of a production pyomo fixed parameter object
+      @ In, prod_name, str, name of production parameter
+      @ In, values, np.array(float), values to set for param
+      @ Out, None
+    """
+    prod = getattr(self.model, prod_name)
+    for t in self.model.T:
+      prod[0, t] = values[t]
+
+
   def _create_production(self, comp):
     """
       Creates all pyomo variable objects for a non-storage component
@@ -219,17 +325,8 @@ class PyomoModelHandler:
       indexer = pyo.Set(initialize=range(len(self.model.resource_index_map[comp])))
       setattr(self.model, indexer_name, indexer)
     prod_name = f'{name}_{tag}'
-    caps, mins = self._find_production_limits(comp)
-    if min(caps) < 0:
-      # quick check that capacities signs are consistent #FIXME: revisit, this is an assumption
-      assert max(caps) <= 0, \
-        'Capacities are inconsistent: mix of positive and negative values not currently  supported.'
-      # we have a unit that's consuming, so we need to flip the variables to be sensible
-      mins, caps = caps, mins
-      inits = caps
-    else:
-      inits = mins
     if add_bounds:
+      mins, caps, inits = self._find_production_bounds(comp)
       # create bounds based in min, max operation
       bounds = lambda m, r, t: (mins[t] if r == limit_r else None, caps[t] if r == limit_r else None)
       initial = lambda m, r, t: inits[t] if r == limit_r else 0
@@ -244,9 +341,47 @@ class PyomoModelHandler:
     #   for t, _ in enumerate(m.Times):
     #     prod[limit_r, t].fix(caps[t])
     setattr(self.model, prod_name, prod)
+    if add_bounds:
+      self._bounded[prod_name] = comp
     return prod_name
 
 
+  def _find_production_bounds(self, comp):
+    """
+      Determines the bounds of a unit's governing resource activity, in time.
+      @ In, comp, HERON Component, component to find bounds for
+      @ Out, mins, list, lower activity bounds by time
+      @ Out, caps, list, upper activity bounds by time
+      @ Out, inits, list, initial activity values by time
+    """
+    caps, mins = self._find_production_limits(comp)
+    if min(caps) < 0:
+      # quick check that capacities signs are consistent #FIXME: revisit, this is an assumption
+      assert max(caps) <= 0, \
+        'Capacities are inconsistent: mix of positive and negative values not currently  supported.'
+      # we have a unit that's consuming, so we need to flip the variables to be sensible
+      mins, caps = caps, mins
+      inits = caps
+    else:
+      inits = mins
+    return mins, caps, inits
+
+
+  def _set_production_bounds(self, comp, prod_name):
+    """
+      Updates the bounds of an existing production variable for the current time window.
+      @ In, comp, HERON Component, component owning the production variable
+      @ In, prod_name, str, name of production variable
+      @ Out, None
+    """
+    limit_r = self.model.resource_index_map[comp][comp.get_capacity_var()]
+    prod = getattr(self.model, prod_name)
+    mins, caps, _ = self._find_production_bounds(comp)
+    for t in self.model.T:
+      prod[limit_r, t].setlb(mins[t])
+      prod[limit_r, t].setub(caps[t])
+
+
   def _create_ramp_limit(self, comp, prod_name):
     """
       Creates ramping limitations for a producing component
@@ -256,15 +391,12 @@ class PyomoModelHandler:
     """
     # ramping is defined in terms of the capacity variable
     cap_res = comp.get_capacity_var()       # name of resource that defines capacity
-    cap = comp.get_capacity(self.meta)[0][cap_res]
     r = self.model.resource_index_map[comp][cap_res] # production index of the governing resource
-    # NOTE: this includes the built capacity * capacity factor, if any, which assumes
-    # the ramp rate depends on the available capacity, not the built capacity.
-    limit_delta = comp.ramp_limit * cap # NOTE: if cap is negative, then this is negative.
-    if limit_delta < 0:
-      neg_cap = True
-    else:
-      neg_cap = False
+    limit = self._find_ramp_limit(comp)
+    neg_cap = limit < 0
+    # mutable, so that the limit can be updated when the model is reused
+    limit_delta = pyo.Param(initialize=limit, mutable=True)
+    setattr(self.model, f'{comp.name}_ramp_limit', limit_delta)
     # if we're limiting ramp frequency, make vars and rules for that
     if comp.ramp_freq:
       # create binaries for tracking ramping
@@ -299,6 +431,19 @@ class PyomoModelHandler:
       setattr(self.model, f'{comp.name}_ramp_freq_constr', constr)
 
 
+  def _find_ramp_limit(self, comp):
+    """
+      Determines the limiting change in production level across time steps for a component.
+      @ In, comp, HERON Component, component with ramping limits
+      @ Out, limit, float, ramp limit; NOTE negative for negative-defined capacity
+    """
+    cap_res = comp.get_capacity_var()       # name of resource that defines capacity
+    cap = comp.get_capacity(self.meta)[0][cap_res]
+    # NOTE: this includes the built capacity * capacity factor, if any, which assumes
+    # the ramp rate depends on the available capacity, not the built capacity.
+    return comp.ramp_limit * cap
+
+
   def _create_capacity_constraints(self, comp, prod_name):
     """
       Creates pyomo capacity constraints
@@ -339,20 +484,14 @@ class PyomoModelHandler:
     cap_res = comp.get_capacity_var()       # name of resource that defines capacity
     r = self.model.resource_index_map[comp][cap_res] # production index of the governing resource
     # production is always lower than capacity
-    ## NOTE get_capacity returns (data, meta) and data is dict
-    ## TODO does this work with, e.g., ARMA-based capacities?
-    ### -> "time" is stored on "m" and could be used to correctly evaluate the capacity
-    caps = []
-    mins = []
-    for t, time in enumerate(self.model.Times):
-      self.meta['HERON']['time_index'] = t + self.model.time_offset
-      cap = comp.get_capacity(self.meta)[0][cap_res] # value of capacity limit (units of governing resource)
-      caps.append(cap)
-      if (comp.is_dispatchable() == 'fixed'):
-        minimum = cap
-      else:
-        minimum = comp.get_minimum(self.meta)[0][cap_res]
-      mins.append(minimum)
+    ## NOTE get_capacity_vector returns (data, meta) and data is dict
+    # evaluate the whole window at once
+    time_slice = slice(self.model.time_offset, self.model.time_offset + len(self.model.Times))
+    caps = comp.get_capacity_vector(self.meta, time_slice)[0][cap_res] # capacity limits (units of governing resource)
+    if (comp.is_dispatchable() == 'fixed'):
+      mins = caps
+    else:
+      mins = comp.get_minimum_vector(self.meta, time_slice)[0][cap_res]
     return caps, mins
 
 
@@ -438,7 +577,9 @@ class PyomoModelHandler:
       level_var = getattr(self.model, level_name)
       initial = level_var[(r, self.model.T[-1])]
     else:
-      initial = self.initial_storage[comp]
+      # mutable, so that the level can be updated when the model is reused
+      initial = pyo.Param(initialize=self.initial_storage[comp], mutable=True)
+      setattr(self.model, f'{prefix}_initial_level', initial)
     rule = lambda mod, t: prl.level_rule(comp, level_name, charge_name, discharge_name, initial, r, mod, t)
     setattr(self.model, level_rule_name, pyo.Constraint(self.model.T, rule=rule))
 
@@ -464,14 +605,40 @@ class PyomoModelHandler:
       setattr(self.model, discharge_rule_name, pyo.Constraint(self.model.T, rule=rule))
 
 
+  def get_resource_incidence(self):
+    """
+      Determines which activity variables take part in the conservation of each resource.
+      The incidence only depends on the components, so it is found once per handler.
+      @ In, None
+      @ Out, incidence, dict, as {resource: [(activity variable name, local resource index)]}
+    """
+    if self._incidence is None:
+      incidence = dict((resource, []) for resource in self.resources)
+      for comp, res_dict in self.model.resource_index_map.items():
+        if comp.get_interaction().is_type('Storage'):
+          # Storages have 3 variables: level, charge, and discharge
+          # note that "charge" is negative (as it's consuming) and discharge is positive
+          # -> so the intuitive |discharge| - |charge| becomes discharge + charge
+          names = [f'{comp.name}_charge', f'{comp.name}_discharge']
+        else:
+          names = [f'{comp.name}_production']
+        for resource, r in res_dict.items():
+          if resource in incidence:
+            incidence[resource].extend((name, r) for name in names)
+      self._incidence = incidence
+    return self._incidence
+
   def _create_conservation(self):
     """
       Creates pyomo conservation constraints
       @ In, None
       @ Out, None
     """
-    for resource in self.resources:
-      rule = lambda mod, t: prl.conservation_rule(resource, mod, t)
+    for resource, entries in self.get_resource_incidence().items():
+      if not entries:
+        continue
+      terms = [(getattr(self.model, name), r) for name, r in entries]
+      rule = lambda mod, t, terms=terms: prl.conservation_rule(terms, mod, t)
       constr = pyo.Constraint(self.model.T, rule=rule)
       setattr(self.model, f'{resource}_conservation', constr)
 
@@ -482,9 +649,20 @@ class PyomoModelHandler:
       @ In, None
       @ Out, None
     """
+    # levelized cost objectives are not a sum of cashflows, so evaluate the full expression
+    if self.meta['HERON']['Case'].use_levelized_inner:
+      rule = lambda mod: prl.cashflow_rule(self._compute_cashflows, self.meta, mod)
+      self.model.obj = pyo.Objective(rule=rule, sense=pyo.maximize)
+      return
     # cashflow eval
-    rule = lambda mod: prl.cashflow_rule(self._compute_cashflows, self.meta, mod)
-    self.model.obj = pyo.Objective(rule=rule, sense=pyo.maximize)
+    if self._objective_compiler is None:
+      self._objective_compiler = ObjectiveCompiler(self.components)
+    total = self._objective_compiler.build(self.model, self.meta)
+    # resource left in storage at the end of the window is worth something to the windows that follow
+    last = len(self.time) - 1
+    for comp, value in self.terminal_values.items():
+      total += value * getattr(self.model, f'{comp.name}_level')[0, last]
+    self.model.obj = pyo.Objective(expr=total, sense=pyo.maximize)
 
   def _compute_cashflows(self, components, activity, times, meta, state_args=None, time_offset=0):
     """
@@ -96,7 +96,7 @@ def prod_limit_rule(prod_name, r, limits, kind, t, m) -> bool:
     Constructs pyomo production constraints.
     @ In, prod_name, str, name of production variable
     @ In, r, int, index of resource for capacity constraining
-    @ In, limits, list(float), values in time at which to constrain resource production
+    @ In, limits, list(float) or dict, values in time at which to constrain resource production
     @ In, kind, str, either 'upper' or 'lower' for limiting production
     @ In, t, int, time index for production rule (NOTE not pyomo index, rather fixed index)
     @ In, m, pyo.ConcreteModel, associated model
@@ -245,33 +245,17 @@ def cashflow_rule(compute_cashflows, meta, m) -> float:
   total = compute_cashflows(m.Components, activity, m.Times, meta, state_args=state_args, time_offset=m.time_offset)
   return total
 
-def conservation_rule(res, m, t) -> bool:
+def conservation_rule(terms, m, t) -> bool:
   """
     Constructs conservation constraints.
-    @ In, res, str, name of resource
+    @ In, terms, list, (activity variable, local resource index) pairs producing or consuming the
+      resource, as from PyomoModelHandler.get_resource_incidence
     @ In, m, pyo.ConcreteModel, associated model
     @ In, t, int, index of time variable
     @ Out, conservation, bool, balance check
   """
-  balance = 0 # sum of production rates, which needs to be zero
-  for comp, res_dict in m.resource_index_map.items():
-    if res in res_dict:
-      # activity information depends on if storage or component
-      r = res_dict[res]
-      intr = comp.get_interaction()
-      if intr.is_type('Storage'):
-        # Storages have 3 variables: level, charge, and discharge
-        # -> so calculate activity
-        charge = getattr(m, f'{comp.name}_charge')
-        discharge = getattr(m, f'{comp.name}_discharge')
-        # note that "charge" is negative (as it's consuming) and discharge is positive
-        # -> so the intuitive |discharge| - |charge| becomes discharge + charge
-        production = discharge[r, t] + charge[r, t]
-      else:
-        var = getattr(m, f'{comp.name}_production')
-        # TODO move to this? balance += m._activity.get_activity(comp, res, t)
-        production = var[r, t]
-      balance += production
+  # sum of production rates, which needs to be zero
+  balance = pyo.quicksum(var[r, t] for var, r in terms)
   return balance == 0 # TODO tol?
 
 def min_prod_rule(prod_name, r, caps, minimums, m, t) -> bool:
@@ -0,0 +1,173 @@
+# Copyright 2020, Battelle Energy Alliance, LLC
+# ALL RIGHTS RESERVED
+"""
+  Storage of the synthetic and static histories used in the inner dispatch.
+"""
+import os
+import tempfile
+
+import numpy as np
+
+class SignalStore:
+  """
+    Holds the (year, cluster, time)-indexed histories from RAVEN in a single contiguous buffer.
+    Slices to a (year, cluster) are views into the buffer, and are made only once each. The buffer
+    can be shared through a memory-mapped file, so that parallel dispatch workers attach to it
+    instead of receiving pickled copies of the histories.
+  """
+  def __init__(self, raven_vars, year_var, time_var):
+    """
+      Constructor.
+      @ In, raven_vars, dict, variables from RAVEN, including '_indexMap' for indexed histories
+      @ In, year_var, str, name of the macro (year) index
+      @ In, time_var, str, name of the micro (time) index
+      @ Out, None
+    """
+    self._year_var = year_var
+    self._time_var = time_var
+    self._index_map = dict(raven_vars.get('_indexMap', {}))
+    self._others = {}   # variables not held in the buffer, as {name: value}
+    self._layout = {}   # histories held in the buffer, as {name: (offset, shape)}
+    self._order = list(raven_vars) # original ordering of variables
+    self._slices = {}   # slices already made, as {(year, division): truncated variables}
+    self._plan = None   # how to slice each indexed variable, see _compile_plan
+    self._path = None   # memory-mapped file of the buffer, if shared
+    size = 0
+    for name, value in raven_vars.items():
+      if name in self._index_map and isinstance(value, np.ndarray) and value.dtype.kind == 'f':
+        self._layout[name] = (size, value.shape)
+        size += value.size
+      else:
+        self._others[name] = value
+    self._buffer = np.empty(size)
+    for name, (offset, shape) in self._layout.items():
+      self._buffer[offset:offset + int(np.prod(shape))] = np.ravel(raven_vars[name])
+    self._histories = self._make_views()
+    self._plan = self._compile_plan()
+
+  def __repr__(self):
+    """
+      Compiles string representation of object.
+      @ In, None
+      @ Out, repr, str, string representation
+    """
+    return f'<HERON SignalStore histories: {len(self._layout)} values: {self._buffer.size}>'
+
+  def __getstate__(self):
+    """
+      Get state for pickling. If shared, only the location of the buffer is kept.
+      @ In, None
+      @ Out, state, dict, state of object
+    """
+    state = dict(self.__dict__)
+    del state['_histories']
+    del state['_plan']
+    state['_slices'] = {}
+    if self._path is not None:
+      state['_buffer'] = None
+    return state
+
+  def __setstate__(self, state):
+    """
+      Set state from pickling, attaching to the shared buffer if there is one.
+      @ In, state, dict, state of object
+      @ Out, None
+    """
+    self.__dict__.update(state)
+    if self._buffer is None:
+      # copy on write, so changes stay private as with unshared copies
+      self._buffer = np.load(self._path, mmap_mode='c')
+    self._histories = self._make_views()
+    self._plan = self._compile_plan()
+
+  def _make_views(self):
+    """
+      Builds the views of each history into the buffer.
+      @ In, None
+      @ Out, histories, dict, {name: np.array} views in the original shapes
+    """
+    return dict((name, self._buffer[offset:offset + int(np.prod(shape))].reshape(shape))
+                for name, (offset, shape) in self._layout.items())
+
+  def _compile_plan(self):
+    """
+      Determines, once, how each variable is sliced to a year and cluster.
+      @ In, None
+      @ Out, plan, tuple, (fixed, sliced, index map) where "fixed" is {name: value} of variables
+        not depending on year or cluster, "sliced" is a list of (name, value, slicer, year axis,
+        cluster axis) for those that do (axes are None if not present), and "index map" is the
+        index map of the sliced variables
+    """
+    fixed = {}
+    sliced = []
+    new_map = {}
+    for name in self._order:
+      value = self._histories[name] if name in self._histories else self._others[name]
+      if name == '_indexMap' or name not in self._index_map:
+        # entry doesn't depend on year/cluster, so keep it as is
+        fixed[name] = value
+        continue
+      index_order = list(self._index_map[name])
+      # time -> take it all, no action needed
+      slicer = [np.s_[:]] * len(index_order)
+      cluster_axis = index_order.index('_ROM_Cluster') if '_ROM_Cluster' in index_order else None
+      # macro time (e.g. cycle, year)
+      year_axis = index_order.index(self._year_var) if self._year_var in index_order else None
+      sliced.append((name, value, slicer, year_axis, cluster_axis))
+      new_map[name] = [self._time_var] # the only index left should be "time"
+    return fixed, sliced, np.atleast_1d(new_map)
+
+  def full(self):
+    """
+      Provides all the variables, as given to the constructor.
+      @ In, None
+      @ Out, raven_vars, dict, variables with histories as views into the buffer
+    """
+    return dict((name, self._histories[name] if name in self._histories else self._others[name])
+                for name in self._order)
+
+  def slice(self, year, division):
+    """
+      Slices the histories to a year and cluster, leaving only the time index.
+      @ In, year, int, index of the macro step (year)
+      @ In, division, int, index of the cluster
+      @ Out, truncated, dict, variables with histories sliced to the year, cluster
+    """
+    key = (year, division)
+    truncated = self._slices.get(key)
+    if truncated is not None:
+      return truncated
+    fixed, sliced, new_map = self._plan
+    truncated = dict(fixed)
+    for name, value, slicer, year_axis, cluster_axis in sliced:
+      slicer = list(slicer)
+      if cluster_axis is not None:
+        slicer[cluster_axis] = division
+      if year_axis is not None:
+        slicer[year_axis] = year
+      truncated[name] = value[tuple(slicer)]
+    truncated['_indexMap'] = new_map
+    self._slices[key] = truncated
+    return truncated
+
+  def share(self, directory):
+    """
+      Writes the buffer to a file that unpickled copies of this store memory-map.
+      @ In, directory, str, directory to write the buffer file in
+      @ Out, None
+    """
+    handle, path = tempfile.mkstemp(dir=directory, prefix='signals_', suffix='.npy')
+    with os.fdopen(handle, 'wb') as out:
+      np.save(out, self._buffer)
+    self._path = path
+
+  def release(self):
+    """
+      Removes the shared buffer file, once no copies are attached to it.
+      @ In, None
+      @ Out, None
+    """
+    if self._path is not None:
+      if os.path.exists(self._path):
+        os.remove(self._path)
+      self._path = None
@@ -0,0 +1,95 @@
+# Copyright 2020, Battelle Energy Alliance, LLC
+# ALL RIGHTS RESERVED
+"""
+  Online tuning of the rolling window length of a dispatcher.
+"""
+import json
+
+class WindowTuner:
+  """
+    Searches for the rolling window length with the least dispatch time per dispatched time step.
+    Each candidate length is timed on one window; the search doubles or halves the best length
+    so far until neither neighbor (within the bounds and the dispatch horizon) is faster, and then
+    keeps the best length.
+  """
+  def __init__(self, initial, lower, upper):
+    """
+      Constructor.
+      @ In, initial, int, window length to start from
+      @ In, lower, int, smallest window length to try
+      @ In, upper, int, largest window length to try
+      @ Out, None
+    """
+    self.lower = lower
+    self.upper = upper
+    self.horizon = None               # number of time steps in each dispatch, if known
+    self.length = self._clip(initial) # window length to use next
+    self.costs = {}                   # measured seconds per time step, as {length: float}
+    self.settled = False              # whether the search is finished
+
+  def __repr__(self):
+    """
+      Compiles string representation of object.
+      @ In, None
+      @ Out, repr, str, string representation
+    """
+    return f'<HERON WindowTuner length: {self.length} settled: {self.settled}>'
+
+  def _clip(self, length):
+    """
+      Keeps a window length within the bounds and the dispatch horizon.
+      @ In, length, int, window length
+      @ Out, length, int, bounded window length
+    """
+    upper = self.upper if self.horizon is None else min(self.upper, self.horizon)
+    return int(min(max(length, self.lower), upper))
+
+  def set_horizon(self, steps):
+    """
+      Limits the window lengths to the number of time steps in each dispatch, since longer
+      windows are cut short at the end of the history and so would never be timed.
+      @ In, steps, int, number of time steps in each dispatch
+      @ Out, None
+    """
+    self.horizon = steps
+    self.costs = dict((length, cost) for length, cost in self.costs.items() if length <= steps)
+    self.length = self._clip(self.length)
+
+  def record(self, length, seconds):
+    """
+      Records the time taken by a window, and selects the length of the next window.
+      Windows that are not of the current candidate length (such as at the end of a history) are ignored.
+      @ In, length, int, number of time steps dispatched by the window
+      @ In, seconds, float, time taken to build and solve the window
+      @ Out, None
+    """
+    if self.settled or length != self.length:
+      return
+    self.costs[length] = seconds / length
+    best = min(self.costs, key=self.costs.get)
+    for candidate in (self._clip(2 * best), self._clip(best // 2)):
+      if candidate not in self.costs:
+        self.length = candidate
+        return
+    self.length = best
+    self.settled = True
+
+  def to_dict(self):
+    """
+      Summarizes the search.
+      @ In, None
+      @ Out, summary, dict, machine-readable search results
+    """
+    return {'window_length': self.length,
+            'settled': self.settled,
+            'bounds': [self.lower, self.upper],
+            'seconds_per_step': dict((str(length), cost) for length, cost in sorted(self.costs.items()))}
+
+  def write(self, path):
+    """
+      Writes the search results as JSON.
+      @ In, path, str, file to write
+      @ Out, None
+    """
+    with open(path, 'w') as out:
+      json.dump(self.to_dict(), out, indent=2)
@@ -77,6 +77,41 @@ def get_initial_storage_levels(components: list, meta: dict, start_index: int) -
         # else: initial_levels[comp] = subdisp[comp.name]['level'][comp.get_interaction().get_resource()][-1]
   return initial_levels
 
+def get_governed_activity(components: list, meta: dict, time) -> dict:
+  """
+      Evaluates the strategies of governed components.
+      @ In, components, list, HERON components available to the dispatch.
+      @ In, meta, dict, additional variables passed through.
+      @ In, time, np.array, values of time to evaluate.
+      @ Out, activity, dict, strategy activity (level for storages, production otherwise) as {comp: np.array}.
+  """
+  activity = {}
+  for comp in components:
+    interaction = comp.get_interaction()
+    if interaction.is_governed():
+      meta["request"] = {"component": comp, "time": time}
+      activity[comp] = np.asarray(interaction.get_strategy().evaluate(meta)[0]["level"], dtype=float)
+  return activity
+
+def get_committed_storage_levels(components: list, dispatch, resource_indexer: dict, index: int, previous: dict) -> dict:
+  """
+      Return the storage levels at the end of the committed part of a window, to start the next window with.
+      Storages with periodic level boundary conditions are not carried over, and keep their previous levels.
+      @ In, components, list, HERON components available to the dispatch.
+      @ In, dispatch, DispatchState, dispatch container holding the solved windows.
+      @ In, resource_indexer, dict, map of resources to indices for each component.
+      @ In, index, int, time index of the last committed step.
+      @ In, previous, dict, initial storage levels of the window just solved.
+      @ Out, levels, dict, initial storage levels for 'Storage' component types.
+  """
+  levels = dict(previous)
+  for comp in components:
+    interaction = comp.get_interaction()
+    if interaction.is_type('Storage') and not interaction.apply_periodic_level:
+      r = resource_indexer[comp][interaction.get_resource()]
+      levels[comp] = float(dispatch.get_activity_indexed(comp, 'level', r, index))
+  return levels
+
 
 def get_transfer_coeffs(m, comp) -> dict:
   """
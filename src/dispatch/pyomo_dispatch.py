@@ -11,14 +11,20 @@ import pyutilib.subprocess.GlobalData
 import logging
 
 import pyomo.environ as pyo
-from pyomo.opt import SolverStatus, TerminationCondition
+from pyomo.opt import SolverStatus, TerminationCondition, OptSolver
+from pyomo.repn import generate_standard_repn
 from pyomo.util.infeasible import log_infeasible_constraints
 from ravenframework.utils import InputData, InputTypes
 
 from . import putils
 from .PyomoModelHandler import PyomoModelHandler
+from .PyomoMatrixModelHandler import PyomoMatrixModelHandler
+from .ObjectiveCompiler import ObjectiveCompiler
 from .Dispatcher import Dispatcher, DispatchError
-from .DispatchState import NumpyState
+from .DispatchState import ContiguousState
+from .WindowTuner import WindowTuner
+from .FixedPoint import FixedPointAccelerator, relative_change
+from . import Profiler
 
 # allows pyomo to solve on threaded processes
 pyutilib.subprocess.GlobalData.DEFINE_SIGNAL_HANDLERS_DEFAULT = False
@@ -32,6 +38,12 @@ SOLVER_TOL_MAP = {
   'glpk': 'mipgap',
 }
 
+# approaches for constructing the pyomo model for each dispatch window
+MODEL_BUILDERS = {
+  'rules': PyomoModelHandler,
+  'matrix': PyomoMatrixModelHandler,
+}
+
 class DispatchError(Exception):
     """
       Custom exception for dispatch errors.
@@ -69,6 +81,81 @@ class Pyomo(Dispatcher):
       )
     )
 
+    tuning = InputData.parameterInputFactory(
+      'window_tuning',
+      descr=r"""Enables automatic tuning of the \texttt{rolling\_window\_length}. Starting from
+      \texttt{rolling\_window\_length}, the first windows of the dispatch are each solved with a different
+      window length, doubling or halving the fastest length so far, and timed (model building and solving).
+      The length with the least time per dispatched time step is then kept for all following windows and
+      dispatches. The chosen length and the timings are written to ``heron\_window\_tuning.json'' in the
+      working directory. Dispatches solved while tuning are not cached, and are solved in the main process
+      before any parallel dispatch. Since timings vary between runs, for reproducible results set
+      \texttt{rolling\_window\_length} to the chosen length and remove this node. \default{None}"""
+    )
+    tuning.addParam('min', param_type=InputTypes.IntegerType, required=True,
+                    descr=r"""smallest window length to try, at least 2.""")
+    tuning.addParam('max', param_type=InputTypes.IntegerType, required=True,
+                    descr=r"""largest window length to try.""")
+    specs.addSub(tuning)
+
+    specs.addSub(
+      InputData.parameterInputFactory(
+        'lookahead', contentType=InputTypes.IntegerType,
+        descr=r"""Enables receding-horizon dispatch. Each rolling window is optimized over its own
+        \texttt{rolling\_window\_length} steps plus this many following (lookahead) steps, but only the
+        first \texttt{rolling\_window\_length} steps are kept; the next window starts from the end of the
+        kept steps, with initial storage levels taken from the kept solution. This lets short windows
+        anticipate upcoming conditions when charging or discharging storage. Level carry-over applies to
+        storages without periodic level boundary conditions. A value of 0 carries storage levels between
+        back-to-back windows without lookahead. If not provided, each window is solved independently,
+        starting from the initial storage levels. \default{None}"""
+      )
+    )
+
+    specs.addSub(
+      InputData.parameterInputFactory(
+        'terminal_value_estimate', contentType=InputTypes.IntegerType,
+        descr=r"""Enables automatic valuation of the resource left in storage at the end of each rolling
+        window, so that short windows are not myopic about storage. Before the rolling windows are solved,
+        the full dispatch horizon is solved once at a coarse resolution of this many time steps, with
+        signals averaged over each coarse step. The marginal value of stored resource (the dual of the
+        storage level balance) from this coarse solve is then added to each window's objective for the
+        level left at the end of the window. Applies to storages without periodic level boundary
+        conditions and without a user-provided \texttt{terminal\_value}; user-provided functions are
+        evaluated at the coarse time indices. Requires a solver that provides duals for linear problems.
+        If not provided, resource left in storage has no value. \default{None}"""
+      )
+    )
+
+    specs.addSub(
+      InputData.parameterInputFactory(
+        'picard_acceleration',
+        contentType=InputTypes.makeEnumType('PicardAcceleration', 'PicardAccelerationType', FixedPointAccelerator.methods),
+        descr=r"""Selects how the activity of governed components (those with a \texttt{strategy}) is iterated
+        with the optimized dispatch of each window. Each iteration evaluates the strategies, with the activity
+        of the latest window solve available to them as \texttt{meta['HERON']['window\_activity']}, and solves
+        the window with the resulting governed activity, until the strategies no longer change. \texttt{none}
+        uses the strategy results directly (Picard iteration); \texttt{aitken} relaxes them with the vector
+        Aitken factor; \texttt{anderson} mixes the latest \texttt{picard\_depth} iterations (Anderson
+        acceleration), which usually needs considerably fewer window solves. \default{none}"""
+      )
+    )
+
+    specs.addSub(
+      InputData.parameterInputFactory(
+        'picard_tol', contentType=InputTypes.FloatType,
+        descr=r"""Relative tolerance on the change of governed activity for the iteration of governed
+        components to be converged. \default{1e-4}"""
+      )
+    )
+
+    specs.addSub(
+      InputData.parameterInputFactory(
+        'picard_depth', contentType=InputTypes.IntegerType,
+        descr=r"""Number of previous iterations used by \texttt{anderson} acceleration. \default{5}"""
+      )
+    )
+
     specs.addSub(
       InputData.parameterInputFactory(
         'debug_mode', contentType=InputTypes.BoolType,
@@ -94,6 +181,30 @@ class Pyomo(Dispatcher):
         \default{solver dependent, often 1e-6}."""
       )
     )
+    specs.addSub(
+      InputData.parameterInputFactory(
+        'model_builder', contentType=InputTypes.makeEnumType('ModelBuilder', 'ModelBuilderType', list(MODEL_BUILDERS)),
+        descr=r"""Selects how the pyomo optimization model is constructed for each dispatch window.
+        \texttt{rules} builds each constraint through a pyomo rule evaluated per time step.
+        \texttt{matrix} assembles the linear constraints (transfer ratios, ramp limits, storage
+        balances, and resource conservation) as sparse matrices directly from component, resource,
+        and time index arrays, which is considerably faster to build for long rolling windows.
+        Both produce the same optimization problem. \default{rules}."""
+      )
+    )
+    specs.addSub(
+      InputData.parameterInputFactory(
+        'persistent', contentType=InputTypes.BoolType,
+        descr=r"""Enables reuse of the pyomo model and solver across rolling windows of the same
+        length, iterative (Picard) solves of governed components, and validation re-solves. The model
+        structure is built once per window length; afterwards, only the time-dependent data (capacity
+        bounds, ramp limits, governed activity, initial storage levels, and economic coefficients) is
+        updated in place, and the solver is warm-started from the previous solution where the solver
+        supports it. If the selected solver is one of the pyomo \texttt{appsi} interfaces (such as
+        \texttt{appsi\_highs}), the reused solver also keeps its own copy of the model, and only
+        sends the changes to the solver on each solve. \default{False}."""
+      )
+    )
     # TODO specific for pyomo dispatcher
     return specs
 
@@ -109,8 +220,18 @@ class Pyomo(Dispatcher):
     self.debug_mode = False       # whether to print additional information
     self.solve_options = {}       # options passed from Pyomo to the solver
     self._window_len = 24         # time window length to dispatch at a time # FIXME user input
+    self._lookahead = None        # if not None, extra steps optimized (but not kept) after each window
+    self._tuner = None            # if not None, tunes the window length online
+    self._terminal_steps = None   # if not None, coarse steps of the pre-solve estimating storage terminal values
     self._solver = None           # overwrite option for solver
     self._picard_limit = 10       # iterative solve limit
+    self._picard_method = 'none'  # acceleration of the governed component iteration, see FixedPointAccelerator
+    self._picard_tol = 1e-4       # relative tolerance for converging governed activity
+    self._picard_depth = 5        # history depth for Anderson acceleration
+    self._model_builder = 'rules' # approach for constructing the pyomo model, see MODEL_BUILDERS
+    self._persistent = False      # if True, reuse models and solvers between window solves
+    self._model_cache = {}        # persistent models and solvers, as {window length: (model, solver)}
+    self._objective_compiler = None # analysed cashflow objective, reused by every window
 
 
   def read_input(self, specs) -> None:
@@ -125,6 +246,43 @@ class Pyomo(Dispatcher):
     if window_len_node is not None:
       self._window_len = window_len_node.value
 
+    tuning_node = specs.findFirst('window_tuning')
+    if tuning_node is not None:
+      lower = tuning_node.parameterValues['min']
+      upper = tuning_node.parameterValues['max']
+      if not 2 <= lower <= upper:
+        raise ValueError('Pyomo dispatcher <window_tuning> bounds must satisfy 2 <= min <= max, ' +
+                         f'but got min={lower} and max={upper}!')
+      self._tuner = WindowTuner(self._window_len, lower, upper)
+      self._window_len = self._tuner.length
+
+    lookahead_node = specs.findFirst('lookahead')
+    if lookahead_node is not None:
+      if lookahead_node.value < 0:
+        raise ValueError(f'Pyomo dispatcher <lookahead> must not be negative, but got {lookahead_node.value}!')
+      self._lookahead = lookahead_node.value
+
+    terminal_node = specs.findFirst('terminal_value_estimate')
+    if terminal_node is not None:
+      if terminal_node.value < 2:
+        raise ValueError('Pyomo dispatcher <terminal_value_estimate> must be at least 2, ' +
+                         f'but got {terminal_node.value}!')
+      self._terminal_steps = terminal_node.value
+
+    picard_node = specs.findFirst('picard_acceleration')
+    if picard_node is not None:
+      self._picard_method = picard_node.value
+
+    picard_tol_node = specs.findFirst('picard_tol')
+    if picard_tol_node is not None:
+      self._picard_tol = picard_tol_node.value
+
+    picard_depth_node = specs.findFirst('picard_depth')
+    if picard_depth_node is not None:
+      if picard_depth_node.value < 1:
+        raise ValueError(f'Pyomo dispatcher <picard_depth> must be at least 1, but got {picard_depth_node.value}!')
+      self._picard_depth = picard_depth_node.value
+
     debug_node = specs.findFirst('debug_mode')
     if debug_node is not None:
       self.debug_mode = debug_node.value
@@ -139,6 +297,14 @@ class Pyomo(Dispatcher):
     else:
       solver_tol = None
 
+    builder_node = specs.findFirst('model_builder')
+    if builder_node is not None:
+      self._model_builder = builder_node.value
+
+    persistent_node = specs.findFirst('persistent')
+    if persistent_node is not None:
+      self._persistent = persistent_node.value
+
     self._solver = putils.check_solver_availability(self._solver)
 
     if solver_tol is not None:
@@ -149,6 +315,18 @@ class Pyomo(Dispatcher):
         raise ValueError(f"Tolerance setting not available for solver '{self._solver}'.")
 
 
+  def __getstate__(self):
+    """
+      Get state for serialization; persistent models are not carried along.
+      @ In, None
+      @ Out, state, dict, object state
+    """
+    state = dict(self.__dict__)
+    state['_model_cache'] = {}
+    state['_objective_compiler'] = None
+    return state
+
+
   def get_solver(self):
     """
       Retrieves the solver information (if applicable)
@@ -158,6 +336,27 @@ class Pyomo(Dispatcher):
     return self._solver
 
 
+  def get_cache_signature(self):
+    """
+      Provides the settings that determine the dispatch solution, for identifying identical dispatches.
+      @ In, None
+      @ Out, signature, tuple, dispatch-determining settings
+    """
+    # while tuning, the window length changes between windows; once settled, it is fixed
+    tuning = None if self._tuner is None else (self._tuner.lower, self._tuner.upper)
+    return super().get_cache_signature() + (self._window_len, tuning, self._lookahead, self._terminal_steps,
+                                            sorted(self.solve_options.items()), self._picard_limit,
+                                            self._picard_method, self._picard_tol, self._picard_depth)
+
+  def is_tuning(self):
+    """
+      Determines whether the dispatcher is still tuning its settings from solve timings.
+      @ In, None
+      @ Out, is_tuning, bool, True if the rolling window length is still being tuned
+    """
+    return self._tuner is not None and not self._tuner.settled
+
+
   def dispatch(self, case, components, sources, meta):
     """
       Performs dispatch.
@@ -170,38 +369,150 @@ class Pyomo(Dispatcher):
     t_start, t_end, t_num = self.get_time_discr()
     time = np.linspace(t_start, t_end, t_num)
     resources = sorted(putils.get_all_resources(components))
-    dispatch = NumpyState()
+    dispatch = ContiguousState()
     dispatch.initialize(components, meta['HERON']['resource_indexer'], time)
 
     start_index = 0
     final_index = len(time)
     initial_levels = putils.get_initial_storage_levels(components, meta, start_index)
+    estimates = self._estimate_terminal_values(case, components, resources, time, initial_levels, meta)
+    if self._tuner is not None:
+      self._tuner.set_horizon(final_index)
 
     while start_index < final_index:
+      if self._tuner is not None:
+        self._window_len = self._tuner.length
       end_index = min(start_index + self._window_len, final_index)
-      if end_index - start_index == 1:
+      # in receding-horizon mode, also optimize over the lookahead steps, which the next window replaces
+      solve_end = end_index if self._lookahead is None else min(end_index + self._lookahead, final_index)
+      if solve_end - start_index == 1:
         raise DispatchError("Window length of 1 detected, which is not supported.")
 
-      specific_time = time[start_index:end_index]
-      print(f"Start: {start_index} End: {end_index}")
-      subdisp, solve_time = self._handle_dispatch_window_solve(
-        specific_time, start_index, case, components, sources, resources, initial_levels, meta
+      specific_time = time[start_index:solve_end]
+      print(f"Start: {start_index} End: {end_index}" + (f" Lookahead: {solve_end}" if solve_end > end_index else ''))
+      terminal_values = self._get_terminal_values(components, estimates, solve_end - 1, meta)
+      # results of optimization are stored directly into the dispatch container
+      solve_time = self._handle_dispatch_window_solve(
+        dispatch, specific_time, start_index, case, components, sources, resources, initial_levels, meta,
+        terminal_values=terminal_values
       )
-      print(f'DEBUGG solve time: {solve_time} s')
-
-      # Store Results of optimization into dispatch container
-      for comp in components:
-        for tag in comp.get_tracking_vars():
-          for res, values in subdisp[comp.name][tag].items():
-            dispatch.set_activity_vector(comp, res, values, tracker=tag, start_idx=start_index, end_idx=end_index)
+      if self.is_tuning():
+        self._tune_window(end_index - start_index, solve_time)
+      if self._lookahead is not None:
+        initial_levels = putils.get_committed_storage_levels(components, dispatch, meta['HERON']['resource_indexer'],
+                                                             end_index - 1, initial_levels)
       start_index = end_index
 
     return dispatch
 
 
-  def _handle_dispatch_window_solve(self, specific_time, start_index, case, components, sources, resources, initial_levels, meta):
+  def _tune_window(self, length, solve_time):
+    """
+      Informs the window length tuner of the time taken by a window, and reports the chosen length once found.
+      @ In, length, int, number of time steps dispatched by the window
+      @ In, solve_time, float, time spent building and solving the window, in seconds
+      @ Out, None
+    """
+    self._tuner.record(length, solve_time)
+    if self._tuner.settled:
+      print(f'DEBUGG rolling window length tuned to {self._tuner.length} ' +
+            f'(seconds per step by length: {self._tuner.to_dict()["seconds_per_step"]})')
+      self._tuner.write('heron_window_tuning.json')
+
+  def _get_terminal_values(self, components, estimates, index, meta):
+    """
+      Collects the value of resource left in each storage at the end of a window.
+      @ In, components, list, HERON components available to the dispatch
+      @ In, estimates, dict, estimated values by time index, as {comp: np.array}
+      @ In, index, int, time index of the last step of the window
+      @ In, meta, dict, additional variables passed through
+      @ Out, values, dict, value per unit stored at the end of the window, as {comp: float}
+    """
+    values = {}
+    for comp in components:
+      intr = comp.get_interaction()
+      if not intr.is_type('Storage') or intr.apply_periodic_level or intr.is_governed():
+        continue
+      if intr.has_terminal_value():
+        meta['HERON']['time_index'] = index
+        values[comp] = float(intr.get_terminal_value(meta))
+      elif comp in estimates:
+        values[comp] = float(estimates[comp][index])
+    return values
+
+  def _estimate_terminal_values(self, case, components, resources, time, initial_levels, meta):
+    """
+      Estimates the marginal value of stored resource over the full horizon from a coarse-resolution solve.
+      Signals are averaged over each coarse step, and the value at each step is the dual of the storage
+      level balance, scaled to the fine time resolution.
+      @ In, case, HERON Case, Case that this dispatch is part of
+      @ In, components, list, HERON components available to the dispatch
+      @ In, resources, list, sorted list of all resources in problem
+      @ In, time, np.array, values of time in the full dispatch horizon
+      @ In, initial_levels, dict, initial storage levels if any
+      @ In, meta, dict, additional variables passed through
+      @ Out, estimates, dict, estimated values by (fine) time index, as {comp: np.array}
+    """
+    if self._terminal_steps is None:
+      return {}
+    storages = [comp for comp in components if comp.get_interaction().is_type('Storage')
+                and not comp.get_interaction().apply_periodic_level
+                and not comp.get_interaction().is_governed()
+                and not comp.get_interaction().has_terminal_value()]
+    num = len(time)
+    stride = int(np.ceil(num / self._terminal_steps))
+    if not storages or stride < 2:
+      return {}
+    starts = np.arange(0, num, stride)
+    counts = np.diff(np.append(starts, num))
+    # average the signals over each coarse step
+    coarse_vars = {}
+    for name, values in meta['HERON']['RAVEN_vars'].items():
+      values = np.asarray(values)
+      if values.ndim and values.shape[-1] == num and np.issubdtype(values.dtype, np.number):
+        values = np.add.reduceat(values, starts, axis=-1) / counts
+      coarse_vars[name] = values
+    coarse_meta = dict(meta)
+    coarse_meta['HERON'] = dict(meta['HERON'])
+    coarse_meta['HERON']['RAVEN_vars'] = coarse_vars
+    print(f'DEBUGG estimating storage terminal values from a {len(starts)}-step solve ...')
+    with Profiler.phase('terminal value estimate'):
+      handler = MODEL_BUILDERS[self._model_builder]
+      model = handler(time[starts], 0, case, components, resources, initial_levels, coarse_meta,
+                      objective_compiler=self._get_objective_compiler(components))
+      model.populate_model()
+      model.model.dual = pyo.Suffix(direction=pyo.Suffix.IMPORT)
+      soln = pyo.SolverFactory(self._solver).solve(model.model, options=self.solve_options)
+    if soln.solver.termination_condition != TerminationCondition.optimal:
+      print('WARNING: coarse solve for storage terminal values was unsuccessful; ' +
+            f'stored resource will not be valued. Termination: {soln.solver.termination_condition}')
+      return {}
+    # duals are the change in objective per unit increase of a constraint's right hand side, so the value
+    # of stored resource follows from the objective sense and the sign of the level in the level balance
+    sense = 1.0 if model.model.obj.sense == pyo.maximize else -1.0
+    first = model.model.T.first()
+    estimates = {}
+    for comp in storages:
+      constr = getattr(model.model, f'{comp.name}_level_constr')
+      duals = np.array([model.model.dual.get(constr[t], np.nan) for t in model.model.T], dtype=float)
+      if np.isnan(duals).any():
+        print(f'WARNING: solver "{self._solver}" did not provide duals for the level balance of storage ' +
+              f'"{comp.name}"; its stored resource will not be valued.')
+        continue
+      level = getattr(model.model, f'{comp.name}_level')[0, first]
+      repn = generate_standard_repn(constr[first].body, compute_values=True)
+      orientation = sum(coef for var, coef in zip(repn.linear_vars, repn.linear_coefs) if var is level)
+      # the coarse dual is the value of a unit stored for a coarse step, which spans several fine steps;
+      # values may be negative, such as when the stored resource can only be disposed of at a cost
+      values = sense * np.sign(orientation) * duals * counts
+      estimates[comp] = np.repeat(values, counts)
+    return estimates
+
+  def _handle_dispatch_window_solve(self, dispatch, specific_time, start_index, case, components, sources, resources, initial_levels, meta,
+                                    terminal_values=None):
     """
       Set up convergence criteria and collect results from a dispatch window solve.
+      @ In, dispatch, NumpyState, dispatch container to store window results into.
       @ In, specific_time, np.array, value of time to evaluate.
       @ In, start_index, int, index of the start of the window.
       @ In, case, HERON Case, Case that this dispatch is part of.
@@ -210,32 +521,83 @@ class Pyomo(Dispatcher):
       @ In, resources, list, sorted list of all resources in problem.
       @ In, initial_levels, dict, initial storage levels if any.
       @ In, meta, dict, additional variables passed through.
-      @ Out, subdisp, dict, results of window dispatch.
+      @ In, terminal_values, dict, optional, value of stored resource at the end of the window.
+      @ Out, solve_time, float, time spent solving the window, in seconds.
     """
     start = time_mod.time()
-    subdisp = self._dispatch_window(specific_time, start_index, case, components, resources, initial_levels, meta)
-
+    end_index = start_index + len(specific_time)
+    governed = None
     if self._needs_convergence(components):
+      # strategies see the latest solve of the window; there is none yet
+      meta['HERON']['window_activity'] = None
+      governed = putils.get_governed_activity(components, meta, specific_time)
+    model = self._dispatch_window(specific_time, start_index, case, components, resources, initial_levels, meta,
+                                   terminal_values=terminal_values, governed_activity=governed)
+    with Profiler.phase('load solution'):
+      model.load_solution(dispatch, start_index)
+
+    if governed is not None:
+      # iterate governed activity x to a fixed point x = G(x), where G evaluates the strategies on the
+      # window solved with x; the solve before the loop provides the first evaluation
+      accelerator = FixedPointAccelerator(self._picard_method, self._picard_depth)
+      resource_indexer = meta['HERON']['resource_indexer']
       conv_counter = 0
-      converged = False
-      previous = None
-
-      while not converged and conv_counter < self._picard_limit:
+      while True:
+        meta['HERON']['window_activity'] = self._get_window_activity(dispatch, components, resource_indexer,
+                                                                     start_index, end_index)
+        image = putils.get_governed_activity(components, meta, specific_time)
+        change = relative_change(image, governed)
+        if change <= self._picard_tol:
+          break
+        if conv_counter >= self._picard_limit:
+          raise DispatchError(f"Convergence not reached after {self._picard_limit} iterations (change {change:1.3e}).")
         conv_counter += 1
-        print(f'DEBUGG iteratively solving window, iteration {conv_counter}/{self._picard_limit} ...')
-        subdisp = self._dispatch_window(specific_time, start_index, case, components, resources, initial_levels, meta)
-        converged = self._check_if_converged(subdisp, previous, components)
-        previous = subdisp
-
-      if conv_counter >= self._picard_limit and not converged:
-        raise DispatchError(f"Convergence not reached after {self._picard_limit} iterations.")
+        Profiler.count('Picard iterations')
+        print(f'DEBUGG iteratively solving window, iteration {conv_counter}/{self._picard_limit} (change {change:1.3e}) ...')
+        governed = accelerator.update(governed, image)
+        model = self._dispatch_window(specific_time, start_index, case, components, resources, initial_levels, meta,
+                                      terminal_values=terminal_values, governed_activity=governed)
+        with Profiler.phase('load solution'):
+          model.load_solution(dispatch, start_index)
+      print(f'DEBUGG governed activity converged after {conv_counter} iteration(s) ({self._picard_method} acceleration)')
+      del meta['HERON']['window_activity']
 
     end = time_mod.time()
     solve_time = end - start
-    return subdisp, solve_time
+    return solve_time
+
+  def _get_window_activity(self, dispatch, components, resource_indexer, start_index, end_index):
+    """
+      Copies the activity of a window from the dispatch container, for convergence checks.
+      @ In, dispatch, NumpyState, dispatch container holding the window results
+      @ In, components, list, HERON components available to the dispatch
+      @ In, resource_indexer, dict, map of resources to indices for each component
+      @ In, start_index, int, index of the start of the window
+      @ In, end_index, int, index of the end of the window
+      @ Out, activity, dict, window activity as {comp: {tracker: {resource: np.array}}}
+    """
+    indices = np.arange(start_index, end_index)
+    activity = {}
+    for comp in components:
+      activity[comp.name] = {}
+      for tag in comp.get_tracking_vars():
+        activity[comp.name][tag] = dict((res, dispatch.get_activity_indexed(comp, tag, r, indices))
+                                        for res, r in resource_indexer[comp].items())
+    return activity
+
 
+  def _get_objective_compiler(self, components):
+    """
+      Provides the analysed cashflow objective for the components, reusing it if possible.
+      @ In, components, list, HERON components available to the dispatch
+      @ Out, compiler, ObjectiveCompiler, analysed cashflow objective
+    """
+    if self._objective_compiler is None or self._objective_compiler.components is not components:
+      self._objective_compiler = ObjectiveCompiler(components)
+    return self._objective_compiler
 
-  def _dispatch_window(self, time, time_offset, case, components, resources, initial_storage, meta):
+  def _dispatch_window(self, time, time_offset, case, components, resources, initial_storage, meta, terminal_values=None,
+                       governed_activity=None):
     """
       Dispatches one part of a rolling window.
       @ In, time, np.array, value of time to evaluate
@@ -246,43 +608,30 @@ class Pyomo(Dispatcher):
       @ In, resources, list, sorted list of all resources in problem
       @ In, initial_storage, dict, initial storage levels if any
       @ In, meta, dict, additional variables passed through
-      @ Out, result, dict, results of window dispatch
+      @ In, terminal_values, dict, optional, value of stored resource at the end of the window
+      @ In, governed_activity, dict, optional, strategy activity of governed components, if already evaluated
+      @ Out, model, PyomoModelHandler, solved model of the window
     """
-    model = PyomoModelHandler(time, time_offset, case, components, resources, initial_storage, meta)
-    model.populate_model()
-    result = self._solve_dispatch(model, meta)
-    return result
-
-
-  def _check_if_converged(self, new, old, components, tol=1e-4):
-    """
-      Checks convergence of consecutive dispatch solves
-      @ In, new, dict, results of dispatch # TODO should this be the model rather than dict?
-      @ In, old, dict, results of previous dispatch
-      @ In, components, list, HERON component list
-      @ In, tol, float, optional, tolerance for convergence
-      @ Out, converged, bool, True if convergence is met
-    """
-    if old is None:
-      return False
-
-    for comp in components:
-      intr = comp.get_interaction()
-      if intr.is_governed(): # by "is_governed" we mean "isn't optimized in pyomo"
-        # check activity L2 norm as a differ
-        # TODO this may be specific to storage right now
-        name = comp.name
-        tracker = comp.get_tracking_vars()[0]
-        res = intr.get_resource()
-        scale = np.max(old[name][tracker][res])
-        # Avoid division by zero
-        if scale == 0:
-          diff = np.linalg.norm(new[name][tracker][res] - old[name][tracker][res])
-        else:
-          diff = np.linalg.norm(new[name][tracker][res] - old[name][tracker][res]) / scale
-        if diff > tol:
-          return False
-    return True
+    if self._persistent and len(time) in self._model_cache:
+      model, solver = self._model_cache[len(time)]
+      model.terminal_values = terminal_values or {}
+      model.governed_activity = governed_activity or {}
+      with Profiler.phase('update model'):
+        model.update_model(time, time_offset, initial_storage, meta)
+    else:
+      handler = MODEL_BUILDERS[self._model_builder]
+      with Profiler.phase('build model'):
+        model = handler(time, time_offset, case, components, resources, initial_storage, meta,
+                        objective_compiler=self._get_objective_compiler(components))
+      model.terminal_values = terminal_values or {}
+      model.governed_activity = governed_activity or {}
+      with Profiler.phase('populate model'):
+        model.populate_model()
+      solver = pyo.SolverFactory(self._solver)
+      if self._persistent:
+        self._model_cache[len(time)] = (model, solver)
+    self._solve_dispatch(model, meta, solver)
+    return model
 
 
   def _needs_convergence(self, components):
@@ -294,13 +643,21 @@ class Pyomo(Dispatcher):
     return any(comp.get_interaction().is_governed() for comp in components)
 
 
-  def _solve_dispatch(self, m, meta):
+  def _solve_dispatch(self, m, meta, solver):
     """
       Solves the dispatch problem.
       @ In, m, PyomoModelHandler, model object to solve
       @ In, meta, dict, additional variables passed through
-      @ Out, result, dict, results of solved dispatch
+      @ In, solver, pyomo solver, solver instance to use
+      @ Out, None
     """
+    solve_args = {'options': self.solve_options}
+    # shell and direct solver interfaces need to be asked to use the existing solution to start;
+    # appsi interfaces (selected by name, e.g. "appsi_highs") are not OptSolvers, and instead
+    # update their own copy of the model when the same solver instance is reused
+    warm_start = isinstance(solver, OptSolver) and solver.warm_start_capable()
+    if self._persistent and warm_start:
+      solve_args['warmstart'] = True
     # start a solution search
     done_and_checked = False
     attempts = 0
@@ -312,7 +669,12 @@ class Pyomo(Dispatcher):
       attempts += 1
       print(f'DEBUGG using solver: {self._solver}')
       print(f'DEBUGG solve attempt {attempts} ...:')
-      soln = pyo.SolverFactory(self._solver).solve(m.model, options=self.solve_options)
+      start = time_mod.time()
+      with Profiler.phase('solve' if attempts == 1 else 'validation re-solve'):
+        soln = solver.solve(m.model, **solve_args)
+      if attempts > 1:
+        print(f'DEBUGG ... validation round {attempts - 1}: {added} limit(s) added, ' +
+              f're-solved in {time_mod.time() - start:1.3f} s')
 
       # check solve status
       if soln.solver.status == SolverStatus.ok and soln.solver.termination_condition == TerminationCondition.optimal:
@@ -330,16 +692,22 @@ class Pyomo(Dispatcher):
 
       # try validating
       print('DEBUGG ... validating ...')
-      validation_errs = self.validate(m.model.Components, m.model.Activity, m.model.Times, meta)
+      with Profiler.phase('validate'):
+        validation_errs = self.validate(m.model.Components, m.model.Activity, m.model.Times, meta)
       if validation_errs:
         done_and_checked = False
+        Profiler.count('validation retries')
         print('DEBUGG ... validation concerns raised:')
         for e in validation_errs:
           print(f"DEBUGG ... ... Time {e['time_index']} ({e['time']}) \n" +
                 f"Component \"{e['component'].name}\" Resource \"{e['resource']}\": {e['msg']}")
-          m._create_production_limit(e)
-        # TODO go back and solve again
-        # raise DispatchError('Validation failed, but idk how to handle that yet')
+        # all limits of a round are added at once, and the re-solve starts from the current solution
+        added = m.add_production_limits(validation_errs)
+        Profiler.count('validation limits', added)
+        if not added:
+          raise DispatchError('Validation concerns were raised again for limits that were already imposed!')
+        if warm_start:
+          solve_args['warmstart'] = True
       else:
         print('DEBUGG Solve successful and no validation concerns raised.')
         done_and_checked = True
@@ -351,7 +719,3 @@ class Pyomo(Dispatcher):
     if self.debug_mode:
       soln.write()
       putils.debug_print_soln(m.model)
-
-    # return dict of numpy arrays
-    result = putils.retrieve_solution(m.model)
-    return result
@@ -0,0 +1,42 @@
+# Copyright 2020, Battelle Energy Alliance, LLC
+# ALL RIGHTS RESERVED
+"""
+  Tools for user-supplied Python functions that evaluate many time steps at once.
+
+  By default, HERON calls user functions (see the <DataGenerators><Function> input) once per time step,
+  with meta['HERON']['time_index'] as an integer. A user function can instead declare itself
+  vectorized, either with the decorator
+
+    from HERON.src.vectorize import vectorized
+    @vectorized
+    def price(data, meta):
+      ...
+
+  or by setting the module-level flag "HERON_VECTORIZED = True" to declare every function in the module.
+  Vectorized functions may be called with meta['HERON']['time_index'] as an integer array of
+  time indices (and activity as arrays over those indices), and should return arrays over those
+  indices (or values that apply to all of them).
+"""
+
+# attribute set on vectorized user functions
+VECTORIZED_ATTR = '_heron_vectorized'
+# module-level flag to declare all functions in a user module vectorized
+MODULE_FLAG = 'HERON_VECTORIZED'
+
+def vectorized(method):
+  """
+    Decorator to declare a user function as accepting arrays of time indices.
+    @ In, method, callable, user function as method(data, meta)
+    @ Out, method, callable, same function, marked as vectorized
+  """
+  setattr(method, VECTORIZED_ATTR, True)
+  return method
+
+def is_vectorized(method, module=None):
+  """
+    Determines if a user function has been declared vectorized.
+    @ In, method, callable, user function
+    @ In, module, python Module, optional, module containing the user function
+    @ Out, is_vectorized, bool, True if function accepts arrays of time indices
+  """
+  return bool(getattr(method, VECTORIZED_ATTR, False) or getattr(module, MODULE_FLAG, False))
@@ -0,0 +1,348 @@
+# Copyright 2020, Battelle Energy Alliance, LLC
+# ALL RIGHTS RESERVED
+"""
+  Benchmarks the HERON dispatch on synthetic cases of increasing size, without RAVEN workflows.
+
+  Each case is a generated HERON input with the requested numbers of producers, storages, fixed
+  demands, and price-taking markets spread over independent resources, and a generated price history.
+  Cases are run either through the dispatcher alone (one year and cluster, "--target dispatch") or
+  through DispatchRunner.run (all years and clusters, including cashflows, "--target runner"), using an
+  offline stand-in for the RAVEN variables object. Each case runs in a fresh process, and reports
+  model build, solve, and post-processing time (from the inner run profiler) and peak memory.
+
+  Examples:
+    python dispatch_benchmark.py --hours 24 168 720 --window 24 168 --output new.json
+    python dispatch_benchmark.py --hours 24 168 720 --window 24 168 --baseline old.json --tolerance 0.2
+
+  In baseline mode, the exit code is 1 if any case is slower than the baseline by more than the tolerance.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import itertools
+import multiprocessing
+import xml.etree.ElementTree as ET
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Load HERON tools
+HERON_LOC = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir))
+
+# profiler phases reported under each heading
+PHASE_GROUPS = {
+  'build': ['build model', 'populate model', 'update model'],
+  'solve': ['solve', 'validate', 'validation re-solve', 'terminal value estimate'],
+  'post': ['load solution', 'segment cashflow', 'final cashflow'],
+}
+
+def make_input(params, csv_path):
+  """
+    Generates a HERON input for a synthetic case.
+    @ In, params, dict, case size parameters (see make_cases)
+    @ In, csv_path, str, path to the price history CSV
+    @ Out, xml, ET.Element, HERON input
+  """
+  resources = [f'res{r}' for r in range(params['resources'])]
+  root = ET.Element('HERON')
+  case = ET.SubElement(root, 'Case', name='benchmark')
+  ET.SubElement(case, 'mode').text = 'sweep'
+  time = ET.SubElement(case, 'time_discretization')
+  ET.SubElement(time, 'time_variable').text = 'Time'
+  ET.SubElement(time, 'end_time').text = str(params['hours'] - 1)
+  ET.SubElement(time, 'num_steps').text = str(params['hours'])
+  econ = ET.SubElement(case, 'economics')
+  ET.SubElement(econ, 'ProjectTime').text = str(params['years'])
+  ET.SubElement(econ, 'DiscountRate').text = '0.08'
+  ET.SubElement(econ, 'tax').text = '0.0'
+  ET.SubElement(econ, 'inflation').text = '0.0'
+  pyomo = ET.SubElement(ET.SubElement(case, 'dispatcher'), 'pyomo')
+  ET.SubElement(pyomo, 'rolling_window_length').text = str(params['window'])
+  ET.SubElement(pyomo, 'model_builder').text = params['builder']
+  ET.SubElement(pyomo, 'persistent').text = str(params['persistent'])
+  if params['solver'] is not None:
+    ET.SubElement(pyomo, 'solver').text = params['solver']
+
+  comps = ET.SubElement(root, 'Components')
+  def add_comp(name, kind, resource, dispatch, capacity, price=None, signal=None):
+    comp = ET.SubElement(comps, 'Component', name=name)
+    interaction = ET.SubElement(comp, kind, resource=resource, dispatch=dispatch)
+    cap = ET.SubElement(interaction, 'capacity', resource=resource)
+    ET.SubElement(cap, 'fixed_value').text = str(capacity)
+    economics = ET.SubElement(comp, 'economics')
+    ET.SubElement(economics, 'lifetime').text = str(params['years'])
+    if price is not None or signal is not None:
+      cf = ET.SubElement(economics, 'CashFlow', name=f'{name}_cf', type='repeating', taxable='True', inflation='none')
+      driver = ET.SubElement(cf, 'driver')
+      ET.SubElement(driver, 'activity').text = resource
+      ET.SubElement(driver, 'multiplier').text = '-1'
+      ref = ET.SubElement(cf, 'reference_price')
+      if signal is not None:
+        ET.SubElement(ref, 'CSV', variable=signal).text = 'prices'
+      else:
+        ET.SubElement(ref, 'fixed_value').text = str(price)
+
+  # every resource has at least one producer and one market, so all cases are feasible
+  for i in range(params['producers']):
+    add_comp(f'producer{i}', 'produces', resources[i % len(resources)], 'independent', 100, price=1.0 + i % 5)
+  for i in range(params['storages']):
+    add_comp(f'storage{i}', 'stores', resources[i % len(resources)], 'independent', 200)
+  for i in range(params['demands']):
+    add_comp(f'demand{i}', 'demands', resources[i % len(resources)], 'fixed', -10)
+  for i in range(params['markets']):
+    add_comp(f'market{i}', 'demands', resources[i % len(resources)], 'dependent', -150, signal=f'price{i}')
+
+  sources = ET.SubElement(root, 'DataGenerators')
+  ET.SubElement(sources, 'CSV', name='prices',
+                variable=','.join(f'price{i}' for i in range(params['markets']))).text = csv_path
+  return root
+
+def make_signals(params, seed=42):
+  """
+    Generates synthetic price histories, as daily cycles with noise.
+    @ In, params, dict, case size parameters (see make_cases)
+    @ In, seed, int, optional, random seed
+    @ Out, signals, dict, {name: np.array} histories indexed by (year, cluster, time)
+  """
+  rng = np.random.default_rng(seed)
+  hours = np.arange(params['hours'])
+  shape = (params['years'], params['clusters'], params['hours'])
+  daily = 20 + 10 * np.sin(2 * np.pi * hours / 24)
+  return dict((f'price{i}', daily + rng.normal(0, 5, size=shape)) for i in range(params['markets']))
+
+def write_csv(path, params, signals):
+  """
+    Writes the price histories for the first cluster as a static history CSV.
+    @ In, path, str, file to write
+    @ In, params, dict, case size parameters (see make_cases)
+    @ In, signals, dict, {name: np.array} histories indexed by (year, cluster, time)
+    @ Out, None
+  """
+  years = np.repeat(np.arange(params['years']), params['hours'])
+  times = np.tile(np.arange(params['hours']), params['years'])
+  columns = [np.zeros(len(years)), years, times] + [signals[name][:, 0, :].ravel() for name in signals]
+  header = ','.join(['RAVEN_sample_ID', 'Year', 'Time'] + list(signals))
+  np.savetxt(path, np.column_stack(columns), fmt='%.10g', delimiter=',', header=header, comments='')
+
+class OfflineRaven:
+  """
+    Stands in for the RAVEN variables object given to the DispatchManager external model.
+  """
+  def __init__(self, params, signals):
+    """
+      Constructor.
+      @ In, params, dict, case size parameters (see make_cases)
+      @ In, signals, dict, {name: np.array} histories indexed by (year, cluster, time)
+      @ Out, None
+    """
+    self.Year = np.arange(params['years'])
+    self._ROM_Cluster = np.arange(params['clusters'])
+    self.Time = np.arange(params['hours'], dtype=float)
+    self._indexMap = [dict((name, ['Year', '_ROM_Cluster', 'Time']) for name in signals)]
+    for name, values in signals.items():
+      setattr(self, name, values)
+
+def make_structure(source, params):
+  """
+    Builds the synthetic history structure for the stand-in histories, as DispatchRunner._get_structure.
+    @ In, source, Placeholders.CSV, price source
+    @ In, params, dict, case size parameters (see make_cases)
+    @ Out, structure, dict, structure specifications
+  """
+  days = 365 // params['clusters']
+  clusters = dict((year, [{'id': c, 'represents': [str(d) for d in range(days)], 'indices': [0, params['hours']]}
+                          for c in range(params['clusters'])])
+                  for year in range(params['years']))
+  macro = {'id': 'Year', 'num': params['years'] + 1, 'first': 0, 'last': params['years'] - 1}
+  details = {'macro': macro, 'clusters': clusters, 'segments': {}}
+  return {'details': {source: details},
+          'summary': {'interpolated': (0, params['years']),
+                      'clusters': list(range(params['clusters'])),
+                      'segments': 0,
+                      'macro_info': macro,
+                      'cluster_info': clusters[0]}}
+
+def run_case(params):
+  """
+    Runs one benchmark case. Intended to run in a fresh process.
+    @ In, params, dict, case size parameters (see make_cases)
+    @ Out, result, dict, timing and memory results
+  """
+  sys.path.append(HERON_LOC)
+  from HERON.src import _utils as hutils
+  try:
+    import ravenframework
+  except ModuleNotFoundError:
+    sys.path.append(hutils.get_raven_loc())
+  from ravenframework.MessageHandler import MessageHandler
+  from HERON.src import input_loader
+  from HERON.src.DispatchManager import DispatchRunner
+  from HERON.src.dispatch import Profiler
+  from HERON.src.dispatch.SignalStore import SignalStore
+
+  work_dir = tempfile.mkdtemp(prefix='heron_bench_')
+  cwd = os.getcwd()
+  os.chdir(work_dir)
+  try:
+    signals = make_signals(params)
+    csv_path = os.path.join(work_dir, 'prices.csv')
+    write_csv(csv_path, params, signals)
+    handler = MessageHandler()
+    handler.initialize({'verbosity': 'quiet', 'callerLength': 18, 'tagLength': 7, 'suppressErrs': False})
+    objects = input_loader.parse(make_input(params, csv_path), work_dir, handler)
+    case, components, sources = objects['case'], objects['components'], objects['sources']
+    raven = OfflineRaven(params, signals)
+
+    start = perf_counter()
+    profile = Profiler.start()
+    runner = DispatchRunner()
+    runner._case = case
+    runner._components = components
+    runner._sources = sources
+    runner._dispatcher = case.dispatcher
+    runner._structure = make_structure(sources[0], params)
+    raven_vars = runner.extract_variables(raven, {})
+    if params['target'] == 'runner':
+      runner.run(raven_vars)
+    else:
+      # dispatch the first year and cluster only
+      store = SignalStore(raven_vars, case.get_year_name(), case.get_time_name())
+      meta = {'HERON': {'Case': case,
+                        'Components': components,
+                        'Sources': sources,
+                        'RAVEN_vars_full': store.full(),
+                        'resource_indexer': dict((comp, dict((res, r) for r, res in enumerate(comp.get_resources())))
+                                                 for comp in components),
+                        'active_index': {'year': 0, 'division': 0},
+                        'RAVEN_vars': store.slice(0, 0)}}
+      case.dispatcher.dispatch(case, components, sources, meta)
+    total = perf_counter() - start
+    Profiler.stop()
+  finally:
+    os.chdir(cwd)
+
+  summary = profile.to_dict()
+  result = dict(params)
+  result['total'] = total
+  for group, phases in PHASE_GROUPS.items():
+    result[group] = sum(summary['phases'].get(phase, {}).get('seconds', 0.0) for phase in phases)
+  result['counters'] = summary['counters']
+  result['peak_rss_mb'], result['peak_solver_rss_mb'] = _peak_memory()
+  return result
+
+def _peak_memory():
+  """
+    Reports the peak resident memory of this process and of its (solver) subprocesses.
+    @ In, None
+    @ Out, own, float, peak memory of this process in MB, or None if unavailable
+    @ Out, children, float, peak memory of subprocesses in MB, or None if unavailable
+  """
+  try:
+    import resource
+  except ImportError: # e.g. Windows
+    return None, None
+  # reported in KB on Linux, bytes on macOS
+  scale = 1.0 / 1024**2 if sys.platform == 'darwin' else 1.0 / 1024
+  return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+          resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale)
+
+def make_cases(args):
+  """
+    Builds the case parameters for every combination of the requested sizes.
+    @ In, args, argparse.Namespace, command line arguments
+    @ Out, cases, list(dict), parameters of each case
+  """
+  sizes = itertools.product(args.producers, args.storages, args.demands, args.markets, args.resources,
+                            args.hours, args.window, args.clusters, args.years)
+  cases = []
+  for producers, storages, demands, markets, resources, hours, window, clusters, years in sizes:
+    if producers < resources or markets < resources:
+      raise ValueError('Every resource needs a producer and a market: use at least as many of each as resources!')
+    params = {'producers': producers, 'storages': storages, 'demands': demands, 'markets': markets,
+              'resources': resources, 'hours': hours, 'window': window, 'clusters': clusters, 'years': years,
+              'builder': args.builder, 'persistent': args.persistent, 'solver': args.solver,
+              'target': args.target}
+    params['name'] = (f'p{producers}_s{storages}_d{demands}_m{markets}_r{resources}_'
+                      f'h{hours}_w{window}_c{clusters}_y{years}_{args.builder}_{args.target}')
+    cases.append(params)
+  return cases
+
+def compare(results, baseline, tolerance):
+  """
+    Compares results against a baseline, reporting regressions.
+    @ In, results, list(dict), results of this run
+    @ In, baseline, list(dict), results of the baseline run
+    @ In, tolerance, float, allowed relative slowdown before flagging a regression
+    @ Out, regressions, list(str), names of cases that regressed
+  """
+  old = dict((entry['name'], entry) for entry in baseline)
+  regressions = []
+  print(f'{"case":60s} {"total":>9s} {"baseline":>9s} {"ratio":>7s}')
+  for entry in results:
+    ref = old.get(entry['name'])
+    if ref is None:
+      print(f'{entry["name"]:60s} {entry["total"]:9.3f} {"-":>9s} {"-":>7s}')
+      continue
+    ratio = entry['total'] / ref['total'] if ref['total'] > 0 else float('inf')
+    flag = ''
+    if ratio > 1 + tolerance:
+      flag = '  REGRESSION'
+      regressions.append(entry['name'])
+    print(f'{entry["name"]:60s} {entry["total"]:9.3f} {ref["total"]:9.3f} {ratio:7.2f}{flag}')
+  return regressions
+
+def main():
+  """
+    Runs the benchmark from the command line.
+    @ In, None
+    @ Out, None
+  """
+  parser = argparse.ArgumentParser(description='Benchmark HERON dispatch on synthetic cases.')
+  ints = dict(type=int, nargs='+')
+  parser.add_argument('--producers', default=[2], **ints, help='number of producers')
+  parser.add_argument('--storages', default=[1], **ints, help='number of storages')
+  parser.add_argument('--demands', default=[1], **ints, help='number of fixed demands')
+  parser.add_argument('--markets', default=[1], **ints, help='number of price-taking markets')
+  parser.add_argument('--resources', default=[1], **ints, help='number of resources')
+  parser.add_argument('--hours', default=[24, 168], **ints, help='dispatch horizon lengths, 24 to 8760')
+  parser.add_argument('--window', default=[24], **ints, help='rolling window lengths')
+  parser.add_argument('--clusters', default=[1], **ints, help='number of clusters per year')
+  parser.add_argument('--years', default=[1], **ints, help='number of project years')
+  parser.add_argument('--builder', default='rules', choices=['rules', 'matrix'], help='pyomo model builder')
+  parser.add_argument('--persistent', action='store_true', help='reuse models across windows')
+  parser.add_argument('--solver', default=None, help='pyomo solver, if not the HERON default')
+  parser.add_argument('--target', default='dispatch', choices=['dispatch', 'runner'],
+                      help='run the dispatcher for one year/cluster, or the full DispatchRunner')
+  parser.add_argument('--repeat', type=int, default=1, help='runs per case; the fastest is kept')
+  parser.add_argument('--output', default=None, help='JSON file to write results to')
+  parser.add_argument('--baseline', default=None, help='JSON results file from an earlier run to compare to')
+  parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative slowdown versus baseline')
+  args = parser.parse_args()
+
+  results = []
+  for params in make_cases(args):
+    best = None
+    for _ in range(args.repeat):
+      # a fresh process per run, so peak memory and caches are per case
+      with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        result = pool.submit(run_case, params).result()
+      if best is None or result['total'] < best['total']:
+        best = result
+    results.append(best)
+    print(f'{best["name"]}: total {best["total"]:.3f} s (build {best["build"]:.3f}, solve {best["solve"]:.3f}, ' +
+          f'post {best["post"]:.3f}), peak memory {best["peak_rss_mb"]} MB')
+
+  if args.output is not None:
+    with open(args.output, 'w') as out:
+      json.dump({'cases': results}, out, indent=2)
+  if args.baseline is not None:
+    with open(args.baseline, 'r') as ref:
+      baseline = json.load(ref)['cases']
+    if compare(results, baseline, args.tolerance):
+      sys.exit(1)
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,155 @@
+# Copyright 2020, Battelle Energy Alliance, LLC
+# ALL RIGHTS RESERVED
+"""
+Test scalar and vectorized evaluation of HERON Function ValuedParams
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+# Load HERON tools
+HERON_LOC = os.path.abspath(os.path.join(os.path.dirname(__file__), *[os.pardir]*4))
+sys.path.append(HERON_LOC)
+from HERON.src.ValuedParams import factory
+from HERON.src import Placeholders
+from HERON.src.vectorize import vectorized, is_vectorized
+sys.path.pop()
+
+results = {"pass":0, "fail":0}
+
+# same transfer function as the storage workflow, which works for integer or array time indices
+TRANSFER = '''
+def flex_price(data, meta):
+  sine = meta['HERON']['RAVEN_vars']['Signal']
+  t = meta['HERON']['time_index']
+  amount = - 2 * (sine[t] - 0.5)
+  data = {'reference_price': amount}
+  return data, meta
+
+def broken(data, meta):
+  return data
+'''
+
+def load_function(work_dir, name, flag):
+  """
+    Writes a user module and loads it as a Function placeholder.
+    @ In, work_dir, str, location to write module
+    @ In, name, str, name of module and placeholder
+    @ In, flag, bool, whether to declare the module vectorized
+    @ Out, placeholder, Placeholders.Function, loaded placeholder
+  """
+  with open(os.path.join(work_dir, f'{name}.py'), 'w') as module:
+    if flag:
+      module.write('HERON_VECTORIZED = True\n')
+    module.write(TRANSFER)
+  placeholder = Placeholders.Function(loc=work_dir)
+  placeholder.read_input(ET.fromstring(f'<Function name="{name}">{name}.py</Function>'))
+  return placeholder
+
+def make_vp(placeholder):
+  """
+    Creates a Function ValuedParam for the transfer function.
+    @ In, placeholder, Placeholders.Function, loaded placeholder
+    @ Out, vp, ValuedParams.Function, valued param
+  """
+  vp = factory.returnInstance('Function')
+  # skip reading
+  vp._method_name = 'flex_price'
+  vp.set_object(placeholder)
+  return vp
+
+##################
+#
+# declaring functions vectorized
+#
+def plain(data, meta):
+  """
+    Undeclared user function.
+    @ In, data, dict, request
+    @ In, meta, dict, state
+    @ Out, data, dict, request
+    @ Out, meta, dict, state
+  """
+  return data, meta
+if not is_vectorized(plain):
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print('Undeclared function was vectorized!')
+if is_vectorized(plain, module=type('module', (), {'HERON_VECTORIZED': True})):
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print('Function in flagged module was not vectorized!')
+if is_vectorized(vectorized(plain)):
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print('Decorated function was not vectorized!')
+
+work_dir = tempfile.mkdtemp()
+try:
+  scalar = load_function(work_dir, 'scalar_transfers', False)
+  batched = load_function(work_dir, 'batched_transfers', True)
+  if not scalar.is_vectorized('flex_price') and batched.is_vectorized('flex_price'):
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print('Function placeholders did not find the module flag!')
+
+  ##################
+  #
+  # get_method and check_result
+  #
+  signal = np.linspace(0, 1, 10)
+  meta = {'HERON': {'RAVEN_vars': {'Signal': signal}, 'time_index': 3}}
+  method = batched.get_method('flex_price')
+  result = method(None, meta)
+  batched.check_result('flex_price', result)
+  if result[0]['reference_price'] == -2 * (signal[3] - 0.5):
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print(f'Unexpected method result: {result[0]}')
+  try:
+    batched.check_result('broken', batched.get_method('broken')(None, meta))
+    results['fail'] += 1
+    print('Malformed result was not rejected!')
+  except RuntimeError:
+    results['pass'] += 1
+
+  ##################
+  #
+  # scalar and vectorized evaluation give the same values
+  #
+  scalar_vp = make_vp(scalar)
+  batched_vp = make_vp(batched)
+  if not scalar_vp.is_vectorizable() and batched_vp.is_vectorizable():
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print('Function ValuedParams did not report vectorizability from the placeholder!')
+  expected = -2 * (signal[2:8] - 0.5)
+  for name, vp in [('scalar', scalar_vp), ('vectorized', batched_vp)]:
+    inputs = {'HERON': {'RAVEN_vars': {'Signal': signal}, 'time_index': 0}}
+    data, inputs = vp.evaluate_vector(inputs, slice(2, 8))
+    if np.allclose(data['reference_price'], expected):
+      results['pass'] += 1
+    else:
+      results['fail'] += 1
+      print(f'The {name} evaluation gave {data["reference_price"]} instead of {expected}!')
+    if inputs['HERON']['time_index'] == 0:
+      results['pass'] += 1
+    else:
+      results['fail'] += 1
+      print(f'The {name} evaluation did not restore the time index!')
+finally:
+  shutil.rmtree(work_dir)
+
+print(results)
+sys.exit(results['fail'])
@@ -0,0 +1,93 @@
+# Copyright 2020, Battelle Energy Alliance, LLC
+# ALL RIGHTS RESERVED
+"""
+Test evaluation of HERON history ValuedParams (CSV and ARMA) by time index and time range
+"""
+
+import os
+import sys
+
+import numpy as np
+
+# Load HERON tools
+HERON_LOC = os.path.abspath(os.path.join(os.path.dirname(__file__), *[os.pardir]*4))
+sys.path.append(HERON_LOC)
+from HERON.src.ValuedParams import factory
+from HERON.src.ValuedParams.StaticHistory import StaticHistory
+from HERON.src.ValuedParams.SyntheticHistory import SyntheticHistory
+from HERON.src import _utils as hutils
+sys.path.pop()
+
+try:
+  import ravenframework
+except ModuleNotFoundError:
+  # Load RAVEN tools
+  sys.path.append(hutils.get_raven_loc())
+import ravenframework.MessageHandler as MessageHandler
+
+results = {"pass":0, "fail":0}
+
+price = np.linspace(10, 33, 24)
+for alias, kind in [('CSV', StaticHistory), ('ARMA', SyntheticHistory)]:
+  vp = factory.returnInstance(alias)
+  if isinstance(vp, kind):
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print(f'Alias "{alias}" did not return "{kind.__name__}"!')
+  vp.messageHandler = MessageHandler.MessageHandler()
+  # skip reading
+  vp._var_name = 'price'
+  inputs = {'HERON': {'RAVEN_vars': {'price': price}, 'time_index': 5}}
+  # single time index
+  val = vp.evaluate(inputs, target_var='reference_price')[0]['reference_price']
+  if val == price[5]:
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print(f'{alias} evaluation at time 5 gave {val} instead of {price[5]}!')
+  # array of time indices, as for vectorized cashflows
+  if vp.is_vectorizable():
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print(f'{alias} history was not vectorizable!')
+  inputs['HERON']['time_index'] = np.array([3, 0, 7])
+  vals = vp.evaluate(inputs, target_var='reference_price')[0]['reference_price']
+  if np.array_equal(vals, price[[3, 0, 7]]):
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print(f'{alias} evaluation at times [3, 0, 7] gave {vals}!')
+  # range of time indices, which also restores the original time index
+  inputs['HERON']['time_index'] = 5
+  vals = vp.evaluate_vector(inputs, slice(4, 10), target_var='reference_price')[0]['reference_price']
+  if np.array_equal(vals, price[4:10]):
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print(f'{alias} evaluation over times 4 to 10 gave {vals}!')
+  if inputs['HERON']['time_index'] == 5:
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print(f'{alias} range evaluation did not restore the time index!')
+  # aliased variable names are used to find the signal
+  inputs['HERON']['RAVEN_vars']['renamed_price'] = -price
+  vals = vp.evaluate_vector(inputs, slice(0, 3), target_var='reference_price',
+                            aliases={'price': 'renamed_price'})[0]['reference_price']
+  if np.array_equal(vals, -price[:3]):
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print(f'{alias} evaluation did not use the alias: {vals}!')
+  # ranges beyond the end of the signal are an error
+  try:
+    vp.evaluate_vector(inputs, slice(20, 30), target_var='reference_price')
+    results['fail'] += 1
+    print(f'{alias} evaluation beyond the end of the signal did not fail!')
+  except (RuntimeError, IndexError):
+    results['pass'] += 1
+
+print(results)
+sys.exit(results['fail'])
@@ -63,6 +63,13 @@ if val == expect:
 else:
   results['fail'] += 1
   print(f'Parametric value set and get was not the same: set {expect} but got {val}!')
+# evaluate over a range of time indices
+vals = p.evaluate_vector(None, slice(2, 7), target_var='custom_target')[0]['custom_target']
+if len(vals) == 5 and all(v == expect for v in vals):
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print(f'Parametric vector evaluation did not give 5 values of {expect}, but got {vals}!')
 
 print(results)
 sys.exit(results['fail'])
@@ -0,0 +1,87 @@
+# Copyright 2020, Battelle Energy Alliance, LLC
+# ALL RIGHTS RESERVED
+"""
+Test scalar and vectorized evaluation of HERON ROM ValuedParams
+"""
+
+import os
+import sys
+
+import numpy as np
+
+# Load HERON tools
+HERON_LOC = os.path.abspath(os.path.join(os.path.dirname(__file__), *[os.pardir]*4))
+sys.path.append(HERON_LOC)
+from HERON.src.ValuedParams import factory
+from HERON.src.ValuedParamHandler import ValuedParamHandler
+from HERON.src import _utils as hutils
+sys.path.pop()
+
+try:
+  import ravenframework
+except ModuleNotFoundError:
+  # Load RAVEN tools
+  sys.path.append(hutils.get_raven_loc())
+import ravenframework.MessageHandler as MessageHandler
+
+results = {"pass":0, "fail":0}
+
+class FakeROM:
+  """
+    Stands in for a trained RAVEN ROM, which evaluates a full history at once.
+  """
+  def evaluate(self, rlz):
+    """
+      Evaluates the ROM.
+      @ In, rlz, dict, ROM inputs as {name: np.array}
+      @ Out, rlz, dict, ROM outputs as {name: np.array}
+    """
+    # depends on the whole input array, as ROMs may
+    return {'price': rlz['scale'].mean() * rlz['signal'].mean() * np.linspace(1, 2, 24)}
+
+def make_rom(signal_type):
+  """
+    Creates a ROM ValuedParam with a constant input and a signal input.
+    @ In, signal_type, str, ValuedParam type of the signal input
+    @ Out, rom, ValuedParams.ROM, valued param
+  """
+  rom = factory.returnInstance('ROM')
+  # skip reading
+  rom._output = 'price'
+  rom.set_object(FakeROM())
+  scale = ValuedParamHandler('scale')
+  scale.set_const_VP(3.0)
+  signal = ValuedParamHandler('signal')
+  signal._vp = factory.returnInstance(signal_type)
+  signal._vp.messageHandler = MessageHandler.MessageHandler()
+  signal._vp._raven_var = 'Signal'
+  signal._vp._var_name = 'Signal'
+  rom._inputs = {'scale': {'vp': scale, 'signals': []}, 'signal': {'vp': signal, 'signals': []}}
+  return rom
+
+time_slice = slice(2, 8)
+# a history changes with the time step, while a RAVEN variable does not
+for signal_type, signal, vectorizable in [('CSV', np.linspace(0.5, 5, 24), False), ('variable', 1.5, True)]:
+  rom = make_rom(signal_type)
+  raven_vars = {'Signal': signal}
+  # ROM inputs that change with time are not vectorizable
+  if rom.is_vectorizable() == vectorizable:
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print(f'ROM with a "{signal_type}" input reported vectorizable as {rom.is_vectorizable()}!')
+  # vectorized evaluation matches evaluating one time index at a time
+  inputs = {'HERON': {'RAVEN_vars': raven_vars, 'time_index': 0}}
+  vals = rom.evaluate_vector(inputs, time_slice, target_var='price')[0]['price']
+  expected = []
+  for t in range(time_slice.start, time_slice.stop):
+    inputs['HERON']['time_index'] = t
+    expected.append(rom.evaluate(inputs, target_var='price')[0]['price'])
+  if np.allclose(vals, expected):
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print(f'ROM with a "{signal_type}" input gave {vals} by range instead of {expected}!')
+
+print(results)
+sys.exit(results['fail'])
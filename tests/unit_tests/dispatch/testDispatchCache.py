@@ -0,0 +1,128 @@
+# Copyright 2020, Battelle Energy Alliance, LLC
+# ALL RIGHTS RESERVED
+"""
+Test the dispatch result cache
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+import numpy as np
+
+# Load HERON tools
+HERON_LOC = os.path.abspath(os.path.join(os.path.dirname(__file__), *[os.pardir]*4))
+sys.path.append(HERON_LOC)
+from HERON.src.dispatch.DispatchCache import DispatchCache
+sys.path.pop()
+
+results = {"pass":0, "fail":0}
+
+##################
+#
+# make_key
+#
+signals = {'price': np.arange(24, dtype=float), 'Time': np.arange(24)}
+key = DispatchCache.make_key(('Pyomo', 24), [('npp', 100.0)], signals)
+# stable for equal content, regardless of dict order or array identity
+same = DispatchCache.make_key(('Pyomo', 24), [('npp', 100.0)],
+                              {'Time': np.arange(24), 'price': np.arange(24, dtype=float).copy()})
+if key == same:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print('Equal dispatch problems gave different keys!')
+# sensitive to settings, capacities, signal values, and signal types
+changed = {
+  'settings': DispatchCache.make_key(('Pyomo', 12), [('npp', 100.0)], signals),
+  'capacity': DispatchCache.make_key(('Pyomo', 24), [('npp', 101.0)], signals),
+  'signal value': DispatchCache.make_key(('Pyomo', 24), [('npp', 100.0)],
+                                         {'price': np.arange(24, dtype=float) + 1e-9, 'Time': np.arange(24)}),
+  'signal dtype': DispatchCache.make_key(('Pyomo', 24), [('npp', 100.0)],
+                                         {'price': np.arange(24, dtype=np.float32), 'Time': np.arange(24)}),
+  'signal name': DispatchCache.make_key(('Pyomo', 24), [('npp', 100.0)],
+                                        {'cost': np.arange(24, dtype=float), 'Time': np.arange(24)}),
+}
+for what, other in changed.items():
+  if other != key:
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print(f'Changing the {what} did not change the key!')
+
+##################
+#
+# in-memory LRU tier
+#
+cache = DispatchCache(max_entries=2)
+if cache.get('a') is None and cache.misses == 1:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print('Empty cache did not miss!')
+cache.put('a', 1)
+cache.put('b', 2)
+if cache.get('a') == 1:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print('Stored entry was not found!')
+cache.put('c', 3) # evicts "b", the least recently used
+if cache.get('b') is None:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print('Least recently used entry was not evicted!')
+if cache.get('a') == 1 and cache.get('c') == 3:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print('Recently used entries were evicted!')
+if (cache.hits, cache.disk_hits, cache.misses) == (3, 0, 2):
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print(f'Unexpected cache counts: {cache}')
+
+##################
+#
+# on-disk tier
+#
+work_dir = tempfile.mkdtemp()
+try:
+  directory = os.path.join(work_dir, 'dispatch_cache')
+  entry = (dict, np.linspace(0, 1, 5), {'npp': np.ones((1, 5))})
+  DispatchCache(directory=directory).put('problem', entry)
+  # a new cache (such as in another inner sample) finds the entry on disk
+  other = DispatchCache(directory=directory)
+  found = other.get('problem')
+  if (found is not None and found[0] is dict and np.array_equal(found[1], entry[1])
+      and np.array_equal(found[2]['npp'], entry[2]['npp'])):
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print(f'Disk round trip changed the entry: {found}')
+  if other.disk_hits == 1:
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print('Entry was not read from disk!')
+  # the disk tier keeps only the most recently used entries
+  limited = DispatchCache(directory=directory, max_disk_entries=2)
+  past = time.time() - 100
+  os.utime(os.path.join(directory, 'problem.pk'), (past, past))
+  limited.put('second', 2)
+  limited.put('third', 3)
+  stored = sorted(name for name in os.listdir(directory) if name.endswith('.pk'))
+  if stored == ['second.pk', 'third.pk']:
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print(f'Disk tier was not pruned to the most recent entries: {stored}')
+finally:
+  shutil.rmtree(work_dir)
+
+print(results)
+sys.exit(results['fail'])
@@ -0,0 +1,120 @@
+# Copyright 2020, Battelle Energy Alliance, LLC
+# ALL RIGHTS RESERVED
+"""
+Test the acceleration of the fixed-point iteration of governed activity
+"""
+
+import os
+import sys
+
+import numpy as np
+
+# Load HERON tools
+HERON_LOC = os.path.abspath(os.path.join(os.path.dirname(__file__), *[os.pardir]*4))
+sys.path.append(HERON_LOC)
+from HERON.src.dispatch.FixedPoint import FixedPointAccelerator, relative_change
+sys.path.pop()
+
+results = {"pass":0, "fail":0}
+
+def iterate(method, mapping, start, tol=1e-8, limit=1000):
+  """
+    Iterates to a fixed point as the Pyomo dispatcher does for governed activity.
+    @ In, method, str, acceleration method
+    @ In, mapping, callable, fixed-point map G, as G(x) for x given as {key: np.array}
+    @ In, start, dict, first iterate, as {key: np.array}
+    @ In, tol, float, optional, relative change at which to stop
+    @ In, limit, int, optional, largest number of iterations
+    @ Out, x, dict, last iterate
+    @ Out, iterations, int, number of accelerated updates made
+  """
+  accelerator = FixedPointAccelerator(method, depth=5)
+  x = start
+  iterations = 0
+  while iterations < limit:
+    image = mapping(x)
+    if relative_change(image, x) <= tol:
+      break
+    x = accelerator.update(x, image)
+    iterations += 1
+  return x, iterations
+
+# a storage level and a producer's activity, as arrays of different shapes
+start = {'battery': np.zeros(6), 'plant': np.zeros((2, 6))}
+offset = {'battery': np.linspace(1, 2, 6), 'plant': np.arange(12, dtype=float).reshape(2, 6) + 1}
+# fixed point of x = 0.9 x + b is x = 10 b
+expected = dict((key, 10 * value) for key, value in offset.items())
+uniform = lambda x: dict((key, 0.9 * value + offset[key]) for key, value in x.items())
+
+##################
+#
+# no acceleration
+#
+accelerator = FixedPointAccelerator('none')
+image = uniform(start)
+new = accelerator.update(start, image)
+if all(np.array_equal(new[key], image[key]) and new[key].shape == image[key].shape for key in image):
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print(f'Unaccelerated update did not pass the image through: {new}')
+plain, plain_iterations = iterate('none', uniform, start)
+if all(np.allclose(plain[key], expected[key], rtol=1e-6) for key in expected):
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print(f'Unaccelerated iteration did not converge to the fixed point: {plain}')
+
+##################
+#
+# accelerated iterations converge to the same fixed point in fewer iterations
+#
+for method in ['aitken', 'anderson']:
+  found, iterations = iterate(method, uniform, start)
+  if all(np.allclose(found[key], expected[key], rtol=1e-6) for key in expected):
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print(f'{method} iteration did not converge to the fixed point: {found}')
+  if iterations < plain_iterations / 10:
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print(f'{method} iteration took {iterations} iterations, compared to {plain_iterations} without acceleration!')
+
+# Anderson also helps for contractions with a spread of rates
+rng = np.random.default_rng(42)
+basis = np.linalg.qr(rng.normal(size=(18, 18)))[0]
+matrix = basis @ np.diag(np.linspace(0.3, 0.95, 18)) @ basis.T
+def spread(x):
+  """
+    Linear contraction with a spread of rates.
+    @ In, x, dict, iterate, as {key: np.array}
+    @ Out, image, dict, image of the iterate
+  """
+  flat = matrix @ np.concatenate([x['battery'], np.ravel(x['plant'])]) + 1
+  return {'battery': flat[:6], 'plant': flat[6:].reshape(2, 6)}
+_, plain_iterations = iterate('none', spread, start)
+_, iterations = iterate('anderson', spread, start)
+if iterations < plain_iterations / 2:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print(f'anderson iteration took {iterations} iterations, compared to {plain_iterations} without acceleration!')
+
+##################
+#
+# relative change
+#
+old = {'battery': np.array([2.0, -4.0]), 'plant': np.zeros(2)}
+new = {'battery': np.array([2.0, -1.0]), 'plant': np.array([0.0, 0.5])}
+change = relative_change(new, old)
+# the battery changes by 3 relative to its largest magnitude 4; the plant has no scale, so changes by 0.5
+if np.isclose(change, 0.75):
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print(f'Unexpected relative change: {change}')
+
+print(results)
+sys.exit(results['fail'])
@@ -0,0 +1,121 @@
+# Copyright 2020, Battelle Energy Alliance, LLC
+# ALL RIGHTS RESERVED
+"""
+Test the compiled dispatch objective against the per-time-step cashflow evaluation
+"""
+
+import os
+import sys
+import types
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pyomo.environ as pyo
+
+# Load HERON tools
+HERON_LOC = os.path.abspath(os.path.join(os.path.dirname(__file__), *[os.pardir]*4))
+sys.path.append(HERON_LOC)
+from HERON.src import Components
+from HERON.src import _utils as hutils
+from HERON.src.dispatch.DispatchState import PyomoState
+from HERON.src.dispatch.ObjectiveCompiler import ObjectiveCompiler
+from HERON.src.dispatch.PyomoModelHandler import PyomoModelHandler
+sys.path.pop()
+
+try:
+  import ravenframework
+except ModuleNotFoundError:
+  # Load RAVEN tools
+  sys.path.append(hutils.get_raven_loc())
+import ravenframework.MessageHandler as MessageHandler
+
+results = {"pass":0, "fail":0}
+
+# "sales" is linear in the activity; "wear" is not, as its scaling factor is not 1
+COMPONENT = '''
+<Component name="market">
+  <produces resource="electricity" dispatch="independent">
+    <capacity resource="electricity">
+      <fixed_value>10</fixed_value>
+    </capacity>
+  </produces>
+  <economics>
+    <lifetime>3</lifetime>
+    <CashFlow name="sales" type="repeating" taxable='True' inflation='none'>
+      <driver>
+        <activity>electricity</activity>
+        <multiplier>-1</multiplier>
+      </driver>
+      <reference_price>
+        <CSV variable="price">prices</CSV>
+      </reference_price>
+      <reference_driver>
+        <fixed_value>2</fixed_value>
+      </reference_driver>
+    </CashFlow>
+    <CashFlow name="wear" type="repeating" taxable='True' inflation='none'>
+      <driver>
+        <activity>electricity</activity>
+      </driver>
+      <reference_price>
+        <fixed_value>-0.5</fixed_value>
+      </reference_price>
+      <scaling_factor_x>
+        <fixed_value>2</fixed_value>
+      </scaling_factor_x>
+    </CashFlow>
+  </economics>
+</Component>
+'''
+
+comp = Components.Component(messageHandler=MessageHandler.MessageHandler())
+comp.read_input(ET.fromstring(COMPONENT), 'sweep')
+comp.set_crossrefs(dict((obj, {}) for obj in comp.get_crossrefs()))
+
+# window of 6 time steps, starting from time index 2 of a 12-step history
+offset = 2
+times = np.arange(6, dtype=float) + offset
+resource_indexer = {comp: {'electricity': 0}}
+model = pyo.ConcreteModel()
+model.Times = times
+model.time_offset = offset
+model.resource_index_map = resource_indexer
+model.market_production = pyo.Var([0], range(len(times)), initialize=dict(((0, t), 1.5 * t - 2) for t in range(len(times))))
+model.Activity = PyomoState()
+model.Activity.initialize([comp], resource_indexer, times, model)
+meta = {'HERON': {'RAVEN_vars': {'price': np.linspace(20, 42, 12)},
+                  'resource_indexer': resource_indexer,
+                  'Case': types.SimpleNamespace(use_levelized_inner=False)}}
+
+compiler = ObjectiveCompiler([comp])
+if repr(compiler) == '<HERON ObjectiveCompiler linear: 1 generic: 1>':
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print(f'Unexpected cashflow analysis: {compiler}')
+
+heron_meta = dict(meta['HERON'])
+compiled = compiler.build(model, meta)
+if meta['HERON'] == heron_meta:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print(f'Compiling the objective changed the shared meta: {sorted(meta["HERON"])}')
+
+# the per-time-step evaluation used when not compiling (see PyomoModelHandler._compute_cashflows)
+handler = PyomoModelHandler.__new__(PyomoModelHandler)
+baseline = handler._compute_cashflows([comp], model.Activity, times, meta, state_args={'valued': False}, time_offset=offset)
+# compare at two different activity levels
+for scale in [1, -3]:
+  for t in range(len(times)):
+    model.market_production[0, t].set_value(scale * (1.5 * t - 2))
+  got = pyo.value(compiled)
+  expected = pyo.value(baseline)
+  if np.isclose(got, expected):
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print(f'Compiled objective {got} does not match cashflows {expected}!')
+
+print(results)
+sys.exit(results['fail'])
@@ -0,0 +1,163 @@
+# Copyright 2020, Battelle Energy Alliance, LLC
+# ALL RIGHTS RESERVED
+"""
+Test the search of the rolling window length tuner
+"""
+
+import os
+import sys
+
+# Load HERON tools
+HERON_LOC = os.path.abspath(os.path.join(os.path.dirname(__file__), *[os.pardir]*4))
+sys.path.append(HERON_LOC)
+from HERON.src.dispatch.WindowTuner import WindowTuner
+sys.path.pop()
+
+results = {"pass":0, "fail":0}
+
+def tune(tuner, seconds_per_step, limit=20):
+  """
+    Runs windows of the tuner's chosen lengths until it settles.
+    @ In, tuner, WindowTuner, tuner to run
+    @ In, seconds_per_step, callable, time per step for a window length
+    @ In, limit, int, optional, largest number of windows to run
+    @ Out, tried, list, window lengths in order of use
+  """
+  tried = []
+  while not tuner.settled and len(tried) < limit:
+    length = tuner.length
+    tried.append(length)
+    tuner.record(length, seconds_per_step(length) * length)
+  return tried
+
+def dispatch_until_settled(tuner, horizon, seconds_per_step, limit=10):
+  """
+    Runs dispatches of a history as the Pyomo dispatcher does, until the tuner settles.
+    @ In, tuner, WindowTuner, tuner to run
+    @ In, horizon, int, number of time steps in each dispatch
+    @ In, seconds_per_step, callable, time per step for a window length
+    @ In, limit, int, optional, largest number of dispatches to run
+    @ Out, windows, list, lengths of the windows dispatched, in order
+  """
+  windows = []
+  for _ in range(limit):
+    if tuner.settled:
+      break
+    tuner.set_horizon(horizon)
+    start = 0
+    while start < horizon:
+      # the last window is cut short at the end of the history
+      length = min(tuner.length, horizon - start)
+      windows.append(length)
+      tuner.record(length, seconds_per_step(length) * length)
+      start += length
+  return windows
+
+# starting length is clipped to the bounds
+if WindowTuner(300, 4, 200).length == 200:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print('Starting length was not clipped to the upper bound!')
+if WindowTuner(1, 4, 200).length == 4:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print('Starting length was not clipped to the lower bound!')
+
+# the search doubles, then halves, and settles on the fastest length (here 24, the minimum of 1/L + L/576)
+tuner = WindowTuner(24, 4, 200)
+tried = tune(tuner, lambda length: 1 / length + length / 576)
+if tried == [24, 48, 12]:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print(f'Unexpected window lengths tried: {tried}')
+if tuner.settled and tuner.length == 24:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print(f'Tuner did not settle on 24: {tuner}')
+
+# the search keeps doubling while faster, up to the upper bound, whose other neighbor is checked too
+tuner = WindowTuner(8, 4, 100)
+tried = tune(tuner, lambda length: 1 / length)
+if tried == [8, 16, 32, 64, 100, 50]:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print(f'Unexpected window lengths tried when doubling: {tried}')
+if tuner.settled and tuner.length == 100:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print(f'Tuner did not settle on the upper bound: {tuner}')
+
+# the search keeps halving while faster, down to the lower bound, whose other neighbor is checked too
+tuner = WindowTuner(64, 5, 100)
+tried = tune(tuner, lambda length: length)
+if tried == [64, 100, 32, 16, 8, 5, 10]:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print(f'Unexpected window lengths tried when halving: {tried}')
+if tuner.settled and tuner.length == 5:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print(f'Tuner did not settle on the lower bound: {tuner}')
+
+# windows of other lengths, such as the short last window of a history, are ignored
+tuner = WindowTuner(24, 4, 200)
+tuner.record(10, 1.0)
+if tuner.length == 24 and not tuner.costs:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print('Window of a length other than the candidate was recorded!')
+
+# candidates are limited to the dispatch horizon, so a horizon of one window still settles
+tuner = WindowTuner(24, 4, 200)
+windows = dispatch_until_settled(tuner, 24, lambda length: 1 / length + length / 576)
+if tuner.settled and tuner.length == 24:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print(f'Tuner did not settle within a 24-step horizon: {tuner}')
+if max(windows) == 24 and sorted(tuner.costs) == [12, 24]:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print(f'Unexpected windows within a 24-step horizon: {windows}')
+
+# with a horizon shorter than twice the starting length, the horizon itself is the next candidate
+tuner = WindowTuner(24, 4, 200)
+windows = dispatch_until_settled(tuner, 30, lambda length: 1 / length + length / 576)
+if tuner.settled and tuner.length == 24:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print(f'Tuner did not settle within a 30-step horizon: {tuner}')
+if sorted(tuner.costs) == [12, 24, 30]:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print(f'Unexpected lengths timed within a 30-step horizon: {sorted(tuner.costs)}')
+
+# once settled, the length no longer changes
+tuner = WindowTuner(24, 24, 24)
+tuner.record(24, 1.0)
+if tuner.settled and tuner.length == 24:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print(f'Tuner with a single allowed length did not settle: {tuner}')
+tuner.record(24, 1e-6)
+if tuner.length == 24 and tuner.to_dict()['seconds_per_step'] == {'24': 1.0 / 24}:
+  results['pass'] += 1
+else:
+  results['fail'] += 1
+  print('Settled tuner changed after recording!')
+
+print(results)
+sys.exit(results['fail'])
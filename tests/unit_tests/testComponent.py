@@ -6,11 +6,14 @@ import os
 import sys
 import xml.etree.ElementTree as ET
 
+import numpy as np
+
 # Load HERON tools
 HERON_LOC = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir))
 sys.path.append(HERON_LOC)
 from HERON.src import Components
 from HERON.src.ValuedParamHandler import ValuedParamHandler
+from HERON.src.ValuedParams.StaticHistory import StaticHistory
 from HERON.src import _utils as hutils
 sys.path.pop()
 
@@ -55,5 +58,38 @@ if producer.get_tracking_vars() != ['production']:
 else:
   results['pass'] += 1
 
+# capacity and minimum over a range of time indices, with a capacity factor history
+factor = np.linspace(0.5, 1.0, 12)
+producer._capacity_factor = ValuedParamHandler('capacity_factor')
+producer._capacity_factor._vp = StaticHistory()
+producer._capacity_factor._vp.messageHandler = producer.messageHandler
+producer._capacity_factor._vp._var_name = 'factor'
+producer._minimum = ValuedParamHandler('minimum')
+producer._minimum.set_const_VP(0.25)
+meta = {'HERON': {'RAVEN_vars': {'factor': factor}, 'time_index': 0}}
+expected = 500 * factor[2:9]
+caps = producer.get_capacity_vector(meta, slice(2, 9))[0]['electricity']
+if np.allclose(caps, expected):
+  results['pass'] += 1
+else:
+  print(f'Error: capacity vector {caps} is not {expected}')
+  results['fail'] += 1
+# the same as evaluating one time index at a time
+single = []
+for t in range(2, 9):
+  meta['HERON']['time_index'] = t
+  single.append(producer.get_capacity(meta)[0]['electricity'])
+if np.allclose(caps, single):
+  results['pass'] += 1
+else:
+  print(f'Error: capacity vector {caps} does not match capacity by time index {single}')
+  results['fail'] += 1
+mins = producer.get_minimum_vector(meta, slice(2, 9))[0]['electricity']
+if np.allclose(mins, 0.25 * expected):
+  results['pass'] += 1
+else:
+  print(f'Error: minimum vector {mins} is not {0.25 * expected}')
+  results['fail'] += 1
+
 print(results)
 sys.exit(results['fail'])
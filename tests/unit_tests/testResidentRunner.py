@@ -0,0 +1,106 @@
+# Copyright 2020, Battelle Energy Alliance, LLC
+# ALL RIGHTS RESERVED
+"""
+Test reuse of resident HERON dispatch runners between inner samples
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+# Load HERON tools
+HERON_LOC = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir))
+sys.path.append(HERON_LOC)
+from HERON.src import Cases
+from HERON.src import DispatchManager
+from HERON.src import SerializationManager
+sys.path.pop()
+
+results = {"pass":0, "fail":0}
+
+def write_lib(path, resident, mtime_ns=None):
+  """
+    Writes a HERON library with an otherwise empty case.
+    @ In, path, str, library file to write
+    @ In, resident, bool, whether the case keeps runners resident
+    @ In, mtime_ns, int, optional, modification time to set on the file
+    @ Out, None
+  """
+  case = Cases.Case(os.path.dirname(path))
+  case.data_handling['resident_runner'] = resident
+  with open(path, 'wb') as lib:
+    lib.write(SerializationManager.dumps((case, [], [])))
+  if mtime_ns is not None:
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def resident_count(path):
+  """
+    Counts the runners kept for a library file.
+    @ In, path, str, library file
+    @ Out, count, int, number of resident runners for any version of the library
+  """
+  return len([key for key in DispatchManager._resident_runners if key[0][0] == os.path.abspath(path)])
+
+work_dir = tempfile.mkdtemp()
+try:
+  lib = os.path.join(work_dir, 'heron.lib')
+
+  # an unchanged library reuses the runner
+  write_lib(lib, True)
+  first = DispatchManager.get_runner(lib)
+  if DispatchManager.get_runner(lib) is first:
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print('Runner was not reused for an unchanged library!')
+  if resident_count(lib) == 1:
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print('Runner was not kept resident!')
+
+  # a library with a new modification time (e.g. a new outer sample) is reloaded, replacing the old runner
+  mtime = os.stat(lib).st_mtime_ns + 10**9
+  write_lib(lib, True, mtime_ns=mtime)
+  second = DispatchManager.get_runner(lib)
+  if second is not first:
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print('Runner was reused after the library changed!')
+  if second._lib_signature[2] == mtime:
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print(f'Reloaded runner has signature {second._lib_signature}!')
+  if DispatchManager.get_runner(lib) is second:
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print('Reloaded runner was not reused!')
+  if resident_count(lib) == 1:
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print('Runner for the old library was not forgotten!')
+
+  # without resident runners, the library is loaded for each sample
+  DispatchManager._resident_runners.clear()
+  write_lib(lib, False, mtime_ns=mtime + 10**9)
+  if DispatchManager.get_runner(lib) is not DispatchManager.get_runner(lib):
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print('Runner was reused without resident runners enabled!')
+  if resident_count(lib) == 0:
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print('Runner was kept without resident runners enabled!')
+finally:
+  DispatchManager._resident_runners.clear()
+  shutil.rmtree(work_dir)
+
+print(results)
+sys.exit(results['fail'])
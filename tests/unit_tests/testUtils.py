@@ -0,0 +1,158 @@
+# Copyright 2020, Battelle Energy Alliance, LLC
+# ALL RIGHTS RESERVED
+"""
+Test the file caches and structure sidecars of HERON utilities
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Load HERON tools
+HERON_LOC = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir))
+sys.path.append(HERON_LOC)
+from HERON.src import _utils as hutils
+sys.path.pop()
+
+results = {"pass":0, "fail":0}
+
+def baseline_structure(fpath, macro_var, micro_var):
+  """
+    Structure of a CSV as found by reading the full CSV with pandas.
+    @ In, fpath, str, file path to CSV file
+    @ In, macro_var, str, Macro Variable name
+    @ In, micro_var, str, Micro Variable name
+    @ Out, structure, dict, Nested structure of the CSV dataframe.
+  """
+  data = pd.read_csv(fpath)
+  macro_steps = pd.unique(data[macro_var].values)
+  structure = {'macro': {'id': macro_var, 'num': len(macro_steps) + 1,
+                         'first': min(macro_steps), 'last': max(macro_steps)},
+               'clusters': {}, 'segments': {}}
+  for macro_step, df in data.groupby(macro_var):
+    structure['clusters'][macro_step] = [{'id': 0, 'indices': [0, len(df[micro_var].values)], 'represents': ['0']}]
+  return structure
+
+work_dir = tempfile.mkdtemp()
+try:
+  ##################
+  #
+  # CSV column cache
+  #
+  csv = os.path.join(work_dir, 'history.csv')
+  # years out of order, to check they are sorted as pandas groupby sorts them
+  years = np.repeat([2022, 2021, 2023], [3, 4, 2])
+  times = np.concatenate([np.arange(3), np.arange(4), np.arange(2)])
+  price = np.arange(len(years)) * 1.5
+  pd.DataFrame({'Year': years, 'Time': times, 'price': price}).to_csv(csv, index=False)
+
+  data = hutils.load_csv_columns(csv, ['Year', 'price'], int_columns=['Year'])
+  if np.array_equal(data['Year'], years) and np.allclose(data['price'], price):
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print(f'CSV columns were not loaded correctly: {data}')
+  if os.path.isfile(os.path.join(csv + hutils.CSV_CACHE_EXT, 'index.json')):
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print('CSV column cache was not written!')
+
+  # cache hit: columns are memory-mapped from the cache
+  data = hutils.load_csv_columns(csv, ['Year', 'price'], int_columns=['Year'])
+  if isinstance(data['price'], np.memmap) and np.allclose(data['price'], price):
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print('CSV columns were not read from the cache!')
+
+  # a new modification time invalidates the cache
+  pd.DataFrame({'Year': years, 'Time': times, 'price': -price}).to_csv(csv, index=False)
+  stat = os.stat(csv)
+  os.utime(csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+  data = hutils.load_csv_columns(csv, ['price'])
+  if np.allclose(data['price'], -price):
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print('CSV column cache was not invalidated by a new modification time!')
+
+  # the structure matches the one found by pandas from the full CSV
+  structure = hutils.get_csv_structure(csv, 'Year', 'Time')
+  expected = baseline_structure(csv, 'Year', 'Time')
+  if structure == expected:
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print(f'CSV structure {structure} does not match pandas structure {expected}!')
+  # dict comparison ignores order, so check the years are sorted explicitly
+  if list(structure['clusters']) == [2021, 2022, 2023]:
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print(f'CSV structure years are ordered {list(structure["clusters"])}, not sorted!')
+
+  ##################
+  #
+  # ROM structure sidecar
+  #
+  rom = os.path.join(work_dir, 'arma.pk')
+  with open(rom, 'wb') as rom_file:
+    rom_file.write(b'not really a ROM')
+  if hutils.read_structure_sidecar(rom) is None:
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print('Missing structure sidecar was read!')
+  # macro steps out of order, to check the order is kept along with the integer keys
+  rom_structure = {'macro': {'id': 'Year', 'num': 3, 'first': 2021, 'last': 2022},
+                   'clusters': {2022: [{'id': 0, 'indices': [0, 24], 'represents': ['0', '2']}],
+                                2021: [{'id': 0, 'indices': [0, 24], 'represents': ['0']},
+                                       {'id': 1, 'indices': [24, 48], 'represents': ['1']}]},
+                   'segments': {}}
+  hutils.write_structure_sidecar(rom, rom_structure)
+  if isinstance(rom_structure['clusters'], dict):
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print('Writing the structure sidecar changed the structure!')
+  found = hutils.read_structure_sidecar(rom)
+  if found == rom_structure and list(found['clusters']) == [2022, 2021]:
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print(f'Structure sidecar round trip gave {found} instead of {rom_structure}!')
+  # a changed ROM makes the sidecar stale
+  stat = os.stat(rom)
+  os.utime(rom, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+  if hutils.read_structure_sidecar(rom) is None:
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print('Stale structure sidecar was read after the ROM changed!')
+  hutils.write_structure_sidecar(rom, rom_structure)
+  with open(rom, 'ab') as rom_file:
+    rom_file.write(b' again')
+  os.utime(rom, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+  if hutils.read_structure_sidecar(rom) is None:
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print('Stale structure sidecar was read after the ROM size changed!')
+  # an unreadable sidecar is ignored
+  with open(rom + hutils.STRUCTURE_SIDECAR_EXT, 'w') as sidecar:
+    sidecar.write('{"rom": ')
+  if hutils.read_structure_sidecar(rom) is None:
+    results['pass'] += 1
+  else:
+    results['fail'] += 1
+    print('Corrupt structure sidecar was read!')
+finally:
+  shutil.rmtree(work_dir)
+
+print(results)
+sys.exit(results['fail'])